@@ -1,19 +1,29 @@
 from __future__ import print_function
+import threading
 import time
-import random
 
 from six import integer_types  # type: ignore
 from pgoapi.exceptions import ServerSideRequestThrottlingException, ServerSideAccessForbiddenException, \
     UnexpectedResponseException  # type: ignore
 
 from app import kernel
+from app.clock import clock
 from .state_manager import StateManager
+from .rate_limiter import TokenBucketRateLimiter
+from .request_coalescer import RequestCoalescer
+from .retry_policy import RetryPolicies, CircuitBreaker
+from .response_recorder import ResponseRecorder
+from .auth_refresher import AuthRefresher
+from .replay import TrafficRecorder
+from .metrics import ApiMetrics
 from .exceptions import AccountBannedException
 
 
-@kernel.container.register('api_wrapper', ['@pgoapi'], {'provider': '%pogoapi.provider%', 'username': '%pogoapi.username%', 'password': '%pogoapi.password%', 'shared_lib': '%pogoapi.shared_lib%'})
+@kernel.container.register('api_wrapper', ['@pgoapi'], {'provider': '%pogoapi.provider%', 'username': '%pogoapi.username%', 'password': '%pogoapi.password%', 'shared_lib': '%pogoapi.shared_lib%', 'rate_limiter': '@api_rate_limiter', 'coalesce_window': '%pogoapi.coalesce_window%', 'retry_policies': '@api_retry_policies', 'circuit_breaker': '@api_circuit_breaker', 'response_recorder': '@api_response_recorder', 'auth_refresh_margin': '%pogoapi.auth_refresh_margin%', 'traffic_recorder': '@api_traffic_recorder', 'metrics': '@api_metrics', 'state_ttl': '%pogoapi.state_ttl%'})
 class PoGoApi(object):
-    def __init__(self, api, provider="google", username="", password="", shared_lib="encrypt.dll"):
+    def __init__(self, api, provider="google", username="", password="", shared_lib="encrypt.dll", rate_limiter=None, coalesce_window=None,
+                 retry_policies=None, circuit_breaker=None, response_recorder=None, auth_refresh_margin=300, traffic_recorder=None,
+                 metrics=None, state_ttl=None):
         self._api = api
         self.provider = provider
         self.username = username
@@ -21,10 +31,21 @@ class PoGoApi(object):
 
         self.current_position = (0, 0, 0)
 
-        self.state = StateManager()
+        self.state = StateManager(state_ttl)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucketRateLimiter()
+        self.retry_policies = retry_policies if retry_policies is not None else RetryPolicies()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.response_recorder = response_recorder if response_recorder is not None else ResponseRecorder()
+        self.auth_refresher = AuthRefresher(self, refresh_margin=auth_refresh_margin)
+        self.traffic_recorder = traffic_recorder if traffic_recorder is not None else TrafficRecorder()
+        self.metrics = metrics if metrics is not None else ApiMetrics()
 
-        self._pending_calls = {}
-        self._pending_calls_keys = []
+        # Calls are queued per thread so that callers on different threads can't send each other's methods
+        self._local = threading.local()
+        self._send_lock = threading.RLock()
+
+        # Opt-in: merge calls made by several callers within a short window into one envelope
+        self.coalescer = RequestCoalescer(coalesce_window) if coalesce_window else None
 
         self._api.activate_signature(shared_lib)
 
@@ -33,26 +54,68 @@ class PoGoApi(object):
 
     def login(self):
         try:
-            provider, username, password = self.provider, self.username, self.password
-            return self._api.login(provider, username, password, app_simulation=True)
+            logged_in = self._api.login(self.provider, self.username, self.password, app_simulation=True)
+        except TypeError:
+            logged_in = False
+        if logged_in is not False:
+            # Keep the ticket fresh in the background from now on
+            self.auth_refresher.update_deadline()
+            self.auth_refresher.start()
+        return logged_in
+
+    # Log back in without touching the auth refresher. The new ticket is fetched on an auth provider of
+    # its own while requests keep going out with the current one, they are only held back for the swap.
+    def relogin(self):
+        # pylint: disable=protected-access
+        current_provider = getattr(self._api, "_auth_provider", None)
+        if current_provider is None:
+            return self._api.login(self.provider, self.username, self.password, app_simulation=True)
+
+        auth_provider = type(current_provider)()
+        try:
+            if not auth_provider.user_login(self.username, self.password):
+                return False
         except TypeError:
             return False
 
+        with self._send_lock:
+            self._api._auth_provider = auth_provider
+        return True
+
     def set_position(self, lat, lng, alt):
         self._api.set_position(lat, lng, alt)
 
     def get_position(self):
         return self._api.get_position()
 
+    def get_rate_limiter(self):
+        return self.rate_limiter
+
+    def get_response_recorder(self):
+        return self.response_recorder
+
+    def get_metrics(self):
+        return self.metrics
+
+    def get_worldmap(self):
+        return self.state.worldmap
+
     def get_queued_methods(self):
         return self._api.list_curr_methods()
 
+    def _get_pending_calls(self):
+        if not hasattr(self._local, "pending_calls"):
+            self._local.pending_calls = {}
+            self._local.pending_calls_keys = []
+        return self._local.pending_calls, self._local.pending_calls_keys
+
     # Lazily queue RPC functions to be called. These will be filtered later.
     def __getattr__(self, func):
         def function(*args, **kwargs):
             func_name = str(func).upper()
-            self._pending_calls[func_name] = (args, kwargs)
-            self._pending_calls_keys.append(func_name)
+            pending_calls, pending_calls_keys = self._get_pending_calls()
+            pending_calls[func_name] = (args, kwargs)
+            pending_calls_keys.append(func_name)
             return self
 
         return function
@@ -64,86 +127,144 @@ class PoGoApi(object):
             return 0
         for field in ticket:
             if isinstance(field, integer_types):
-                return int(field / 1000 - time.time())
+                return int(field / 1000 - clock.time())
         return 0
 
     # Wrapper for new PGoApi create_request() function
     def create_request(self):
         return self._api.create_request()
 
-    def call(self, ignore_expiration=False, ignore_cache=False):
-        methods, method_keys, self._pending_calls, self._pending_calls_keys = self._pending_calls, self._pending_calls_keys, {}, []
+    def call(self, ignore_expiration=False, ignore_cache=False, max_age=None):
+        methods, method_keys = self._get_pending_calls()
+        self._local.pending_calls, self._local.pending_calls_keys = {}, []
 
-        # Check for ticket expiration before continuing
-        if self.get_expiration_time() < 60 and ignore_expiration is False:
+        # Check for ticket expiration before continuing. The ticket is normally renewed in the background
+        # well before this happens, so this only blocks if the background refresh kept failing.
+        if ignore_expiration is False and self.auth_refresher.get_time_left() < 60:
             print("[API] Token has expired, attempting to log back in...")
-            for _ in range(10):
-                if self.login() is False:
-                    print("[API] Failed to login. Waiting 15 seconds...")
-                    time.sleep(15)
-            if self.get_expiration_time() < 60 and ignore_expiration is False:
-                print("[API] Failed to login after 10 tries, exiting.")
+            if not self.auth_refresher.refresh() or self.auth_refresher.get_time_left() < 60:
+                print("[API] Failed to login after {} tries, exiting.".format(self.auth_refresher.max_attempts))
                 exit(1)
 
-        # See which methods are uncached
+        # See which methods are uncached, optionally accepting cached states up to max_age seconds old
         # If all methods are cached and do not invalidate any states, we can just return current state
-        uncached_method_keys = self.state.filter_cached_methods(method_keys) if ignore_cache is False else method_keys
+        uncached_method_keys = self.state.filter_cached_methods(method_keys, max_age) if ignore_cache is False else method_keys
         if len(uncached_method_keys) == 0:
             return self.state.get_state()
 
-        for _ in range(10):
+        if self.coalescer is None:
+            return self._send(uncached_method_keys, methods)
+
+        # Every caller in the envelope gets back the whole state, as without coalescing
+        if self.coalescer.submit(uncached_method_keys, methods, self._send) is None:
+            return None
+        return self.state.get_state()
+
+    def _call_request(self, request, method_keys, calls):
+        started_at = time.time()
+        try:
+            results = request.call()
+        except Exception as error:  # pylint: disable=broad-except
+            self.metrics.record_request(method_keys, time.time() - started_at)
+            self.traffic_recorder.record(calls, error=error)
+            raise
+        self.metrics.record_request(method_keys, time.time() - started_at)
+        self.traffic_recorder.record(calls, response=results)
+        return results
+
+    def _send(self, method_keys, methods):
+        with self._send_lock:
+            started_at = time.time()
+            results = self._send_with_retries(method_keys, methods)
+            self.metrics.record_envelope(method_keys, time.time() - started_at, results is not None)
+        self.metrics.log_summary_if_due()
+        return results
+
+    def _send_with_retries(self, uncached_method_keys, methods):
+        if not self.circuit_breaker.allow_request():
+            print("[API] Too many failed requests. Skipping API calls for another {:.0f} seconds...".format(self.circuit_breaker.get_remaining_time()))
+            return None
+
+        # Every failure class backs off from its own previous delay
+        attempt = 0
+        delays = {}
+        while True:
+            attempt += 1
 
             request = self._api.create_request()
 
-            # build the request
+            # build the request, with the arguments that are filled in from the current state
+            calls = []
             for method in uncached_method_keys:
                 my_args, my_kwargs = methods[method]
+                my_kwargs = self.state.get_request_kwargs(method, my_kwargs)
                 getattr(request, method)(*my_args, **my_kwargs)
+                calls.append((method, my_args, my_kwargs))
 
-            # random request delay to prevent status code 52: too many requests
-            time.sleep(random.uniform(0.5, 1.5))
+            # wait for our request budget to prevent status code 52: too many requests
+            self.metrics.record_rate_limit_wait(self.rate_limiter.acquire())
 
+            failure, message = None, None
+            started_at = time.time()
             try:
-                results = request.call()
+                results = self._call_request(request, uncached_method_keys, calls)
             except ServerSideRequestThrottlingException:
                 # status code 52: too many requests
-                print("[API] Requesting too fast. Retrying in 10 seconds...")
-                time.sleep(10)
-                continue
+                self.rate_limiter.on_throttle()
+                self.metrics.record_throttle()
+                failure = RetryPolicies.THROTTLED
+                message = "Requesting too fast. Slowing down to {:.2f} requests per second".format(self.rate_limiter.get_rate())
             except ServerSideAccessForbiddenException:
                 # 403 Forbidden
                 print("[API] Your IP address is most likely banned. Try on a different IP/machine.")
                 exit(1)
             except UnexpectedResponseException:
-                print("[API] Got a non-200 HTTP response from API. Retrying in 10 seconds...")
-                time.sleep(10)
-                continue
+                failure = RetryPolicies.HTTP_ERROR
+                message = "Got a non-200 HTTP response from API"
             except TypeError:
-                print("[API] Failed to perform API call (servers might be offline). Retrying in 10 seconds...")
-                time.sleep(10)
+                failure = RetryPolicies.OFFLINE
+                message = "Failed to perform API call (servers might be offline)"
+
+            if failure is None:
+                if results is False or results is None:
+                    failure = RetryPolicies.EMPTY_RESPONSE
+                    message = "API call failed (empty response)"
+                else:
+                    status_code = results.get('status_code', None)
+                    if status_code == 3:
+                        raise AccountBannedException()
+                    elif status_code != 1:
+                        failure = RetryPolicies.BAD_STATUS
+                        message = "API call failed (status code {})".format(status_code)
+
+            if failure is not None:
+                self.circuit_breaker.record_failure()
+                policy = self.retry_policies.get(failure)
+                if self.circuit_breaker.is_open():
+                    print("[API] {}. Too many failed requests, giving up for {:.0f} seconds.".format(message, self.circuit_breaker.get_remaining_time()))
+                    return None
+                if not policy.should_retry(attempt):
+                    print("[API] {}. Giving up after {} attempts.".format(message, attempt))
+                    return None
+
+                delay = delays[failure] = policy.next_delay(delays.get(failure, None))
+                self.metrics.record_retry(failure, delay)
+                print("[API] {}. Retrying in {:.1f} seconds...".format(message, delay))
+                clock.sleep(delay)
                 continue
 
-            if results is False or results is None:
-                print("[API] API call failed (empty response). Retrying in 10 seconds...")
-                time.sleep(10)
-            else:
-                status_code = results.get('status_code', None)
-                if status_code == 3:
-                    raise AccountBannedException()
-                elif status_code != 1:
-                    print("[API] API call failed (status code {}). Retrying in 10 seconds...".format(status_code))
-                    time.sleep(10)
-                    continue
-
-                # status code 1: success
-                with open('api-test.txt', 'w') as outfile:
-                    outfile.write(str(results))
-
-                self.state.mark_stale(uncached_method_keys)
-
-                # Transform our responses and return our current state
-                responses = results.get("responses", {})
-                for key in responses:
-                    self.state.update_with_response(key, responses[key])
-                return self.state.get_state()
-        return None
+            # status code 1: success
+            self.rate_limiter.on_success()
+            self.circuit_breaker.record_success()
+
+            self.response_recorder.record(uncached_method_keys, results, started_at, time.time() - started_at, attempt)
+
+            self.state.mark_stale(uncached_method_keys)
+
+            # Transform our responses and return our current state
+            parse_started_at = time.time()
+            responses = results.get("responses", {})
+            for key in responses:
+                self.state.update_with_response(key, responses[key])
+            self.metrics.record_parse_time(time.time() - parse_started_at)
+            return self.state.get_state()
@@ -0,0 +1,83 @@
+import threading
+
+from app.clock import clock
+
+
+class AuthRefresher(object):
+    """
+        Renews the auth ticket in a background thread some time before it expires, so that API calls
+        never have to stop and log back in. The expiration deadline is cached, which makes checking it
+        on every call a simple comparison instead of a walk over the auth ticket.
+    """
+
+    def __init__(self, api_wrapper, refresh_margin=300, retry_delay=15, max_attempts=10):
+        # type: (PoGoApi, float, float, int) -> None
+        self._api_wrapper = api_wrapper
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+
+        self._deadline = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def update_deadline(self):
+        # type: () -> None
+        self._deadline = clock.time() + self._api_wrapper.get_expiration_time()
+
+    def get_time_left(self):
+        # type: () -> float
+        if self._deadline is None:
+            self.update_deadline()
+        return self._deadline - clock.time()
+
+    def start(self):
+        # type: () -> None
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        # type: () -> None
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            wait = self.get_time_left() - self.refresh_margin
+            if wait > 0:
+                clock.wait(self._stop, wait)
+                continue
+
+            try:
+                refreshed = self.refresh()
+            except Exception as error:  # pylint: disable=broad-except
+                # Keep going, calls log back in themselves if the ticket runs out meanwhile
+                print("[API] Failed to refresh the auth ticket: {}".format(error))
+                refreshed = False
+
+            # Don't hammer the login servers if the new ticket is already inside the refresh margin
+            if not refreshed or self.get_time_left() <= self.refresh_margin:
+                clock.wait(self._stop, self.retry_delay)
+
+    # Log back in, trying up to max_attempts times. Only one refresh runs at a time; if another thread
+    # is already refreshing, this waits for it and reuses its result.
+    def refresh(self):
+        # type: () -> bool
+        deadline = self._deadline
+        with self._refresh_lock:
+            if self._deadline != deadline and self.get_time_left() > self.refresh_margin:
+                return True
+
+            for attempt in range(self.max_attempts):
+                if self._api_wrapper.relogin() is not False:
+                    self.update_deadline()
+                    return True
+
+                if attempt < self.max_attempts - 1:
+                    print("[API] Failed to login. Waiting {} seconds...".format(self.retry_delay))
+                    clock.wait(self._stop, self.retry_delay)
+            return False
@@ -3,6 +3,10 @@ from .pokemon import Pokemon
 
 
 class Encounter(JSONEncodable):
+    __slots__ = ("status", "latitude", "longitude", "spawn_point_id", "encounter_id", "last_modified_timestamp_ms",
+                 "time_until_hidden_ms", "wild_pokemon", "probability", "captured_pokemon_id", "xp", "candy",
+                 "activity_type", "stardust")
+
     def __init__(self):
         self.status = 0
         self.latitude = 0.0
@@ -51,6 +55,3 @@ class Encounter(JSONEncodable):
         self.candy = sum(capture_award.get("candy", [0]))
         self.activity_type = capture_award.get("activity_type", [0, 0, 0])
         self.stardust = sum(capture_award.get("stardust", [0]))
-
-    def __repr__(self):
-        return str(self.__dict__)
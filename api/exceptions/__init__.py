@@ -4,3 +4,19 @@ class AccountBannedException(Exception):
         if message is None:
             message = "[API] Status code 3 received. This may mean that your account is permanently banned. See https://www.reddit.com/r/pokemongodev/comments/4xkqmq/new_ban_types_and_their_causes/ for details."
         super(AccountBannedException, self).__init__(message)
+
+
+class ReplayMismatchException(Exception):
+
+    def __init__(self, expected, actual):
+        message = "[API] Replayed session expected a request for {}, but the bot requested {}.".format(
+            ", ".join(expected), ", ".join(actual))
+        super(ReplayMismatchException, self).__init__(message)
+
+
+class ReplayFinishedException(Exception):
+
+    def __init__(self, message=None):
+        if message is None:
+            message = "[API] Reached the end of the replayed session."
+        super(ReplayFinishedException, self).__init__(message)
@@ -0,0 +1,21 @@
+import math
+
+EARTH_RADIUS = 6371000.0
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180.0
+
+
+# Equirectangular approximation, well within a meter of the real distance over a few kilometers.
+def get_distance(lat1, lng1, lat2, lng2):
+    # type: (float, float, float, float) -> float
+    x = (lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2.0))
+    y = lat2 - lat1
+    return math.sqrt(x * x + y * y) * METERS_PER_DEGREE
+
+
+# Great circle distance on a sphere, for when the equirectangular approximation drifts.
+def get_haversine_distance(lat1, lng1, lat2, lng2):
+    # type: (float, float, float, float) -> float
+    d_lat = math.sin(math.radians(lat2 - lat1) / 2.0)
+    d_lng = math.sin(math.radians(lng2 - lng1) / 2.0)
+    a = d_lat * d_lat + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * d_lng * d_lng
+    return 2.0 * EARTH_RADIUS * math.asin(math.sqrt(min(a, 1.0)))
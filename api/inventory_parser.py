@@ -1,58 +1,117 @@
+from collections import OrderedDict
+
 from .json_encodable import JSONEncodable
 from .pokemon import Egg, Pokemon
+from .pokemon_bag import PokemonBag
 from .item import Incubator
 
 
 class InventoryParser(JSONEncodable):
-    def __init__(self, data):
-        data = data.get("inventory_delta", {})
-        self.last_updated = data.get("new_timestamp_ms", 0)
+    """
+        The player's inventory, kept up to date from GET_INVENTORY responses. After the first full
+        inventory, requests can send last_timestamp_ms so that the server only returns what changed
+        since then; those deltas are applied to the existing objects instead of parsing everything again.
+    """
+
+    def __init__(self, data=None):
+        self.last_updated = 0
 
-        items = data.get("inventory_items", [])
         self.items = {"count": 0}
         self.candy = {}
         self.pokedex_entries = {}
 
         self.pokemon = []
+        self.pokemon_bag = PokemonBag(self.pokemon)
         self.eggs = []
         self.egg_incubators = []
 
-        for item in items:
+        self._pokemon = OrderedDict()
+        self._eggs = OrderedDict()
+
+        if data is not None:
+            self.update(data)
+
+    # A response is a delta if it was made against the inventory we have (original_timestamp_ms is
+    # our last new_timestamp_ms), otherwise it is the whole inventory and replaces what we have.
+    def is_delta(self, data):
+        # type: (Dict) -> bool
+        original_timestamp = data.get("inventory_delta", {}).get("original_timestamp_ms", 0)
+        return self.last_updated > 0 and original_timestamp == self.last_updated
+
+    def update(self, data):
+        # type: (Dict) -> None
+        if not self.is_delta(data):
+            self._reset()
+
+        data = data.get("inventory_delta", {})
+        self.last_updated = data.get("new_timestamp_ms", self.last_updated)
+
+        # Items and candy in a delta hold the new totals, not the difference
+        items = dict(self.items)
+        candy = dict(self.candy)
+        pokemon_changed = False
+
+        for item in data.get("inventory_items", []):
+            deleted_item = item.get("deleted_item", None)
+            if deleted_item is not None:
+                unique_id = deleted_item.get("pokemon_id", 0)
+                if self._pokemon.pop(unique_id, None) is not None or self._eggs.pop(unique_id, None) is not None:
+                    pokemon_changed = True
+                continue
+
             item = item.get("inventory_item_data", {})
 
             if "candy" in item:
                 num_candy = item["candy"].get("candy", 0)
                 family_id = item["candy"].get("family_id", 0)
-                if num_candy == 0 or family_id == 0:
+                if family_id == 0:
                     continue
-                if family_id not in self.candy:
-                    self.candy[family_id] = num_candy
+                if num_candy == 0:
+                    candy.pop(family_id, None)
                 else:
-                    self.candy[family_id] += num_candy
+                    candy[family_id] = num_candy
 
             elif "egg_incubators" in item:
                 incubators = item['egg_incubators'].get('egg_incubator', [])
                 if isinstance(incubators, dict):
                     incubators = [incubators]
-                for incu in incubators:
-                    self.egg_incubators.append(Incubator(incu))
+                self.egg_incubators = [Incubator(incu) for incu in incubators]
 
             elif "item" in item:
                 num_item = item["item"].get("count", 0)
                 item_id = item["item"].get("item_id", 0)
-                if num_item == 0 or item_id == 0:
+                if item_id == 0:
                     continue
-
-                if item_id not in self.items:
-                    self.items[item_id] = num_item
+                if num_item == 0:
+                    items.pop(item_id, None)
                 else:
-                    self.items[item_id] += num_item
-
-                self.items["count"] += num_item
+                    items[item_id] = num_item
 
             elif "pokemon_data" in item:
                 current_data = item["pokemon_data"]
+                unique_id = current_data.get("id", 0)
                 if current_data.get("is_egg", False):
-                    self.eggs.append(Egg(current_data))
+                    self._eggs[unique_id] = Egg(current_data)
                 else:
-                    self.pokemon.append(Pokemon(current_data))
+                    self._pokemon[unique_id] = Pokemon(current_data)
+                pokemon_changed = True
+
+        items["count"] = sum(count for item_id, count in items.items() if item_id != "count")
+        self.items = items
+        self.candy = candy
+
+        # Hand out new lists when something changed, so lists returned earlier are left as they were
+        if pokemon_changed:
+            self.pokemon = list(self._pokemon.values())
+            self.pokemon_bag = PokemonBag(self.pokemon)
+            self.eggs = list(self._eggs.values())
+
+    def _reset(self):
+        self.items = {"count": 0}
+        self.candy = {}
+        self.egg_incubators = []
+        self._pokemon = OrderedDict()
+        self._eggs = OrderedDict()
+        self.pokemon = []
+        self.pokemon_bag = PokemonBag(self.pokemon)
+        self.eggs = []
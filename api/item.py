@@ -2,6 +2,9 @@ from api.json_encodable import JSONEncodable
 
 
 class Incubator(JSONEncodable):
+    __slots__ = ("unique_id", "item_id", "incubator_type", "uses_remaining", "pokemon_id", "start_km_walked",
+                 "target_km_walked")
+
     def __init__(self, data):
         self.unique_id = data.get("id", 0)
         self.item_id = data.get("item_id")
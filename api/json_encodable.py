@@ -2,22 +2,60 @@
 from builtins import bytes
 import json
 
-from six import integer_types
+from six import integer_types, string_types
+
+# The slots of every class in the hierarchy, collected once per class.
+_fields = {}
+
+
+def get_fields(cls):
+    # type: (type) -> Tuple[str, ...]
+    fields = _fields.get(cls, None)
+    if fields is None:
+        fields = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get("__slots__", ())
+            if isinstance(slots, string_types):
+                slots = (slots,)
+            for slot in slots:
+                if slot not in ("__dict__", "__weakref__") and slot not in fields:
+                    fields.append(slot)
+        fields = tuple(fields)
+        _fields[cls] = fields
+    return fields
 
 
 class JSONEncodable(object):
+    """
+        Base class for the objects built from API responses. Subclasses list their attributes in
+        __slots__ so that they don't carry a __dict__ each, which matters for big Pokemon bags and maps
+        with many cells. Subclasses without __slots__ keep working through their __dict__. The member
+        descriptors Python creates for the slots are the field descriptors; a Python-level descriptor
+        on top of them would add a function call to every attribute read.
+    """
+
+    __slots__ = ()
+
+    def to_dict(self):
+        # type: () -> Dict[str, Any]
+        values = {}
+        for field in get_fields(type(self)):
+            if hasattr(self, field):
+                values[field] = getattr(self, field)
+        values.update(getattr(self, "__dict__", {}))
+        return values
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(self.to_dict())
 
     def __iter__(self):
-        return iter(self.__dict__)
+        return iter(self.to_dict())
 
     def to_json(self):
         return json.dumps(self.to_json_encodable())
 
     def to_json_encodable(self):
-        json_encodable_dict = dict(self.__dict__)
+        json_encodable_dict = self.to_dict()
         for key in json_encodable_dict:
             if isinstance(json_encodable_dict[key], bytes):
                 json_encodable_dict[key] = list(json_encodable_dict[key])
@@ -26,23 +64,25 @@ class JSONEncodable(object):
         return json_encodable_dict
 
     def __getstate__(self):
-        state = self.__dict__.copy()
+        state = self.to_dict()
         for obj in state:
             if isinstance(state[obj], JSONEncodable):
                 state[obj] = state[obj].__getstate__()
-            elif isinstance(state[obj], integer_types):
+            elif isinstance(state[obj], integer_types) and not isinstance(state[obj], bool):
                 state[obj] = str(state[obj])
         return state
 
     def __setstate__(self, state):
         for obj in state:
-            try:
-                original_value = state[obj]
-                state[obj] = float(original_value)
-                state[obj] = int(original_value)
-            except ValueError:
-                pass
-        self.__dict__.update(state)
+            # Only the numbers __getstate__ turned into strings are turned back
+            if isinstance(state[obj], string_types):
+                try:
+                    original_value = state[obj]
+                    state[obj] = float(original_value)
+                    state[obj] = int(original_value)
+                except ValueError:
+                    pass
+            setattr(self, obj, state[obj])
 
     @staticmethod
     def encode_list(input_list):
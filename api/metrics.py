@@ -0,0 +1,186 @@
+from collections import deque
+import threading
+
+from app import kernel
+from app.clock import clock
+
+
+def percentile(samples, fraction):
+    # type: (List[float], float) -> float
+    # Nearest-rank percentile of an already sorted list
+    if len(samples) == 0:
+        return 0.0
+    index = int(round(fraction * (len(samples) - 1)))
+    return samples[index]
+
+
+class _Histogram(object):
+    def __init__(self, sample_size):
+        # type: (int) -> None
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=sample_size)
+
+    def add(self, value):
+        # type: (float) -> None
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._samples.append(value)
+
+    def get_stats(self):
+        # type: () -> Dict[str, float]
+        samples = sorted(self._samples)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count > 0 else 0.0,
+            "max": self.max,
+            "p50": percentile(samples, 0.50),
+            "p95": percentile(samples, 0.95),
+            "p99": percentile(samples, 0.99)
+        }
+
+
+@kernel.container.register('api_metrics', ['@config.core', '@logger'])
+class ApiMetrics(object):
+    """
+        Counts and times every request sent through PoGoApi, split by the RPC methods it carried, and
+        keeps track of the time spent waiting for the rate limiter, sleeping between retries and parsing
+        responses. Latency percentiles are computed over the last sample_size requests of each method.
+        A summary goes to the logger every summary_interval seconds.
+    """
+
+    def __init__(self, config=None, logger=None):
+        # type: (Optional[Dict], Optional[Logger]) -> None
+        self.logger = logger
+        settings = {}
+        if config is not None:
+            settings = config.get('api', {}).get('metrics', {}) or {}
+
+        self.summary_interval = float(settings.get('summary_interval', 300))
+        self.sample_size = int(settings.get('sample_size', 1000))
+
+        self._lock = threading.Lock()
+        self._methods = {}
+        self._request_latency = _Histogram(self.sample_size)
+        self._envelope_latency = _Histogram(self.sample_size)
+        self._parse_time = _Histogram(self.sample_size)
+
+        self.envelopes = 0
+        self.failed_envelopes = 0
+        self.requests = 0
+        self.retries = {}
+        self.throttles = 0
+        self.rate_limit_wait = 0.0
+        self.retry_wait = 0.0
+        self._last_summary = clock.time()
+
+    def _get_method(self, method):
+        if method not in self._methods:
+            self._methods[method] = {
+                "latency": _Histogram(self.sample_size),
+                "envelopes": 0,
+                "failures": 0
+            }
+        return self._methods[method]
+
+    # A single HTTP round trip, successful or not.
+    def record_request(self, method_keys, duration):
+        # type: (List[str], float) -> None
+        with self._lock:
+            self.requests += 1
+            self._request_latency.add(duration)
+            for method in method_keys:
+                self._get_method(method)["latency"].add(duration)
+
+    # A whole call, from the first attempt until the response was parsed or we gave up.
+    def record_envelope(self, method_keys, duration, success):
+        # type: (List[str], float, bool) -> None
+        with self._lock:
+            self.envelopes += 1
+            self._envelope_latency.add(duration)
+            if not success:
+                self.failed_envelopes += 1
+            for method in method_keys:
+                method_stats = self._get_method(method)
+                method_stats["envelopes"] += 1
+                if not success:
+                    method_stats["failures"] += 1
+
+    def record_retry(self, failure, delay):
+        # type: (str, float) -> None
+        with self._lock:
+            self.retries[failure] = self.retries.get(failure, 0) + 1
+            self.retry_wait += delay
+
+    def record_throttle(self):
+        # type: () -> None
+        with self._lock:
+            self.throttles += 1
+
+    def record_rate_limit_wait(self, wait):
+        # type: (float) -> None
+        with self._lock:
+            self.rate_limit_wait += wait
+
+    def record_parse_time(self, duration):
+        # type: (float) -> None
+        with self._lock:
+            self._parse_time.add(duration)
+
+    def get_methods(self):
+        # type: () -> List[str]
+        return sorted(self._methods)
+
+    def get_method_stats(self, method):
+        # type: (str) -> Optional[Dict]
+        with self._lock:
+            if method not in self._methods:
+                return None
+            method_stats = self._methods[method]
+            stats = method_stats["latency"].get_stats()
+            stats["envelopes"] = method_stats["envelopes"]
+            stats["failures"] = method_stats["failures"]
+            return stats
+
+    def get_stats(self):
+        # type: () -> Dict
+        with self._lock:
+            return {
+                "envelopes": self.envelopes,
+                "failed_envelopes": self.failed_envelopes,
+                "requests": self.requests,
+                "retries": dict(self.retries),
+                "throttles": self.throttles,
+                "rate_limit_wait": self.rate_limit_wait,
+                "retry_wait": self.retry_wait,
+                "request_latency": self._request_latency.get_stats(),
+                "envelope_latency": self._envelope_latency.get_stats(),
+                "parse_time": self._parse_time.get_stats()
+            }
+
+    def summary(self):
+        # type: () -> List[str]
+        stats = self.get_stats()
+        lines = [
+            "{} calls ({} failed) in {} requests, {} retries, {} throttled".format(
+                stats["envelopes"], stats["failed_envelopes"], stats["requests"],
+                sum(stats["retries"].values()), stats["throttles"]),
+            "Server {:.3f}s p50 / {:.3f}s p95, waited {:.1f}s for the rate limit and {:.1f}s between retries, parsing {:.3f}s p50".format(
+                stats["request_latency"]["p50"], stats["request_latency"]["p95"],
+                stats["rate_limit_wait"], stats["retry_wait"], stats["parse_time"]["p50"])
+        ]
+        for method in self.get_methods():
+            method_stats = self.get_method_stats(method)
+            lines.append("{}: {} calls, {:.3f}s p50 / {:.3f}s p95 / {:.3f}s p99".format(
+                method, method_stats["envelopes"], method_stats["p50"], method_stats["p95"], method_stats["p99"]))
+        return lines
+
+    def log_summary_if_due(self):
+        # type: () -> None
+        if self.logger is None or self.summary_interval <= 0 or clock.time() - self._last_summary < self.summary_interval:
+            return
+        self._last_summary = clock.time()
+        for line in self.summary():
+            self.logger.log(line, prefix='API')
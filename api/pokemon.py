@@ -2,6 +2,9 @@ from api.json_encodable import JSONEncodable
 
 
 class Egg(JSONEncodable):
+    __slots__ = ("unique_id", "walked_distance", "total_distance", "creation_time_ms", "captured_cell_id",
+                 "egg_incubator_id")
+
     def __init__(self, data):
         self.unique_id = data.get("id", 0)
         self.walked_distance = data.get("egg_km_walked_start", 0.0)
@@ -12,6 +15,11 @@ class Egg(JSONEncodable):
 
 
 class Pokemon(JSONEncodable):
+    __slots__ = ("unique_id", "pokemon_id", "hp", "max_hp", "combat_power", "combat_power_multiplier",
+                 "additional_cp_multiplier", "attack", "defense", "stamina", "potential", "pokeball", "move_1",
+                 "move_2", "creation_time_ms", "captured_cell_id", "height", "weight", "origin", "favorite",
+                 "nickname", "deployed_fort_id", "from_fort")
+
     def __init__(self, data):
         self.unique_id = data.get("id", 0)
         self.pokemon_id = data.get("pokemon_id", 0)
@@ -37,8 +45,5 @@ class Pokemon(JSONEncodable):
         self.favorite = data.get("favorite", 0) == 1
         self.nickname = data.get("nickname", None)
 
-        self.favorite = data.get("favorite", 0) == 1
-        self.nickname = data.get("nickname", None)
-
         self.deployed_fort_id = data.get("deployed_fort_id", None)
         self.from_fort = data.get("from_fort", None)
@@ -0,0 +1,154 @@
+from array import array
+from collections import OrderedDict
+
+
+class PokemonBag(object):
+    """
+        A view of a list of Pokemon for the transfer and evolve rules. The first time a rule needs them,
+        species, CP, IV, the favorite and deployed flags and the creation time are copied into compact arrays
+        and the rows (indexes into the pokemon list) grouped by species, so that rules compare plain numbers
+        instead of going through every Pokemon object again. A new bag costs nothing until it is used, and
+        filtered lists are handled as rows of the same bag.
+    """
+
+    def __init__(self, pokemon):
+        # type: (List[Pokemon]) -> None
+        self.pokemon = pokemon
+
+        self._species = None
+        self._combat_power = None
+        self._potential = None
+        self._favorite = None
+        self._deployed = None
+        self._creation_time = None
+        self._groups = None
+        self._rows_by_id = None
+
+    def __len__(self):
+        return len(self.pokemon)
+
+    def _load_columns(self):
+        species = array('H')
+        combat_power = array('d')
+        potential = array('d')
+        favorite = array('B')
+        deployed = array('B')
+        # Doubles hold millisecond timestamps exactly, and unlike 'q' exist on Python 2 too
+        creation_time = array('d')
+        for deck_pokemon in self.pokemon:
+            species.append(deck_pokemon.pokemon_id)
+            combat_power.append(deck_pokemon.combat_power)
+            potential.append(deck_pokemon.potential)
+            favorite.append(1 if deck_pokemon.favorite else 0)
+            deployed.append(0 if deck_pokemon.deployed_fort_id is None else 1)
+            creation_time.append(deck_pokemon.creation_time_ms)
+        self._species, self._combat_power, self._potential = species, combat_power, potential
+        self._favorite, self._deployed, self._creation_time = favorite, deployed, creation_time
+
+    def _get_columns(self):
+        # type: () -> Tuple[array, array, array]
+        if self._species is None:
+            self._load_columns()
+        return self._species, self._combat_power, self._potential
+
+    def _get_flags(self):
+        # type: () -> Tuple[array, array]
+        if self._species is None:
+            self._load_columns()
+        return self._favorite, self._deployed
+
+    def _get_rows_by_id(self):
+        # type: () -> Dict[int, int]
+        if self._rows_by_id is None:
+            self._rows_by_id = dict((deck_pokemon.unique_id, row) for row, deck_pokemon in enumerate(self.pokemon))
+        return self._rows_by_id
+
+    def get_pokemon(self, rows):
+        # type: (Iterable[int]) -> List[Pokemon]
+        pokemon = self.pokemon
+        return [pokemon[row] for row in rows]
+
+    # Rows of the given Pokemon, or None if one of them is not in the bag
+    def get_rows(self, pokemon):
+        # type: (List[Pokemon]) -> Optional[List[int]]
+        if pokemon is self.pokemon:
+            return list(range(len(pokemon)))
+
+        rows_by_id = self._get_rows_by_id()
+        rows = []
+        for deck_pokemon in pokemon:
+            row = rows_by_id.get(deck_pokemon.unique_id)
+            if row is None:
+                return None
+            rows.append(row)
+        return rows
+
+    # Rows (all of them, or the given ones) grouped by species, in the order in which each species first appears
+    def group_by_species(self, rows=None):
+        # type: (Optional[List[int]]) -> Dict[int, List[int]]
+        if rows is None and self._groups is not None:
+            return self._groups
+
+        species = self._get_columns()[0]
+        groups = OrderedDict()
+        for row in range(len(species)) if rows is None else rows:
+            group = groups.get(species[row])
+            if group is None:
+                groups[species[row]] = group = []
+            group.append(row)
+
+        if rows is None:
+            self._groups = groups
+        return groups
+
+    def get_species_rows(self, species):
+        # type: (int) -> List[int]
+        return self.group_by_species().get(species, [])
+
+    # Rows among the given ones with CP and IV at or below the thresholds. With "and" logic both have to be,
+    # with "or" logic either one.
+    def select_below(self, rows, cp_threshold, iv_threshold, logic='and'):
+        # type: (List[int], int, float, str) -> List[int]
+        _, combat_power, potential = self._get_columns()
+        if logic == 'and':
+            return [row for row in rows if combat_power[row] <= cp_threshold and potential[row] <= iv_threshold]
+        elif logic == 'or':
+            return [row for row in rows if combat_power[row] <= cp_threshold or potential[row] <= iv_threshold]
+        return []
+
+    # Rows among the given ones of Pokemon that are not deployed at a gym
+    def select_not_deployed(self, rows):
+        # type: (List[int]) -> List[int]
+        deployed = self._get_flags()[1]
+        return [row for row in rows if not deployed[row]]
+
+    # Rows among the given ones of Pokemon that are not favorites
+    def select_not_favorite(self, rows):
+        # type: (List[int]) -> List[int]
+        favorite = self._get_flags()[0]
+        return [row for row in rows if not favorite[row]]
+
+    # Rows sorted by CP, ties keep their order
+    def sort_by_cp(self, rows, reverse=False):
+        # type: (List[int], bool) -> List[int]
+        combat_power = self._get_columns()[1]
+        return sorted(rows, key=lambda row: combat_power[row], reverse=reverse)
+
+    # Rows sorted by CP * IV, ties keep their order
+    def sort_by_score(self, rows):
+        # type: (List[int]) -> List[int]
+        _, combat_power, potential = self._get_columns()
+        return sorted(rows, key=lambda row: combat_power[row] * potential[row])
+
+    # Rows sorted by creation time, ties keep their order
+    def sort_by_creation_time(self, rows, reverse=False):
+        # type: (List[int], bool) -> List[int]
+        if self._species is None:
+            self._load_columns()
+        creation_time = self._creation_time
+        return sorted(rows, key=lambda row: creation_time[row], reverse=reverse)
+
+    def find(self, unique_id):
+        # type: (int) -> Optional[Pokemon]
+        row = self._get_rows_by_id().get(unique_id)
+        return None if row is None else self.pokemon[row]
@@ -0,0 +1,99 @@
+import threading
+
+from app import kernel
+from app.clock import clock
+
+
+@kernel.container.register('api_rate_limiter', ['@config.core'])
+class TokenBucketRateLimiter(object):
+    """
+        Token bucket sized to the server's request budget. The refill rate adapts to the server:
+        every successful request nudges it up (additive increase) and every throttled request
+        cuts it down (multiplicative decrease).
+    """
+
+    def __init__(self, config=None):
+        # type: (Optional[Dict]) -> None
+        settings = {}
+        if config is not None:
+            settings = config.get('api', {}).get('rate_limit', {}) or {}
+
+        self.capacity = float(settings.get('burst', 5))
+        self.min_rate = float(settings.get('min_requests_per_second', 0.1))
+        self.max_rate = float(settings.get('max_requests_per_second', 2.0))
+        self.increase = float(settings.get('increase', 0.05))
+        self.decrease = float(settings.get('decrease', 0.5))
+        self.rate = min(self.max_rate, max(self.min_rate, float(settings.get('requests_per_second', 1.0))))
+
+        self._tokens = self.capacity
+        self._last_refill = clock.time()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.throttles = 0
+        self.last_wait = 0.0
+        self.total_wait = 0.0
+
+    def _refill(self, now):
+        # type: (float) -> None
+        elapsed = max(0.0, now - self._last_refill)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        # type: () -> float
+        # Take a token, sleeping until one is available. Tokens are reserved before sleeping so
+        # that concurrent callers queue up behind each other instead of all waking at once.
+        with self._lock:
+            self._refill(clock.time())
+            self._tokens -= 1.0
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+            self.requests += 1
+            self.last_wait = wait
+            self.total_wait += wait
+
+        if wait > 0:
+            clock.sleep(wait)
+        return wait
+
+    def on_success(self):
+        # type: () -> None
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        # type: () -> None
+        with self._lock:
+            self._refill(clock.time())
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.throttles += 1
+
+            # Stop any remaining burst; the next request waits for a fresh token at the new rate.
+            self._tokens = min(self._tokens, 0.0)
+
+    def get_rate(self):
+        # type: () -> float
+        return self.rate
+
+    def get_wait_time(self):
+        # type: () -> float
+        # How long a request made right now would have to wait for a token.
+        with self._lock:
+            self._refill(clock.time())
+            if self._tokens >= 1.0:
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def get_stats(self):
+        # type: () -> Dict[str, float]
+        return {
+            "rate": self.rate,
+            "tokens": self._tokens,
+            "capacity": self.capacity,
+            "requests": self.requests,
+            "throttles": self.throttles,
+            "last_wait": self.last_wait,
+            "total_wait": self.total_wait,
+            "average_wait": self.total_wait / self.requests if self.requests > 0 else 0.0
+        }
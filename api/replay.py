@@ -0,0 +1,180 @@
+import pickle
+import threading
+
+from six.moves import queue  # type: ignore
+
+from app import kernel
+from app.clock import Clock, clock
+from .exceptions import ReplayMismatchException, ReplayFinishedException
+
+PICKLE_PROTOCOL = 2
+
+
+@kernel.container.register('api_traffic_recorder', ['@config.core'])
+class TrafficRecorder(object):
+    """
+        Appends every request envelope the bot sends (method names and the arguments as they went out),
+        with the raw response or raised exception and the time it was sent, to a pickle stream. The file
+        can be fed back through ReplayApi to run the exact same session again without a network connection.
+    """
+
+    def __init__(self, config=None):
+        # type: (Optional[Dict]) -> None
+        self.filename = None
+        if config is not None:
+            self.filename = config.get('api', {}).get('record_traffic', None)
+
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def is_enabled(self):
+        # type: () -> bool
+        return self.filename is not None
+
+    def record(self, calls, response=None, error=None):
+        # type: (List[Tuple[str, Tuple, Dict]], Optional[Dict], Optional[Exception]) -> None
+        if self.filename is None:
+            return
+
+        self._start_writer()
+        self._queue.put({
+            "timestamp": clock.time(),
+            "calls": list(calls),
+            "response": response,
+            "error": error
+        })
+
+    # Block until every recorded envelope has been written to disk.
+    def flush(self):
+        # type: () -> None
+        if self._writer is not None:
+            self._queue.join()
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop)
+                self._writer.daemon = True
+                self._writer.start()
+
+    def _write_loop(self):
+        with open(self.filename, 'ab') as record_file:
+            while True:
+                record = self._queue.get()
+                try:
+                    pickle.dump(record, record_file, PICKLE_PROTOCOL)
+                    record_file.flush()
+                except (IOError, OSError, pickle.PicklingError) as error:
+                    print("[API] Failed to record API traffic: {}".format(error))
+                finally:
+                    self._queue.task_done()
+
+    @staticmethod
+    def read(filename):
+        # type: (str) -> Iterator[Dict]
+        with open(filename, 'rb') as record_file:
+            while True:
+                try:
+                    yield pickle.load(record_file)
+                except EOFError:
+                    return
+
+
+class _ReplayAuthProvider(object):
+    # pylint: disable=no-self-use
+    def get_ticket(self):
+        # A ticket that expires a day from now, in the same shape as the real one
+        return int((clock.time() + 86400) * 1000), b"", b""
+
+    # pylint: disable=unused-argument,no-self-use
+    def user_login(self, username, password):
+        return True
+
+
+class ReplayApi(object):
+    """
+        Stands in for PGoApi and answers every request with the next envelope from a file written by
+        TrafficRecorder. In strict mode, the requested methods have to match the recorded ones, which
+        makes it easy to check that a change does not alter what the bot decides to do. With a simulated
+        clock, time moves on to when each envelope was recorded, so hours of play replay in seconds.
+    """
+
+    def __init__(self, filename, strict=True):
+        # type: (str, bool) -> None
+        self.filename = filename
+        self.strict = strict
+        self.positions = [(0, 0, 0)]
+        self.replayed = 0
+
+        self._records = TrafficRecorder.read(filename)
+        self._next_record = None
+        self._auth_provider = _ReplayAuthProvider()
+
+    # When the first envelope was recorded, where a simulated clock should start from.
+    def get_start_time(self):
+        # type: () -> Optional[float]
+        if self._next_record is None:
+            self._next_record = next(self._records, None)
+        return None if self._next_record is None else self._next_record["timestamp"]
+
+    # pylint: disable=unused-argument,no-self-use
+    def activate_signature(self, shared_lib):
+        return None
+
+    # pylint: disable=unused-argument,no-self-use
+    def login(self, provider, username, password, lat=None, lng=None, alt=None, app_simulation=True):
+        return True
+
+    def set_position(self, lat, lng, alt):
+        self.positions.append((lat, lng, alt))
+
+    def get_position(self):
+        return self.positions[-1]
+
+    # pylint: disable=no-self-use
+    def list_curr_methods(self):
+        return list()
+
+    def create_request(self):
+        return ReplayRequest(self)
+
+    def next_record(self, calls):
+        # type: (List[Tuple]) -> Dict
+        record, self._next_record = self._next_record, None
+        if record is None:
+            record = next(self._records, None)
+        if record is None:
+            raise ReplayFinishedException()
+
+        if self.strict:
+            expected = [call[0] for call in record["calls"]]
+            actual = [call[0] for call in calls]
+            if expected != actual:
+                raise ReplayMismatchException(expected, actual)
+
+        if clock.mode == Clock.SIMULATED:
+            clock.sleep(record["timestamp"] - clock.time())
+
+        self.replayed += 1
+        return record
+
+
+class ReplayRequest(object):
+    def __init__(self, replay_api):
+        # type: (ReplayApi) -> None
+        self._replay_api = replay_api
+        self.calls = []
+
+    def call(self):
+        record = self._replay_api.next_record(self.calls)
+        if record["error"] is not None:
+            raise record["error"]
+        return record["response"]
+
+    def __getattr__(self, func):
+        def function(*args, **kwargs):
+            self.calls.append((str(func).upper(), args, kwargs))
+            return self
+
+        return function
@@ -0,0 +1,95 @@
+import threading
+
+from app.clock import clock
+
+
+class _Batch(object):
+    def __init__(self):
+        self.method_keys = []
+        self.methods = {}
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    # Two callers can share an envelope unless they ask for the same method with different arguments,
+    # since the responses are keyed by method name.
+    def conflicts_with(self, method_keys, methods):
+        for method in method_keys:
+            if method in self.methods and self.methods[method] != methods[method]:
+                return True
+        return False
+
+    def add(self, method_keys, methods):
+        for method in method_keys:
+            if method not in self.methods:
+                self.methods[method] = methods[method]
+                self.method_keys.append(method)
+
+    def get_result(self):
+        if self.error is not None:
+            raise self.error  # pylint: disable=raising-bad-type
+        return self.result
+
+
+class RequestCoalescer(object):
+    """
+        Merges the calls made by several callers into a single multi-method envelope. A caller with no
+        envelope in flight sends straight away. Otherwise it opens a batch and waits, up to window seconds,
+        for the envelope in flight to come back; everyone calling in the meantime joins the batch and gets
+        its result (or its error) once the batch has been sent.
+    """
+
+    def __init__(self, window=0.05):
+        # type: (float) -> None
+        self.window = window
+        self._lock = threading.Lock()
+        self._open_batch = None
+        self._sending_batch = None
+
+        self.envelopes = 0
+        self.coalesced_calls = 0
+
+    def submit(self, method_keys, methods, send):
+        # type: (List[str], Dict[str, Tuple], Callable) -> Any
+        with self._lock:
+            batch = self._open_batch
+            is_leader = batch is None or batch.conflicts_with(method_keys, methods)
+            if is_leader:
+                batch = _Batch()
+                self._open_batch = batch
+            else:
+                self.coalesced_calls += 1
+            batch.add(method_keys, methods)
+            sending_batch = self._sending_batch
+
+        if not is_leader:
+            batch.done.wait()
+            return batch.get_result()
+
+        # Only worth waiting for company if another envelope is on its way
+        if sending_batch is not None:
+            clock.wait(sending_batch.done, self.window)
+
+        with self._lock:
+            if self._open_batch is batch:
+                self._open_batch = None
+            self._sending_batch = batch
+            self.envelopes += 1
+
+        try:
+            batch.result = send(batch.method_keys, batch.methods)
+        except Exception as error:  # pylint: disable=broad-except
+            batch.error = error
+        finally:
+            with self._lock:
+                if self._sending_batch is batch:
+                    self._sending_batch = None
+            batch.done.set()
+        return batch.get_result()
+
+    def get_stats(self):
+        # type: () -> Dict[str, int]
+        return {
+            "envelopes": self.envelopes,
+            "coalesced_calls": self.coalesced_calls
+        }
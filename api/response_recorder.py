@@ -0,0 +1,126 @@
+from collections import deque
+import gzip
+import os
+import threading
+import time
+
+from six.moves import queue  # type: ignore
+
+from app import kernel
+
+
+@kernel.container.register('api_response_recorder', ['@config.core'])
+class ResponseRecorder(object):
+    """
+        Keeps the last few API responses in memory, along with when they were requested, how long they
+        took and how many attempts they needed. When enabled, a background thread also writes them to a
+        rotating, gzip compressed log file so that neither the disk nor the formatting of (possibly very
+        large) responses slows down the API call itself.
+    """
+
+    def __init__(self, config=None):
+        # type: (Optional[Dict]) -> None
+        settings = {}
+        if config is not None:
+            settings = config.get('api', {}).get('response_log', {}) or {}
+
+        self.enabled = bool(settings.get('enabled', False))
+        self.filename = settings.get('filename', 'api-responses.log.gz')
+        self.max_bytes = int(settings.get('max_bytes', 5 * 1024 * 1024))
+        self.backup_count = int(settings.get('backup_count', 3))
+
+        self._buffer = deque(maxlen=int(settings.get('size', 50)))
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def record(self, methods, response, started_at, duration, attempts):
+        # type: (List[str], Dict, float, float, int) -> None
+        entry = {
+            "timestamp": started_at,
+            "methods": list(methods),
+            "duration": duration,
+            "attempts": attempts,
+            "response": response
+        }
+        self._buffer.append(entry)
+
+        if self.enabled:
+            self._start_writer()
+            self._queue.put(entry)
+
+    def get_recent(self):
+        # type: () -> List[Dict]
+        return list(self._buffer)
+
+    def get_last(self):
+        # type: () -> Optional[Dict]
+        return self._buffer[-1] if len(self._buffer) > 0 else None
+
+    # Block until every recorded response has been written to disk.
+    def flush(self):
+        # type: () -> None
+        if self._writer is not None:
+            self._queue.join()
+
+    def _start_writer(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop)
+                self._writer.daemon = True
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            entries = [self._queue.get()]
+
+            # Write everything that piled up while we were busy as one batch
+            while True:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                # Every batch is a complete gzip member, the members of a file are read back as one stream
+                with open(self.filename, 'ab') as raw_file:
+                    with gzip.GzipFile(fileobj=raw_file, mode='ab') as log_file:
+                        for entry in entries:
+                            log_file.write(self._format(entry).encode('utf-8'))
+                    size = raw_file.tell()
+
+                if size >= self.max_bytes:
+                    self._rotate()
+            except (IOError, OSError) as error:
+                print("[API] Failed to write API response log: {}".format(error))
+            finally:
+                for _ in entries:
+                    self._queue.task_done()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = "{}.{}".format(self.filename, index)
+            if os.path.isfile(source):
+                destination = "{}.{}".format(self.filename, index + 1)
+                if os.path.isfile(destination):
+                    os.remove(destination)
+                os.rename(source, destination)
+
+        if self.backup_count > 0:
+            destination = self.filename + ".1"
+            if os.path.isfile(destination):
+                os.remove(destination)
+            os.rename(self.filename, destination)
+        else:
+            os.remove(self.filename)
+
+    @staticmethod
+    def _format(entry):
+        return u"[{}] {} ({:.3f}s, {} attempt{})\n{}\n".format(
+            time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry["timestamp"])),
+            ", ".join(entry["methods"]),
+            entry["duration"],
+            entry["attempts"],
+            "" if entry["attempts"] == 1 else "s",
+            str(entry["response"])
+        )
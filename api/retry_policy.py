@@ -0,0 +1,126 @@
+import random
+import threading
+
+from app import kernel
+from app.clock import clock
+
+
+class RetryPolicy(object):
+    """
+        Exponential backoff with decorrelated jitter: every delay is picked at random between the base
+        delay and three times the previous delay, capped at max_delay.
+    """
+
+    def __init__(self, base_delay=1.0, max_delay=60.0, max_attempts=10):
+        # type: (float, float, int) -> None
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.max_attempts = int(max_attempts)
+
+    def should_retry(self, attempt):
+        # type: (int) -> bool
+        return attempt < self.max_attempts
+
+    def next_delay(self, previous_delay=None):
+        # type: (Optional[float]) -> float
+        if previous_delay is None or previous_delay < self.base_delay:
+            previous_delay = self.base_delay
+        return min(self.max_delay, random.uniform(self.base_delay, previous_delay * 3))
+
+
+@kernel.container.register('api_retry_policies', ['@config.core'])
+class RetryPolicies(object):
+    THROTTLED = "throttled"
+    HTTP_ERROR = "http_error"
+    OFFLINE = "offline"
+    EMPTY_RESPONSE = "empty_response"
+    BAD_STATUS = "bad_status"
+
+    DEFAULTS = {
+        THROTTLED: {"base_delay": 1.0, "max_delay": 30.0, "max_attempts": 10},
+        HTTP_ERROR: {"base_delay": 2.0, "max_delay": 60.0, "max_attempts": 10},
+        OFFLINE: {"base_delay": 5.0, "max_delay": 120.0, "max_attempts": 10},
+        EMPTY_RESPONSE: {"base_delay": 2.0, "max_delay": 60.0, "max_attempts": 10},
+        BAD_STATUS: {"base_delay": 1.0, "max_delay": 30.0, "max_attempts": 5}
+    }
+
+    def __init__(self, config=None):
+        # type: (Optional[Dict]) -> None
+        settings = {}
+        if config is not None:
+            settings = config.get('api', {}).get('retry', {}) or {}
+
+        self._policies = {}
+        for failure, defaults in self.DEFAULTS.items():
+            policy_settings = dict(defaults)
+            policy_settings.update(settings.get(failure, {}) or {})
+            self._policies[failure] = RetryPolicy(**policy_settings)
+
+    def get(self, failure):
+        # type: (str) -> RetryPolicy
+        return self._policies[failure]
+
+    def set(self, failure, policy):
+        # type: (str, RetryPolicy) -> None
+        self._policies[failure] = policy
+
+
+@kernel.container.register('api_circuit_breaker', ['@config.core'])
+class CircuitBreaker(object):
+    """
+        Opens after too many consecutive failed requests so that callers fail fast instead of sitting
+        through another round of retries. Once reset_timeout has passed a single trial request is let
+        through; if it succeeds the breaker closes again, otherwise it stays open for another timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, config=None):
+        # type: (Optional[Dict]) -> None
+        settings = {}
+        if config is not None:
+            settings = config.get('api', {}).get('circuit_breaker', {}) or {}
+
+        self.failure_threshold = int(settings.get('failure_threshold', 10))
+        self.reset_timeout = float(settings.get('reset_timeout', 60))
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        # type: () -> bool
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and clock.time() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def is_open(self):
+        # type: () -> bool
+        return self.state == self.OPEN
+
+    def get_remaining_time(self):
+        # type: () -> float
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (clock.time() - self.opened_at))
+
+    def record_success(self):
+        # type: () -> None
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        # type: () -> None
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = clock.time()
@@ -0,0 +1,133 @@
+import math
+
+from api.geo import METERS_PER_DEGREE, get_distance
+
+
+class SpatialIndex(object):
+    """
+        Buckets points on a grid of bucket_size by bucket_size meters (measured along a meridian), so that
+        radius and nearest neighbour queries only look at the buckets around the position instead of every
+        point. Points are stored under a key, adding a key again moves the point.
+    """
+
+    def __init__(self, bucket_size=100):
+        # type: (float) -> None
+        self.bucket_size = bucket_size
+        self._step = float(bucket_size) / METERS_PER_DEGREE
+        self._buckets = {}
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _get_bucket(self, lat, lng):
+        # type: (float, float) -> Tuple[int, int]
+        return int(math.floor(lat / self._step)), int(math.floor(lng / self._step))
+
+    def add(self, key, lat, lng, value):
+        # type: (Any, float, float, Any) -> None
+        self.remove(key)
+        bucket = self._get_bucket(lat, lng)
+        self._entries[key] = (bucket, lat, lng, value)
+        self._buckets.setdefault(bucket, {})[key] = (lat, lng, value)
+
+    def remove(self, key):
+        # type: (Any) -> bool
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        bucket = self._buckets[entry[0]]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self._buckets[entry[0]]
+        return True
+
+    def clear(self):
+        # type: () -> None
+        self._buckets = {}
+        self._entries = {}
+
+    # The buckets that are ring buckets away from the one the position is in, in both directions.
+    def _get_ring(self, center, ring):
+        # type: (Tuple[int, int], int) -> List[Tuple[int, int]]
+        lat_bucket, lng_bucket = center
+        if ring == 0:
+            return [center]
+        ring_buckets = []
+        for offset in range(-ring, ring + 1):
+            ring_buckets.append((lat_bucket - ring, lng_bucket + offset))
+            ring_buckets.append((lat_bucket + ring, lng_bucket + offset))
+        for offset in range(-ring + 1, ring):
+            ring_buckets.append((lat_bucket + offset, lng_bucket - ring))
+            ring_buckets.append((lat_bucket + offset, lng_bucket + ring))
+        return ring_buckets
+
+    # Points within radius meters, nearest first, as (distance, value) tuples.
+    def within(self, lat, lng, radius, predicate=None):
+        # type: (float, float, float, Optional[Callable[[Any], bool]]) -> List[Tuple[float, Any]]
+        lat_span = float(radius) / METERS_PER_DEGREE
+        lng_span = lat_span / max(math.cos(math.radians(lat)), 1e-6)
+        min_lat_bucket, min_lng_bucket = self._get_bucket(lat - lat_span, lng - lng_span)
+        max_lat_bucket, max_lng_bucket = self._get_bucket(lat + lat_span, lng + lng_span)
+
+        results = []
+        if (max_lat_bucket - min_lat_bucket + 1) * (max_lng_bucket - min_lng_bucket + 1) > len(self._buckets):
+            buckets = [bucket for (lat_bucket, lng_bucket), bucket in self._buckets.items()
+                       if min_lat_bucket <= lat_bucket <= max_lat_bucket and min_lng_bucket <= lng_bucket <= max_lng_bucket]
+        else:
+            buckets = [self._buckets[(lat_bucket, lng_bucket)]
+                       for lat_bucket in range(min_lat_bucket, max_lat_bucket + 1)
+                       for lng_bucket in range(min_lng_bucket, max_lng_bucket + 1)
+                       if (lat_bucket, lng_bucket) in self._buckets]
+
+        for bucket in buckets:
+            for point_lat, point_lng, value in bucket.values():
+                if predicate is not None and not predicate(value):
+                    continue
+                dist = get_distance(lat, lng, point_lat, point_lng)
+                if dist <= radius:
+                    results.append((dist, value))
+
+        results.sort(key=lambda result: result[0])
+        return results
+
+    # The count points nearest to the position, nearest first, as (distance, value) tuples. Rings of buckets
+    # are searched outwards until no bucket further out can hold a nearer point.
+    def nearest(self, lat, lng, count=1, predicate=None):
+        # type: (float, float, int, Optional[Callable[[Any], bool]]) -> List[Tuple[float, Any]]
+        center = self._get_bucket(lat, lng)
+        # The narrowest a bucket gets at this latitude
+        min_bucket_width = self.bucket_size * max(math.cos(math.radians(lat)), 1e-6)
+
+        results = []
+        visited = 0
+        ring = 0
+        while visited < len(self._entries):
+            # Once a ring has more buckets than there are, looking at every point is cheaper
+            if 8 * ring > len(self._buckets):
+                results = [(get_distance(lat, lng, point_lat, point_lng), value)
+                           for _, point_lat, point_lng, value in self._entries.values()
+                           if predicate is None or predicate(value)]
+                break
+
+            for ring_bucket in self._get_ring(center, ring):
+                bucket = self._buckets.get(ring_bucket, None)
+                if bucket is None:
+                    continue
+                visited += len(bucket)
+                for point_lat, point_lng, value in bucket.values():
+                    if predicate is None or predicate(value):
+                        results.append((get_distance(lat, lng, point_lat, point_lng), value))
+
+            # Anything outside this ring is at least ring bucket widths away
+            if len(results) >= count:
+                results.sort(key=lambda result: result[0])
+                if results[count - 1][0] <= ring * min_bucket_width:
+                    break
+            ring += 1
+
+        results.sort(key=lambda result: result[0])
+        return results[:count]
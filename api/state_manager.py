@@ -1,6 +1,7 @@
 # pylint: disable=unused-argument
 from __future__ import print_function
 
+from app.clock import clock
 from api.evolution_result import EvolutionResult
 from .player import Player
 from .inventory_parser import InventoryParser
@@ -10,7 +11,15 @@ from .item import Incubator
 
 
 class StateManager(object):
-    def __init__(self):
+    # How many seconds a state object may be served from the cache, even after a method mutated it.
+    # State objects without a time to live are kept until a method that mutates them is called.
+    DEFAULT_STATE_TTL = {
+        "worldmap": 10,
+        "player": 60,
+        "DOWNLOAD_ITEM_TEMPLATES": 86400
+    }
+
+    def __init__(self, state_ttl=None):
 
         # Transforms response data from the server to objects.
         # Use self._noop if there is no response data.
@@ -38,7 +47,7 @@ class StateManager(object):
         # Used for caching.
         self.method_returns_states = {
             "GET_PLAYER": ["player"],
-            "GET_INVENTORY": ["player", "inventory", "pokemon", "pokedex", "candy", "eggs"],
+            "GET_INVENTORY": ["player", "inventory", "pokemon", "pokemon_bag", "pokedex", "candy", "eggs"],
             "USE_ITEM_EGG_INCUBATOR": ["egg_incubators"],
             "GET_HATCHED_EGGS": [],
             "CHECK_AWARDED_BADGES": [],
@@ -69,18 +78,18 @@ class StateManager(object):
             "GET_HATCHED_EGGS": [],
             "CHECK_AWARDED_BADGES": [],
             "DOWNLOAD_SETTINGS": [],
-            "GET_MAP_OBJECTS": ["worldmap"],
+            "GET_MAP_OBJECTS": [],
             "ENCOUNTER": ["encounter", "player", "pokedex"],
             "DISK_ENCOUNTER": ["encounter"],
-            "RELEASE_POKEMON": ["pokemon", "candy"],
-            "CATCH_POKEMON": ["encounter", "player", "pokemon", "pokedex", "candy", "inventory"],
+            "RELEASE_POKEMON": ["pokemon", "pokemon_bag", "candy"],
+            "CATCH_POKEMON": ["encounter", "player", "pokemon", "pokemon_bag", "pokedex", "candy", "inventory"],
             "PLAYER_UPDATE": ["player", "inventory"],
             "FORT_DETAILS": ["fort"],
             "FORT_SEARCH": ["player", "inventory", "eggs"],
             "RECYCLE_INVENTORY_ITEM": ["inventory"],
-            "EVOLVE_POKEMON": ["player", "inventory", "pokemon", "pokedex", "candy"],
+            "EVOLVE_POKEMON": ["player", "inventory", "pokemon", "pokemon_bag", "pokedex", "candy"],
             "DOWNLOAD_ITEM_TEMPLATES": [],
-            "SET_FAVORITE_POKEMON": ["pokemon"],
+            "SET_FAVORITE_POKEMON": ["pokemon", "pokemon_bag"],
             "LEVEL_UP_REWARDS": ["inventory"]
         }
 
@@ -88,17 +97,39 @@ class StateManager(object):
 
         self.staleness = {}
 
+        # State objects with a time to live expire after that many seconds instead of when they are
+        # mutated; being a little out of date is fine for them and saves a round trip.
+        self.state_ttl = dict(self.DEFAULT_STATE_TTL)
+        self.state_ttl.update(state_ttl or {})
+        self.updated_at = {}
+
+        # Kept between calls so that only the changes have to be requested and applied
+        self.inventory = InventoryParser()
+        self.worldmap = WorldMap()
+
     def _noop(self, *args, **kwargs):
         pass
 
-    def is_stale(self, key):
-        return self.staleness.get(key, True)
+    # A state object is stale if it was never fetched, if it was mutated and has no time to live,
+    # or if it is older than its time to live. max_age overrides the time to live.
+    def is_stale(self, key, max_age=None):
+        if key not in self.updated_at:
+            return True
+        if self.staleness.get(key, True) and self.is_invalidated_by_mutation(key):
+            return True
+
+        ttl = max_age if max_age is not None else self.state_ttl.get(key, None)
+        return ttl is not None and clock.time() - self.updated_at[key] >= ttl
+
+    # Whether mutating a state object invalidates it, or whether it expires by its time to live.
+    def is_invalidated_by_mutation(self, key):
+        return self.state_ttl.get(key, None) is None
 
     # Check whether a method is cached or if it needs to be updated.
-    def is_method_cached(self, method):
+    def is_method_cached(self, method, max_age=None):
         affected_states = self.method_returns_states[method]
         for state in affected_states:
-            if self.is_stale(state):
+            if self.is_stale(state, max_age):
                 return False
         return True
 
@@ -106,7 +137,9 @@ class StateManager(object):
     # uncached) and state-invalidating methods will be called. Note that the order is
     # important - calling GET_INVENTORY before FORT_SEARCH, for example, will return the cached
     # and now invalidated inventory object. To fix, call FORT_SEARCH and then GET_INVENTORY.
-    def filter_cached_methods(self, method_keys):
+    # Pass max_age to accept cached state objects up to that many seconds old instead of their time
+    # to live.
+    def filter_cached_methods(self, method_keys, max_age=None):
         will_be_stale = {}
         uncached_methods = []
         for method in method_keys:
@@ -114,11 +147,12 @@ class StateManager(object):
             if len(affected_states) > 0:
                 uncached_methods.append(method)
                 for state in affected_states:
-                    will_be_stale[state] = True
+                    if self.is_invalidated_by_mutation(state):
+                        will_be_stale[state] = True
             else:
                 returned_states = self.method_returns_states[method]
                 for state in returned_states:
-                    if self.is_stale(state) or will_be_stale.get(state, False):
+                    if self.is_stale(state, max_age) or will_be_stale.get(state, False):
                         uncached_methods.append(method)
                         break
         return uncached_methods
@@ -131,6 +165,7 @@ class StateManager(object):
                 continue
             self.current_state[key] = data[key]
             self.staleness[key] = False
+            self.updated_at[key] = clock.time()
 
     def get_state(self):
         return self.current_state
@@ -153,6 +188,15 @@ class StateManager(object):
         for method in methods:
             for state in self.method_returns_states[method]:
                 self.staleness[state] = True
+                self.updated_at.pop(state, None)
+
+    # Add the arguments that let the server send less data, unless the caller passed them already.
+    def get_request_kwargs(self, method, kwargs):
+        if method == "GET_INVENTORY" and "last_timestamp_ms" not in kwargs and self.inventory.last_updated > 0:
+            kwargs = dict(kwargs, last_timestamp_ms=self.inventory.last_updated)
+        if method == "GET_MAP_OBJECTS" and "since_timestamp_ms" not in kwargs and "cell_id" in kwargs:
+            kwargs = dict(kwargs, since_timestamp_ms=self.worldmap.get_timestamps(kwargs["cell_id"]))
+        return kwargs
 
     # Transform the returned data from the server into data objects and
     # then update the current state.
@@ -170,15 +214,16 @@ class StateManager(object):
         self._update_state({"player": current_player})
 
     def _parse_inventory(self, key, response):
-        new_inventory = InventoryParser(response)
+        self.inventory.update(response)
 
         new_state = {
-            "inventory": new_inventory.items,
-            "pokedex": new_inventory.pokedex_entries,
-            "candy": new_inventory.candy,
-            "pokemon": new_inventory.pokemon,
-            "eggs": new_inventory.eggs,
-            "egg_incubators": new_inventory.egg_incubators
+            "inventory": self.inventory.items,
+            "pokedex": self.inventory.pokedex_entries,
+            "candy": self.inventory.candy,
+            "pokemon": self.inventory.pokemon,
+            "pokemon_bag": self.inventory.pokemon_bag,
+            "eggs": self.inventory.eggs,
+            "egg_incubators": self.inventory.egg_incubators
         }
 
         current_player = self.current_state.get("player", None)
@@ -190,17 +235,8 @@ class StateManager(object):
         self._update_state(new_state)
 
     def _parse_map(self, key, response):
-        # TODO: Figure out how I want to do WorldMap. Lazy loading might be a better idea
-        """
-        current_map = self.current_state.get("worldmap", None)
-        if current_map is None:
-            current_map = WorldMap()
-        current_map.update_map_objects(response)
-        """
-        current_map = WorldMap()
-        current_map.update_map_objects(response)
-
-        self._update_state({"worldmap": current_map})
+        self.worldmap.update_map_objects(response)
+        self._update_state({"worldmap": self.worldmap})
 
     def _parse_encounter(self, key, response):
         current_encounter = Encounter()
@@ -236,7 +272,7 @@ class StateManager(object):
             self._update_state({"player": current_player})
 
             if len(response.get("pokemon_id", [])) > 0:
-                self.mark_returned_stale("GET_INVENTORY")
+                self.mark_returned_stale(["GET_INVENTORY"])
 
     def _parse_use_incubator(self, key, response):
         if response.get("result", 0) == 1:
@@ -0,0 +1,175 @@
+import threading
+import time
+import unittest
+
+import pytest
+from mock import Mock
+
+from api import PoGoApi
+from api.auth_refresher import AuthRefresher
+from app.clock import Clock, clock
+from pokemongo_bot.tests import PGoApiMock
+
+
+class TicketApi(object):
+    """
+        Hands out tickets valid for ticket_lifetime seconds, failing the logins given in failures.
+    """
+
+    def __init__(self, ticket_lifetime, failures=None):
+        self.ticket_lifetime = ticket_lifetime
+        self.failures = list(failures or [])
+        self.expires_at = clock.time() + ticket_lifetime
+        self.logins = []
+
+    def get_expiration_time(self):
+        return int(self.expires_at - clock.time())
+
+    def relogin(self):
+        self.logins.append(clock.time())
+        if len(self.failures) > 0:
+            failure = self.failures.pop(0)
+            if isinstance(failure, Exception):
+                raise failure
+            return failure
+        self.expires_at = clock.time() + self.ticket_lifetime
+        return True
+
+
+class SlowAuthProvider(object):
+    """
+        Takes until release is set to hand out a new ticket, like a login server that is slow to answer.
+    """
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def __init__(self):
+        self.logged_in = False
+
+    # pylint: disable=no-self-use
+    def get_ticket(self):
+        return int((clock.time() + 1800) * 1000), b"", b""
+
+    # pylint: disable=unused-argument
+    def user_login(self, username, password):
+        self.started.set()
+        self.release.wait(5)
+        self.logged_in = True
+        return True
+
+
+def _wait_for(condition):
+    # The refresher thread polls the simulated clock, give it some real time to catch up
+    for _ in range(200):
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _retry_until(condition, retry_delay):
+    # Move the clock on a retry at a time until the refresher gets there
+    return _wait_for(lambda: condition() or clock.sleep(retry_delay))
+
+
+class AuthRefresherTest(unittest.TestCase):
+    def setUp(self):
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+        self.auth_refresher = None
+
+    def tearDown(self):
+        if self.auth_refresher is not None:
+            self.auth_refresher.stop()
+        clock.set_mode(Clock.REAL)
+
+    def _start(self, api_wrapper):
+        self.auth_refresher = AuthRefresher(api_wrapper, refresh_margin=300, retry_delay=15, max_attempts=1)
+        self.auth_refresher.update_deadline()
+        self.auth_refresher.start()
+        return self.auth_refresher
+
+    def test_refresh_schedule(self):
+        api_wrapper = TicketApi(1800)
+        auth_refresher = self._start(api_wrapper)
+
+        # Nothing happens until the ticket is inside the refresh margin
+        clock.sleep(1499)
+        assert _wait_for(lambda: auth_refresher.get_time_left() == 301)
+        time.sleep(0.05)
+        assert api_wrapper.logins == []
+
+        clock.sleep(1)
+        assert _wait_for(lambda: len(api_wrapper.logins) == 1)
+        assert api_wrapper.logins == [2500.0]
+        assert _wait_for(lambda: auth_refresher.get_time_left() == 1800)
+
+        # And then again with the new ticket
+        clock.sleep(1500)
+        assert _wait_for(lambda: len(api_wrapper.logins) == 2)
+        assert api_wrapper.logins == [2500.0, 4000.0]
+
+    def test_refresh_failures(self):
+        api_wrapper = TicketApi(1800, [False, RuntimeError("login server down")])
+        auth_refresher = self._start(api_wrapper)
+
+        clock.sleep(1500)
+        assert _retry_until(lambda: len(api_wrapper.logins) == 2, 15)
+
+        # An exception doesn't take the thread down, it retries after retry_delay
+        assert _retry_until(lambda: len(api_wrapper.logins) == 3, 15)
+        assert _wait_for(lambda: auth_refresher.get_time_left() > 300)
+        assert auth_refresher._thread.is_alive()  # pylint: disable=protected-access
+
+    def test_call_fallback(self):
+        pgo = PGoApiMock()
+        pgo.set_position(0, 0, 0)
+        pgo.set_response("get_player", {"player_data": {}})
+        api_wrapper = PoGoApi(pgo)
+
+        # The background refresh didn't get to it, the call logs back in itself
+        api_wrapper.get_expiration_time = Mock(side_effect=[30, 1800])
+        api_wrapper.get_player()
+        assert api_wrapper.call(ignore_cache=True) is not None
+        assert api_wrapper.auth_refresher.get_time_left() == 1800
+
+        # And gives up if that fails too
+        pgo.should_login = [False]
+        api_wrapper.auth_refresher.max_attempts = 1
+        api_wrapper.get_expiration_time = Mock(return_value=30)
+        api_wrapper.auth_refresher.update_deadline()
+        api_wrapper.get_player()
+        with pytest.raises(SystemExit):
+            api_wrapper.call(ignore_cache=True)
+
+    @staticmethod
+    def test_call_during_refresh():
+        clock.set_mode(Clock.REAL)
+        SlowAuthProvider.started.clear()
+        SlowAuthProvider.release.clear()
+
+        pgo = PGoApiMock()
+        pgo.set_position(0, 0, 0)
+        pgo.set_response("get_player", {"player_data": {}})
+        pgo._auth_provider = SlowAuthProvider()  # pylint: disable=protected-access
+        api_wrapper = PoGoApi(pgo)
+
+        refresh = threading.Thread(target=api_wrapper.relogin)
+        refresh.start()
+        try:
+            assert SlowAuthProvider.started.wait(5)
+
+            # The login server hasn't answered yet, requests still go out with the current ticket
+            response = {}
+            call = threading.Thread(target=lambda: response.update(api_wrapper.get_player().call(ignore_cache=True)))
+            call.start()
+            call.join(1)
+            assert call.is_alive() is False
+            assert "player" in response
+            assert pgo._auth_provider.logged_in is False  # pylint: disable=protected-access
+        finally:
+            SlowAuthProvider.release.set()
+            refresh.join()
+
+        # And the new ticket takes over once it is there
+        assert pgo._auth_provider.logged_in is True  # pylint: disable=protected-access
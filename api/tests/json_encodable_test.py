@@ -0,0 +1,85 @@
+import json
+import pickle
+import unittest
+
+from api.player import Player
+from api.pokemon import Pokemon
+from api.worldmap import Cell, Gym, PokeStop
+
+PICKLE_PROTOCOL = 2
+
+
+class JSONEncodableTest(unittest.TestCase):
+    def setUp(self):
+        self.pokemon = Pokemon({
+            "id": 8580527883465302527,
+            "pokemon_id": 16,
+            "cp": 10,
+            "cp_multiplier": 0.094,
+            "individual_attack": 15,
+            "favorite": 1,
+            "nickname": u"Pidgey"
+        })
+        self.pokestop = PokeStop({
+            "id": "stop_1",
+            "latitude": 51.5055,
+            "longitude": -0.0754,
+            "last_modified_timestamp_ms": 1470000000000,
+            "enabled": False
+        })
+        self.gym = Gym({"id": "gym_1", "type": 2, "latitude": 51.5, "longitude": -0.07, "is_in_battle": True})
+
+    @staticmethod
+    def _restore(cls, state):
+        obj = cls.__new__(cls)
+        obj.__setstate__(state)
+        return obj
+
+    def test_pickle(self):
+        cell = Cell({"s2_cell_id": 5221364418239004672, "current_timestamp_ms": 1470000000000})
+        cell.pokestops = [self.pokestop]
+        cell.gyms = [self.gym]
+
+        for obj in [self.pokemon, self.pokestop, self.gym]:
+            restored = pickle.loads(pickle.dumps(obj, PICKLE_PROTOCOL))
+            assert restored.to_dict() == obj.to_dict()
+
+        restored_cell = pickle.loads(pickle.dumps(cell, PICKLE_PROTOCOL))
+        assert restored_cell.cell_id == 5221364418239004672
+        assert restored_cell.pokestops[0].to_dict() == self.pokestop.to_dict()
+        assert restored_cell.gyms[0].to_dict() == self.gym.to_dict()
+
+        # Booleans stay booleans rather than coming back as strings or numbers
+        assert restored_cell.pokestops[0].enabled is False
+        assert restored_cell.gyms[0].is_in_battle is True
+
+    def test_pickle_without_slots(self):
+        player = Player()
+        player.username = u"Ash"
+        player.pokecoin = 100
+
+        restored = pickle.loads(pickle.dumps(player, PICKLE_PROTOCOL))
+        assert restored.to_dict() == player.to_dict()
+        assert restored.pokecoin == 100
+
+    def test_json_state(self):
+        # The state survives JSON, with integers as strings and booleans as they are
+        state = json.loads(json.dumps(self.pokemon.__getstate__()))
+        assert state["unique_id"] == "8580527883465302527"
+        assert state["favorite"] is True
+        assert state["combat_power_multiplier"] == 0.094
+
+        restored = self._restore(Pokemon, state)
+        assert restored.to_dict() == self.pokemon.to_dict()
+        assert restored.unique_id == 8580527883465302527
+        assert restored.favorite is True
+
+        # Fort names are bytes, so forts only go through the state as it is
+        restored = self._restore(PokeStop, self.pokestop.__getstate__())
+        assert restored.to_dict() == self.pokestop.to_dict()
+        assert restored.enabled is False
+
+    def test_to_json(self):
+        for obj in [self.pokemon, self.pokestop, self.gym]:
+            assert json.loads(obj.to_json()) == obj.to_json_encodable()
+        assert json.loads(self.gym.to_json())["is_in_battle"] is True
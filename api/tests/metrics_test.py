@@ -0,0 +1,90 @@
+import unittest
+
+from mock import Mock
+
+from api.metrics import ApiMetrics, percentile
+from app.clock import Clock, clock
+
+
+class MetricsTest(unittest.TestCase):
+    def tearDown(self):
+        clock.set_mode(Clock.REAL)
+
+    @staticmethod
+    def test_percentile():
+        assert percentile([], 0.5) == 0.0
+        assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.5) == 3.0
+        assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 0.99) == 5.0
+
+    @staticmethod
+    def test_counters():
+        metrics = ApiMetrics()
+
+        metrics.record_request(["GET_PLAYER", "GET_INVENTORY"], 0.2)
+        metrics.record_retry("throttled", 1.5)
+        metrics.record_throttle()
+        metrics.record_request(["GET_PLAYER", "GET_INVENTORY"], 0.4)
+        metrics.record_rate_limit_wait(0.5)
+        metrics.record_parse_time(0.01)
+        metrics.record_envelope(["GET_PLAYER", "GET_INVENTORY"], 2.1, True)
+        metrics.record_request(["GET_MAP_OBJECTS"], 1.0)
+        metrics.record_envelope(["GET_MAP_OBJECTS"], 1.0, False)
+
+        stats = metrics.get_stats()
+        assert stats["envelopes"] == 2
+        assert stats["failed_envelopes"] == 1
+        assert stats["requests"] == 3
+        assert stats["retries"] == {"throttled": 1}
+        assert stats["throttles"] == 1
+        assert stats["rate_limit_wait"] == 0.5
+        assert stats["retry_wait"] == 1.5
+        assert stats["request_latency"]["max"] == 1.0
+        assert stats["request_latency"]["p50"] == 0.4
+        assert stats["parse_time"]["count"] == 1
+
+        assert metrics.get_methods() == ["GET_INVENTORY", "GET_MAP_OBJECTS", "GET_PLAYER"]
+        player_stats = metrics.get_method_stats("GET_PLAYER")
+        assert player_stats["envelopes"] == 1
+        assert player_stats["failures"] == 0
+        assert player_stats["count"] == 2
+        assert abs(player_stats["mean"] - 0.3) < 1e-9
+        assert metrics.get_method_stats("GET_MAP_OBJECTS")["failures"] == 1
+        assert metrics.get_method_stats("GET_HATCHED_EGGS") is None
+
+    @staticmethod
+    def test_summary_interval():
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+        logger = Mock()
+        metrics = ApiMetrics({"api": {"metrics": {"summary_interval": 60}}}, logger)
+        metrics.record_request(["GET_PLAYER"], 0.2)
+        metrics.record_envelope(["GET_PLAYER"], 0.2, True)
+
+        clock.sleep(59)
+        metrics.log_summary_if_due()
+        assert logger.log.call_count == 0
+
+        # The summary, one line per method after the totals
+        clock.sleep(1)
+        metrics.log_summary_if_due()
+        assert logger.log.call_count == 3
+        assert logger.log.call_args_list[0][0][0] == "1 calls (0 failed) in 1 requests, 0 retries, 0 throttled"
+        assert logger.log.call_args_list[2][0][0].startswith("GET_PLAYER: 1 calls")
+        assert all(call[1] == {"prefix": "API"} for call in logger.log.call_args_list)
+
+        # And not again until the next interval
+        clock.sleep(30)
+        metrics.log_summary_if_due()
+        assert logger.log.call_count == 3
+        clock.sleep(30)
+        metrics.log_summary_if_due()
+        assert logger.log.call_count == 6
+
+    @staticmethod
+    def test_summary_disabled():
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+        logger = Mock()
+        metrics = ApiMetrics({"api": {"metrics": {"summary_interval": 0}}}, logger)
+
+        clock.sleep(3600)
+        metrics.log_summary_if_due()
+        assert logger.log.call_count == 0
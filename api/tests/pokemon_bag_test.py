@@ -0,0 +1,89 @@
+import unittest
+
+from api.pokemon import Pokemon
+from api.pokemon_bag import PokemonBag
+
+
+class PokemonBagTest(unittest.TestCase):
+    def setUp(self):
+        self.pokemon = [self._create_pokemon(1, 16, 50, 0.2),
+                        self._create_pokemon(2, 19, 500, 0.2),
+                        self._create_pokemon(3, 16, 150, 0.9),
+                        self._create_pokemon(4, 16, 50, 0.9),
+                        self._create_pokemon(5, 19, 10, 0.4)]
+        self.pokemon_bag = PokemonBag(self.pokemon)
+
+    @staticmethod
+    def _create_pokemon(unique_id, species_id, cp, iv):
+        return Pokemon({
+            "id": unique_id,
+            "pokemon_id": species_id,
+            "cp": cp,
+            "individual_attack": int(15 * iv),
+            "individual_defense": int(15 * iv),
+            "individual_stamina": int(15 * iv)
+        })
+
+    def _get_ids(self, rows):
+        return [pokemon.unique_id for pokemon in self.pokemon_bag.get_pokemon(rows)]
+
+    def test_group_by_species(self):
+        assert len(self.pokemon_bag) == 5
+        assert self.pokemon_bag.group_by_species() == {16: [0, 2, 3], 19: [1, 4]}
+        assert list(self.pokemon_bag.group_by_species()) == [16, 19]
+        assert self.pokemon_bag.group_by_species() is self.pokemon_bag.group_by_species()
+
+        # Only some of the rows, without touching the groups of the whole bag
+        assert self.pokemon_bag.group_by_species([4, 3]) == {19: [4], 16: [3]}
+        assert list(self.pokemon_bag.group_by_species([4, 3])) == [19, 16]
+
+        assert self._get_ids(self.pokemon_bag.get_species_rows(16)) == [1, 3, 4]
+        assert self.pokemon_bag.get_species_rows(1) == []
+
+    def test_select_below(self):
+        rows = self.pokemon_bag.get_species_rows(16)
+        assert self._get_ids(self.pokemon_bag.select_below(rows, 100, 0.5)) == [1]
+        assert self._get_ids(self.pokemon_bag.select_below(rows, 100, 0.5, 'or')) == [1, 4]
+        assert self.pokemon_bag.select_below(rows, 100, 0.5, 'xor') == []
+
+        # Thresholds are inclusive
+        assert self._get_ids(self.pokemon_bag.select_below(rows, 150, 0.93, 'and')) == [1, 3, 4]
+
+    def test_sort(self):
+        rows = range(len(self.pokemon))
+        assert self._get_ids(self.pokemon_bag.sort_by_cp(rows)) == [5, 1, 4, 3, 2]
+        assert self._get_ids(self.pokemon_bag.sort_by_cp(rows, reverse=True)) == [2, 3, 1, 4, 5]
+        assert self._get_ids(self.pokemon_bag.sort_by_score(rows)) == [5, 1, 4, 2, 3]
+
+    @staticmethod
+    def test_flags_and_creation_time():
+        pokemon_bag = PokemonBag([
+            Pokemon({"id": 1, "pokemon_id": 16, "favorite": 1, "creation_time_ms": 1470000000300}),
+            Pokemon({"id": 2, "pokemon_id": 16, "deployed_fort_id": "fort_1", "creation_time_ms": 1470000000100}),
+            Pokemon({"id": 3, "pokemon_id": 19, "favorite": 1, "deployed_fort_id": "fort_2",
+                     "creation_time_ms": 1470000000200}),
+            Pokemon({"id": 4, "pokemon_id": 19, "creation_time_ms": 1470000000100})
+        ])
+        rows = [0, 1, 2, 3]
+
+        assert pokemon_bag.select_not_deployed(rows) == [0, 3]
+        assert pokemon_bag.select_not_favorite(rows) == [1, 3]
+        assert pokemon_bag.select_not_favorite(pokemon_bag.select_not_deployed(rows)) == [3]
+
+        assert pokemon_bag.sort_by_creation_time(rows) == [1, 3, 2, 0]
+        assert pokemon_bag.sort_by_creation_time(rows, reverse=True) == [0, 2, 1, 3]
+
+    def test_rows(self):
+        assert self.pokemon_bag.find(3) is self.pokemon[2]
+        assert self.pokemon_bag.find(6) is None
+
+        assert self.pokemon_bag.get_rows([self.pokemon[4], self.pokemon[0]]) == [4, 0]
+        assert self.pokemon_bag.get_rows(self.pokemon) == [0, 1, 2, 3, 4]
+        assert self.pokemon_bag.get_rows([self.pokemon[0], self._create_pokemon(6, 16, 10, 0.1)]) is None
+
+    @staticmethod
+    def test_empty():
+        pokemon_bag = PokemonBag([])
+        assert len(pokemon_bag) == 0
+        assert pokemon_bag.group_by_species() == {}
+        assert pokemon_bag.select_below([], 100, 0.5) == []
@@ -0,0 +1,92 @@
+import threading
+import unittest
+
+from mock import patch
+
+from api.rate_limiter import TokenBucketRateLimiter
+from app.clock import Clock, clock
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        # The simulated clock moves forward by exactly the time the limiter sleeps for
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+
+    def tearDown(self):
+        clock.set_mode(Clock.REAL)
+
+    @staticmethod
+    def _create_rate_limiter(settings=None):
+        rate_limit = {"burst": 3, "requests_per_second": 2.0, "max_requests_per_second": 4.0}
+        rate_limit.update(settings or {})
+        return TokenBucketRateLimiter({"api": {"rate_limit": rate_limit}})
+
+    def test_burst(self):
+        rate_limiter = self._create_rate_limiter()
+
+        # A full bucket lets the burst through without waiting
+        assert [rate_limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert clock.time() == 1000.0
+
+        # After that, requests are spaced at the rate
+        assert rate_limiter.acquire() == 0.5
+        assert clock.time() == 1000.5
+        assert rate_limiter.acquire() == 0.5
+        assert clock.time() == 1001.0
+
+        stats = rate_limiter.get_stats()
+        assert stats["requests"] == 5
+        assert stats["total_wait"] == 1.0
+        assert stats["average_wait"] == 0.2
+
+    def test_refill(self):
+        rate_limiter = self._create_rate_limiter()
+        for _ in range(3):
+            rate_limiter.acquire()
+        assert rate_limiter.get_wait_time() == 0.5
+
+        # Tokens come back at the rate
+        clock.sleep(1.0)
+        assert rate_limiter.get_stats()["tokens"] == 0.0
+        assert rate_limiter.get_wait_time() == 0.0
+        assert rate_limiter.get_stats()["tokens"] == 2.0
+
+        # But never more than the burst
+        clock.sleep(60.0)
+        assert rate_limiter.get_wait_time() == 0.0
+        assert rate_limiter.get_stats()["tokens"] == 3.0
+        assert [rate_limiter.acquire() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+    def test_blocking(self):
+        rate_limiter = self._create_rate_limiter({"burst": 1})
+        assert rate_limiter.acquire() == 0.0
+
+        # Tokens are reserved before sleeping, so callers arriving together queue up behind each other
+        with patch.object(clock, 'sleep') as sleep:
+            threads = [threading.Thread(target=rate_limiter.acquire) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert sorted(call[0][0] for call in sleep.call_args_list) == [0.5, 1.0, 1.5]
+        assert rate_limiter.get_wait_time() == 2.0
+        assert rate_limiter.get_stats()["total_wait"] == 3.0
+
+    def test_adapt_rate(self):
+        rate_limiter = self._create_rate_limiter({"increase": 0.5, "decrease": 0.25, "min_requests_per_second": 1.0})
+
+        rate_limiter.on_success()
+        assert rate_limiter.get_rate() == 2.5
+        for _ in range(4):
+            rate_limiter.on_success()
+        assert rate_limiter.get_rate() == 4.0
+
+        # A throttle cuts the rate and stops the rest of the burst
+        rate_limiter.on_throttle()
+        assert rate_limiter.get_rate() == 1.0
+        assert rate_limiter.get_stats()["throttles"] == 1
+        assert rate_limiter.acquire() == 1.0
+
+        rate_limiter.on_throttle()
+        assert rate_limiter.get_rate() == 1.0
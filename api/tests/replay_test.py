@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+from mock import patch
+
+from api import PoGoApi
+from api.exceptions import ReplayFinishedException, ReplayMismatchException
+from api.replay import ReplayApi, TrafficRecorder
+from app.clock import Clock, clock
+from pokemongo_bot.tests import PGoApiMock
+
+INVENTORY_RESPONSE = {
+    "inventory_delta": {
+        "new_timestamp_ms": 1470000000000,
+        "inventory_items": [{"inventory_item_data": {"item": {"item_id": 1, "count": 20}}}]
+    }
+}
+
+MAP_RESPONSE = {
+    "map_cells": [{"s2_cell_id": 5221364418239004672, "current_timestamp_ms": 1470000005000}]
+}
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "traffic.pickle")
+
+    def tearDown(self):
+        clock.set_mode(Clock.REAL)
+        shutil.rmtree(self.directory)
+
+    def _record_session(self):
+        pgo = PGoApiMock()
+        pgo.set_response("get_inventory", INVENTORY_RESPONSE)
+        pgo.set_response("get_inventory", INVENTORY_RESPONSE)
+        pgo.set_response("get_map_objects", MAP_RESPONSE)
+
+        traffic_recorder = TrafficRecorder({"api": {"record_traffic": self.filename}})
+        api_wrapper = PoGoApi(pgo, traffic_recorder=traffic_recorder)
+        with patch('time.time') as time:
+            self._play_session(api_wrapper, time)
+        traffic_recorder.flush()
+
+    @staticmethod
+    def _play_session(api_wrapper, time=None):
+        map_objects_kwargs = {"latitude": 51.5, "longitude": -0.07, "cell_id": [5221364418239004672]}
+        for timestamp, method, kwargs in [(1000.0, "get_inventory", {}),
+                                          (1060.0, "get_inventory", {}),
+                                          (1090.0, "get_map_objects", map_objects_kwargs)]:
+            if time is not None:
+                time.return_value = timestamp
+            getattr(api_wrapper, method)(**kwargs)
+            assert api_wrapper.call(ignore_expiration=True, ignore_cache=True) is not None
+
+    def test_record(self):
+        self._record_session()
+
+        records = list(TrafficRecorder.read(self.filename))
+        assert [record["timestamp"] for record in records] == [1000.0, 1060.0, 1090.0]
+        assert records[0]["response"]["responses"]["GET_INVENTORY"] == INVENTORY_RESPONSE
+
+        # The arguments filled in from the state are recorded as they were sent
+        assert records[0]["calls"] == [("GET_INVENTORY", (), {})]
+        assert records[1]["calls"] == [("GET_INVENTORY", (), {"last_timestamp_ms": 1470000000000})]
+        assert records[2]["calls"] == [("GET_MAP_OBJECTS", (), {
+            "latitude": 51.5,
+            "longitude": -0.07,
+            "cell_id": [5221364418239004672],
+            "since_timestamp_ms": [0]
+        })]
+
+    def test_replay(self):
+        self._record_session()
+
+        replay_api = ReplayApi(self.filename)
+        clock.set_mode(Clock.SIMULATED, start=replay_api.get_start_time())
+        assert clock.time() == 1000.0
+
+        api_wrapper = PoGoApi(replay_api)
+        assert api_wrapper.login() is True
+        assert replay_api.get_position() == (0, 0, 0)
+        self._play_session(api_wrapper)
+        api_wrapper.auth_refresher.stop()
+
+        # The simulated clock went along with the recording
+        assert clock.time() == 1090.0
+        assert replay_api.replayed == 3
+        assert api_wrapper.get_worldmap().get_timestamps([5221364418239004672]) == [1470000005000]
+
+        with pytest.raises(ReplayFinishedException):
+            replay_api.create_request().get_player().call()
+
+    def test_replay_mismatch(self):
+        self._record_session()
+
+        replay_api = ReplayApi(self.filename)
+        with pytest.raises(ReplayMismatchException):
+            replay_api.create_request().get_player().call()
@@ -0,0 +1,126 @@
+import threading
+import time
+import unittest
+
+import pytest
+from mock import MagicMock
+
+from api import PoGoApi
+from api.request_coalescer import RequestCoalescer
+from pokemongo_bot.tests import PGoApiMock
+
+
+class RequestCoalescerTest(unittest.TestCase):
+    def setUp(self):
+        self.coalescer = RequestCoalescer(window=10)
+        self.sent = []
+        self.in_flight = threading.Event()
+        self.release = threading.Event()
+
+    def _blocking_send(self, method_keys, _methods):
+        self.sent.append(list(method_keys))
+        self.in_flight.set()
+        self.release.wait(5)
+        return {"methods": list(method_keys)}
+
+    def _send(self, method_keys, _methods):
+        self.sent.append(list(method_keys))
+        return {"methods": list(method_keys)}
+
+    def _submit_in_thread(self, method, send, results):
+        def submit():
+            try:
+                results[method] = self.coalescer.submit([method], {method: ((), {})}, send)
+            except Exception as error:  # pylint: disable=broad-except
+                results[method] = error
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _wait_for(condition):
+        for _ in range(500):
+            if condition():
+                return
+            time.sleep(0.01)
+        raise AssertionError("Timed out")
+
+    def test_single_caller(self):
+        started_at = time.time()
+        self.coalescer.submit(["GET_PLAYER"], {"GET_PLAYER": ((), {})}, self._send)
+        result = self.coalescer.submit(["GET_INVENTORY"], {"GET_INVENTORY": ((), {})}, self._send)
+
+        # Nothing else was in flight, so nothing waited for the 10 second window
+        assert time.time() - started_at < 1
+        assert result == {"methods": ["GET_INVENTORY"]}
+        assert self.sent == [["GET_PLAYER"], ["GET_INVENTORY"]]
+        assert self.coalescer.get_stats() == {"envelopes": 2, "coalesced_calls": 0}
+
+    def test_merge(self):
+        results = {}
+        first = self._submit_in_thread("GET_PLAYER", self._blocking_send, results)
+        self.in_flight.wait(5)
+
+        # Both arrive while the first envelope is in flight, and go out together once it is back
+        second = self._submit_in_thread("GET_INVENTORY", self._send, results)
+        self._wait_for(lambda: self.coalescer._open_batch is not None)  # pylint: disable=protected-access
+        third = self._submit_in_thread("GET_MAP_OBJECTS", self._send, results)
+        self._wait_for(lambda: self.coalescer.coalesced_calls == 1)
+
+        self.release.set()
+        for thread in (first, second, third):
+            thread.join(5)
+
+        assert self.sent == [["GET_PLAYER"], ["GET_INVENTORY", "GET_MAP_OBJECTS"]]
+        assert results["GET_INVENTORY"] is results["GET_MAP_OBJECTS"]
+        assert self.coalescer.get_stats() == {"envelopes": 2, "coalesced_calls": 1}
+
+    def test_leader_error(self):
+        def failing_send(_method_keys, _methods):
+            raise ValueError("Failed to send")
+
+        results = {}
+        first = self._submit_in_thread("GET_PLAYER", self._blocking_send, results)
+        self.in_flight.wait(5)
+
+        second = self._submit_in_thread("GET_INVENTORY", failing_send, results)
+        self._wait_for(lambda: self.coalescer._open_batch is not None)  # pylint: disable=protected-access
+        third = self._submit_in_thread("GET_MAP_OBJECTS", self._send, results)
+        self._wait_for(lambda: self.coalescer.coalesced_calls == 1)
+
+        self.release.set()
+        for thread in (first, second, third):
+            thread.join(5)
+
+        # The caller that joined the failed envelope gets the error too, rather than an empty result
+        assert isinstance(results["GET_INVENTORY"], ValueError)
+        assert results["GET_MAP_OBJECTS"] is results["GET_INVENTORY"]
+
+        # The coalescer is still usable afterwards
+        assert self.coalescer.submit(["GET_PLAYER"], {"GET_PLAYER": ((), {})}, self._send) == {"methods": ["GET_PLAYER"]}
+
+    def test_single_caller_error(self):
+        def failing_send(_method_keys, _methods):
+            raise ValueError("Failed to send")
+
+        with pytest.raises(ValueError):
+            self.coalescer.submit(["GET_PLAYER"], {"GET_PLAYER": ((), {})}, failing_send)
+        assert self.coalescer.get_stats() == {"envelopes": 1, "coalesced_calls": 0}
+
+    @staticmethod
+    def test_api_returns_whole_state():
+        pgo = PGoApiMock()
+        pgo.set_position(0, 0, 0)
+        pgo.set_response("get_player", {"player_data": {"username": "test_account"}})
+        pgo.set_response("fort_details", {"id": "fort_1", "type": 1})
+        api_wrapper = PoGoApi(pgo, coalesce_window=0.05)
+        api_wrapper.get_expiration_time = MagicMock(return_value=1000000)
+
+        api_wrapper.get_player()
+        api_wrapper.call()
+
+        # Callers read states other methods produced, as they do without coalescing
+        response = api_wrapper.fort_details(fort_id="fort_1").call()
+        assert response["player"].username == "test_account"
+        assert response["fort"].fort_id == "fort_1"
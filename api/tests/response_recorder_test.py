@@ -0,0 +1,72 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from api.response_recorder import ResponseRecorder
+
+
+class ResponseRecorderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'api-responses.log.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _create_recorder(self, max_bytes=1024 * 1024):
+        return ResponseRecorder({"api": {"response_log": {
+            "enabled": True,
+            "filename": self.filename,
+            "max_bytes": max_bytes,
+            "backup_count": 1,
+            "size": 2
+        }}})
+
+    def _read_log(self, filename=None):
+        with gzip.open(filename or self.filename, 'rb') as log_file:
+            return log_file.read().decode('utf-8')
+
+    def test_recent(self):
+        recorder = ResponseRecorder({"api": {"response_log": {"size": 2}}})
+        assert recorder.get_last() is None
+
+        recorder.record(["GET_PLAYER"], {"responses": {"GET_PLAYER": 1}}, 1000.0, 0.5, 1)
+        recorder.record(["GET_INVENTORY"], {"responses": {"GET_INVENTORY": 2}}, 1001.0, 0.5, 1)
+        recorder.record(["GET_MAP_OBJECTS"], {"responses": {"GET_MAP_OBJECTS": 3}}, 1002.0, 0.5, 2)
+
+        assert [entry["methods"] for entry in recorder.get_recent()] == [["GET_INVENTORY"], ["GET_MAP_OBJECTS"]]
+        assert recorder.get_last()["attempts"] == 2
+
+    def test_round_trip(self):
+        recorder = self._create_recorder()
+        recorder.record(["GET_PLAYER"], {"responses": {"GET_PLAYER": "first"}}, 1000.0, 0.5, 1)
+        recorder.flush()
+
+        # Readable as soon as it is flushed, while the bot is still running
+        assert "GET_PLAYER" in self._read_log()
+        assert "first" in self._read_log()
+
+        recorder.record(["GET_INVENTORY"], {"responses": {"GET_INVENTORY": "second"}}, 1001.0, 0.5, 2)
+        recorder.flush()
+
+        # A new session appends to the same log
+        recorder = self._create_recorder()
+        recorder.record(["GET_MAP_OBJECTS"], {"responses": {"GET_MAP_OBJECTS": "third"}}, 1002.0, 0.5, 1)
+        recorder.flush()
+
+        log = self._read_log()
+        assert log.index("first") < log.index("second") < log.index("third")
+        assert "(0.500s, 2 attempts)" in log
+
+    def test_rotate(self):
+        recorder = self._create_recorder(max_bytes=1)
+        recorder.record(["GET_PLAYER"], {"responses": {"GET_PLAYER": "first"}}, 1000.0, 0.5, 1)
+        recorder.flush()
+        recorder.record(["GET_INVENTORY"], {"responses": {"GET_INVENTORY": "second"}}, 1001.0, 0.5, 1)
+        recorder.flush()
+
+        assert "second" in self._read_log(self.filename + ".1")
+        assert not os.path.isfile(self.filename)
+        assert not os.path.isfile(self.filename + ".2")
@@ -0,0 +1,147 @@
+import random
+import unittest
+
+import pytest
+from mock import Mock, patch
+from pgoapi.exceptions import ServerSideRequestThrottlingException, UnexpectedResponseException
+
+from api import PoGoApi
+from api.exceptions import AccountBannedException
+from api.retry_policy import CircuitBreaker, RetryPolicies, RetryPolicy
+from app.clock import Clock, clock
+from pokemongo_bot.tests import PGoApiMock
+
+
+class ScriptedApi(PGoApiMock):
+    """
+        Answers every request with the next of the given results, raising it if it is an exception.
+    """
+
+    def __init__(self, results):
+        super(ScriptedApi, self).__init__()
+        self.results = list(results)
+        self.requests = 0
+        self.set_position(0, 0, 0)
+
+    def create_request(self):
+        request = Mock()
+        request.call = self._call
+        return request
+
+    def _call(self):
+        self.requests += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def tearDown(self):
+        clock.set_mode(Clock.REAL)
+
+    @staticmethod
+    def test_backoff_bounds():
+        policy = RetryPolicy(base_delay=1.0, max_delay=30.0, max_attempts=3)
+        random.seed(1)
+
+        delay = None
+        for _ in range(100):
+            previous_delay = 1.0 if delay is None else delay
+            delay = policy.next_delay(delay)
+            assert 1.0 <= delay <= min(30.0, previous_delay * 3)
+
+        # It gets to the cap, and stays there
+        assert max(policy.next_delay(30.0) for _ in range(100)) == 30.0
+
+        assert policy.should_retry(2) is True
+        assert policy.should_retry(3) is False
+
+    @staticmethod
+    def test_policies_config():
+        policies = RetryPolicies({"api": {"retry": {"throttled": {"max_attempts": 2}}}})
+        assert policies.get(RetryPolicies.THROTTLED).max_attempts == 2
+        assert policies.get(RetryPolicies.THROTTLED).base_delay == 1.0
+        assert policies.get(RetryPolicies.OFFLINE).base_delay == 5.0
+
+    @staticmethod
+    def test_circuit_breaker():
+        circuit_breaker = CircuitBreaker({"api": {"circuit_breaker": {"failure_threshold": 3, "reset_timeout": 60}}})
+
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            circuit_breaker.record_failure()
+            circuit_breaker.record_failure()
+            assert circuit_breaker.allow_request() is True
+
+            circuit_breaker.record_failure()
+            assert circuit_breaker.is_open() is True
+            assert circuit_breaker.allow_request() is False
+
+            time.return_value = 1045.0
+            assert circuit_breaker.get_remaining_time() == 15.0
+            assert circuit_breaker.allow_request() is False
+
+            # A single trial request goes through once the timeout has passed, failing it opens the breaker again
+            time.return_value = 1060.0
+            assert circuit_breaker.allow_request() is True
+            assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+            assert circuit_breaker.allow_request() is False
+            circuit_breaker.record_failure()
+            assert circuit_breaker.is_open() is True
+            assert circuit_breaker.get_remaining_time() == 60.0
+
+            time.return_value = 1120.0
+            assert circuit_breaker.allow_request() is True
+            circuit_breaker.record_success()
+            assert circuit_breaker.state == CircuitBreaker.CLOSED
+            assert circuit_breaker.failures == 0
+            assert circuit_breaker.allow_request() is True
+
+    @staticmethod
+    def _create_api_wrapper(results, circuit_breaker=None):
+        api_wrapper = PoGoApi(ScriptedApi(results), circuit_breaker=circuit_breaker)
+        api_wrapper.get_expiration_time = Mock(return_value=1000000)
+        return api_wrapper
+
+    def test_delay_per_failure(self):
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+        api_wrapper = self._create_api_wrapper([ServerSideRequestThrottlingException(), UnexpectedResponseException(),
+                                                ServerSideRequestThrottlingException(), UnexpectedResponseException(),
+                                                {"status_code": 1, "responses": {"GET_PLAYER": {}}}])
+
+        def record_delays(delays):
+            def next_delay(previous_delay):
+                delays.append(previous_delay)
+                return 10.0 * len(delays)
+            return next_delay
+
+        throttled_delays = []
+        http_error_delays = []
+        api_wrapper.retry_policies.get(RetryPolicies.THROTTLED).next_delay = record_delays(throttled_delays)
+        api_wrapper.retry_policies.get(RetryPolicies.HTTP_ERROR).next_delay = record_delays(http_error_delays)
+
+        assert api_wrapper.get_player().call(ignore_cache=True) is not None
+
+        # Each class backs off from its own last delay, not from the other one's
+        assert throttled_delays == [None, 10.0]
+        assert http_error_delays == [None, 10.0]
+        assert clock.time() == 1000.0 + 10.0 + 10.0 + 20.0 + 20.0
+
+    def test_circuit_open(self):
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+        circuit_breaker = CircuitBreaker({"api": {"circuit_breaker": {"failure_threshold": 2, "reset_timeout": 60}}})
+        api_wrapper = self._create_api_wrapper([None, None], circuit_breaker)
+
+        # Gives up as soon as the breaker opens, and fails fast until the timeout has passed
+        assert api_wrapper.get_player().call(ignore_cache=True) is None
+        assert api_wrapper.get_api().requests == 2
+        assert api_wrapper.get_player().call(ignore_cache=True) is None
+        assert api_wrapper.get_api().requests == 2
+
+    def test_account_banned(self):
+        clock.set_mode(Clock.SIMULATED, start=1000.0)
+        api_wrapper = self._create_api_wrapper([{"status_code": 3}])
+
+        with pytest.raises(AccountBannedException):
+            api_wrapper.get_player().call(ignore_cache=True)
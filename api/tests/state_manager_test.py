@@ -0,0 +1,102 @@
+import unittest
+
+from mock import MagicMock, patch
+
+from api import PoGoApi
+from api.state_manager import StateManager
+from pokemongo_bot.tests import PGoApiMock
+
+
+class StateManagerTest(unittest.TestCase):
+    @staticmethod
+    def _create_state_manager(state_ttl=None):
+        state_manager = StateManager(state_ttl)
+        state_manager.update_with_response("GET_PLAYER", {"player_data": {"username": "test_account"}})
+        return state_manager
+
+    def test_ttl_expiry(self):
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            state_manager = self._create_state_manager({"player": 60})
+
+            time.return_value = 1059.0
+            assert state_manager.filter_cached_methods(["GET_PLAYER"]) == []
+            assert state_manager.filter_cached_methods(["GET_PLAYER"], max_age=30) == ["GET_PLAYER"]
+
+            time.return_value = 1060.0
+            assert state_manager.filter_cached_methods(["GET_PLAYER"]) == ["GET_PLAYER"]
+
+    def test_mutation_with_ttl(self):
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            state_manager = self._create_state_manager({"player": 60})
+
+            # Spinning changes the player, but a live time to live still serves it from the cache
+            assert state_manager.filter_cached_methods(["FORT_SEARCH", "GET_PLAYER"]) == ["FORT_SEARCH"]
+            state_manager.mark_stale(["FORT_SEARCH"])
+            assert state_manager.filter_cached_methods(["GET_PLAYER"]) == []
+            assert state_manager.filter_cached_methods(["GET_PLAYER"], max_age=0) == ["GET_PLAYER"]
+
+            time.return_value = 1060.0
+            assert state_manager.filter_cached_methods(["GET_PLAYER"]) == ["GET_PLAYER"]
+
+    def test_mutation_without_ttl(self):
+        state_manager = self._create_state_manager({"player": None})
+
+        # Kept for as long as nothing mutates it
+        with patch('time.time') as time:
+            time.return_value = 10 ** 10
+            assert state_manager.filter_cached_methods(["GET_PLAYER"]) == []
+
+        assert state_manager.filter_cached_methods(["FORT_SEARCH", "GET_PLAYER"]) == ["FORT_SEARCH", "GET_PLAYER"]
+        state_manager.mark_stale(["FORT_SEARCH"])
+        assert state_manager.filter_cached_methods(["GET_PLAYER"]) == ["GET_PLAYER"]
+
+    @staticmethod
+    def test_item_templates_ttl():
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            state_manager = StateManager()
+            state_manager.update_with_response("DOWNLOAD_ITEM_TEMPLATES", {"item_templates": []})
+
+            time.return_value = 1000.0 + 86399
+            assert state_manager.filter_cached_methods(["DOWNLOAD_ITEM_TEMPLATES"]) == []
+
+            time.return_value = 1000.0 + 86400
+            assert state_manager.filter_cached_methods(["DOWNLOAD_ITEM_TEMPLATES"]) == ["DOWNLOAD_ITEM_TEMPLATES"]
+
+    @staticmethod
+    def test_map_objects_ttl():
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            state_manager = StateManager()
+            state_manager.update_with_response("GET_MAP_OBJECTS", {"map_cells": [{"s2_cell_id": 1}]})
+
+            time.return_value = 1009.0
+            assert state_manager.filter_cached_methods(["GET_MAP_OBJECTS"]) == []
+
+            # Scans after moving pass max_age=0 to get the map at the new position
+            assert state_manager.filter_cached_methods(["GET_MAP_OBJECTS"], max_age=0) == ["GET_MAP_OBJECTS"]
+
+            time.return_value = 1010.0
+            assert state_manager.filter_cached_methods(["GET_MAP_OBJECTS"]) == ["GET_MAP_OBJECTS"]
+
+    @staticmethod
+    def test_request_avoided():
+        pgo = PGoApiMock()
+        pgo.set_position(0, 0, 0)
+        pgo.set_response("get_player", {"player_data": {"username": "test_account"}})
+        pgo.set_response("fort_search", {"result": 1})
+        api_wrapper = PoGoApi(pgo)
+        api_wrapper.get_expiration_time = MagicMock(return_value=1000000)
+
+        api_wrapper.get_player()
+        assert api_wrapper.call()["player"].username == "test_account"
+        api_wrapper.fort_search(fort_id="fort_1")
+        api_wrapper.call()
+
+        # The player within its time to live comes from the cache, no request is sent for it
+        api_wrapper.get_player()
+        assert api_wrapper.call()["player"].username == "test_account"
+        assert pgo.call_stack_size() == 0
+        assert api_wrapper.get_metrics().get_stats()["requests"] == 2
@@ -1,11 +1,17 @@
 # pylint: disable=redefined-builtin
 from builtins import str
-import time
 
+from s2sphere import CellId, LatLng  # type: ignore
+
+from app.clock import clock
 from api.json_encodable import JSONEncodable
+from api.geo import EARTH_RADIUS
+from api.spatial_index import SpatialIndex
 
 
 class Fort(JSONEncodable):
+    __slots__ = ("fort_id", "fort_name", "latitude", "longitude", "enabled", "last_modified_timestamp_ms", "fort_type")
+
     def __init__(self, data):
         self.fort_id = data.get("id", "")
         self.fort_name = data.get("name", "Unknown").encode('ascii', 'replace')
@@ -18,6 +24,9 @@ class Fort(JSONEncodable):
 
 
 class PokeStop(Fort):
+    __slots__ = ("active_fort_modifier", "cooldown_timestamp_ms", "lure_expires_timestamp_ms", "lure_encounter_id",
+                 "lure_pokemon_id", "lure_fort_id")
+
     def __init__(self, data):
         super(PokeStop, self).__init__(data)
         self.active_fort_modifier = data.get("active_fort_modifier", None)
@@ -33,15 +42,17 @@ class PokeStop(Fort):
     def is_lure_active(self):
         if self.lure_expires_timestamp_ms is None:
             return False
-        return self.lure_expires_timestamp_ms + 1000 > time.time() * 1000
+        return self.lure_expires_timestamp_ms + 1000 > clock.time() * 1000
 
     def is_in_cooldown(self):
         if self.cooldown_timestamp_ms is None:
             return False
-        return self.cooldown_timestamp_ms + 1000 > time.time() * 1000
+        return self.cooldown_timestamp_ms + 1000 > clock.time() * 1000
 
 
 class Gym(Fort):
+    __slots__ = ("is_in_battle", "guard_pokemon_id", "owned_by_team", "gym_points")
+
     def __init__(self, data):
         super(Gym, self).__init__(data)
 
@@ -53,38 +64,156 @@ class Gym(Fort):
 
 
 class Cell(JSONEncodable):
+    __slots__ = ("spawn_points", "gyms", "pokestops", "cell_id", "timestamp_ms", "catchable_pokemon", "nearby_pokemon",
+                 "wild_pokemon")
+
     def __init__(self, data):
         self.spawn_points = []
         self.gyms = []
         self.pokestops = []
 
         self.cell_id = data.get("s2_cell_id", 0)
+        self.timestamp_ms = 0
+
+        self.catchable_pokemon = []
+        self.nearby_pokemon = []
+        self.wild_pokemon = []
+
+        self.update(data)
 
-        spawn_points = data.get("spawn_points", [])
-        for spawn in spawn_points:
-            self.spawn_points.append((spawn["latitude"], spawn["longitude"]))
+    # Merge a newer response for this cell. Pokemon are always sent in full, but forts are only
+    # sent if they changed since the timestamp in the request, so only those are replaced.
+    def update(self, data):
+        self.timestamp_ms = data.get("current_timestamp_ms", self.timestamp_ms)
+
+        spawn_points = data.get("spawn_points", None)
+        if spawn_points is not None:
+            self.spawn_points = [(spawn["latitude"], spawn["longitude"]) for spawn in spawn_points]
 
         self.catchable_pokemon = data.get("catchable_pokemons", [])
         self.nearby_pokemon = data.get("nearby_pokemons", [])
         self.wild_pokemon = data.get("wild_pokemons", [])
 
         forts = data.get("forts", [])
-        for fort in forts:
-            if fort.get("type", 0) == 1:
-                self.pokestops.append(PokeStop(fort))
-            elif fort.get("type", 0) == 2:
-                self.gyms.append(Gym(fort))
+        if len(forts) == 0:
+            return
+
+        known_forts = {}
+        for fort in self.pokestops + self.gyms:
+            known_forts[fort.fort_id] = fort
+
+        changed = False
+        for fort_data in forts:
+            known_fort = known_forts.get(fort_data.get("id", ""), None)
+            if known_fort is not None and fort_data.get("last_modified_timestamp_ms", 0) <= known_fort.last_modified_timestamp_ms:
+                continue
+
+            if fort_data.get("type", 0) == 1:
+                fort = PokeStop(fort_data)
+            elif fort_data.get("type", 0) == 2:
+                fort = Gym(fort_data)
             else:
                 # Some unknown kind of fort or invalid data
-                pass
+                continue
+
+            known_forts[fort.fort_id] = fort
+            changed = True
+
+        if changed:
+            self.pokestops = [fort for fort in known_forts.values() if isinstance(fort, PokeStop)]
+            self.gyms = [fort for fort in known_forts.values() if isinstance(fort, Gym)]
 
 
 class WorldMap(JSONEncodable):
+    """
+        All map cells seen recently, kept across GET_MAP_OBJECTS calls and updated cell by cell. cells
+        holds the cells of the last response. The forts and spawn points of every known cell are kept in
+        spatial indexes, updated whenever a cell changes or is forgotten.
+    """
+
     def __init__(self):
         self.cells = []
+        self._cells = {}
+
+        self.fort_index = SpatialIndex()
+        self.spawn_point_index = SpatialIndex()
 
     def update_map_objects(self, data):
-        cells = data.get("map_cells", [])
-        for cell_data in cells:
-            cell = Cell(cell_data)
-            self.cells.append(cell)
+        cells = []
+        for cell_data in data.get("map_cells", []):
+            cell_id = cell_data.get("s2_cell_id", 0)
+            cell = self._cells.get(cell_id, None)
+            if cell is None:
+                cell = Cell(cell_data)
+                self._cells[cell_id] = cell
+                self._index_cell(cell)
+            else:
+                forts, spawn_points = cell.pokestops + cell.gyms, cell.spawn_points
+                cell.update(cell_data)
+                # Cell.update only hands out new lists when something changed
+                if forts != cell.pokestops + cell.gyms or spawn_points is not cell.spawn_points:
+                    self._unindex_cell(cell, forts, spawn_points)
+                    self._index_cell(cell)
+            cells.append(cell)
+        self.cells = cells
+
+    # Add cells that were stored elsewhere, cells that are already known are kept as they are.
+    def add_cells(self, cells):
+        # type: (List[Cell]) -> None
+        for cell in cells:
+            if cell.cell_id not in self._cells:
+                self._cells[cell.cell_id] = cell
+                self._index_cell(cell)
+
+    def _index_cell(self, cell):
+        for fort in cell.pokestops + cell.gyms:
+            if fort.latitude is not None and fort.longitude is not None:
+                self.fort_index.add(fort.fort_id, fort.latitude, fort.longitude, fort)
+        for spawn_point in cell.spawn_points:
+            self.spawn_point_index.add(spawn_point, spawn_point[0], spawn_point[1], spawn_point)
+
+    def _unindex_cell(self, cell, forts=None, spawn_points=None):
+        for fort in cell.pokestops + cell.gyms if forts is None else forts:
+            self.fort_index.remove(fort.fort_id)
+        for spawn_point in cell.spawn_points if spawn_points is None else spawn_points:
+            self.spawn_point_index.remove(spawn_point)
+
+    # Known forts within radius meters, nearest first, as (distance, fort) tuples.
+    def get_forts_within(self, lat, lng, radius, predicate=None):
+        # type: (float, float, float, Optional[Callable[[Fort], bool]]) -> List[Tuple[float, Fort]]
+        return self.fort_index.within(lat, lng, radius, predicate)
+
+    # The count known forts nearest to the position, nearest first, as (distance, fort) tuples.
+    def get_nearest_forts(self, lat, lng, count=1, predicate=None):
+        # type: (float, float, int, Optional[Callable[[Fort], bool]]) -> List[Tuple[float, Fort]]
+        return self.fort_index.nearest(lat, lng, count, predicate)
+
+    # Known spawn points within radius meters, nearest first, as (distance, (lat, lng)) tuples.
+    def get_spawn_points_within(self, lat, lng, radius):
+        # type: (float, float, float) -> List[Tuple[float, Tuple[float, float]]]
+        return self.spawn_point_index.within(lat, lng, radius)
+
+    def get_cell(self, cell_id):
+        # type: (int) -> Optional[Cell]
+        return self._cells.get(cell_id, None)
+
+    # The timestamps to send as since_timestamp_ms, so that unchanged forts are not sent again.
+    def get_timestamps(self, cell_ids):
+        # type: (List[int]) -> List[int]
+        timestamps = []
+        for cell_id in cell_ids:
+            cell = self._cells.get(cell_id, None)
+            timestamps.append(cell.timestamp_ms if cell is not None else 0)
+        return timestamps
+
+    # Forget cells whose center is further than radius meters away, except the ones we just got.
+    def evict_cells(self, lat, lng, radius):
+        # type: (float, float, float) -> int
+        origin = LatLng.from_degrees(lat, lng)
+        max_angle = float(radius) / EARTH_RADIUS
+        current = set(cell.cell_id for cell in self.cells)
+        evicted = [cell_id for cell_id in self._cells if cell_id not in current and
+                   CellId(cell_id).to_lat_lng().get_distance(origin).radians > max_angle]
+        for cell_id in evicted:
+            self._unindex_cell(self._cells.pop(cell_id))
+        return len(evicted)
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from app import kernel
+
+# How often a simulated wait looks at the clock, in real seconds
+SIMULATED_POLL_INTERVAL = 0.01
+
+
+class Clock(object):
+    """
+        The time every part of the bot sleeps and timestamps with. In real mode it is the wall clock. In
+        accelerated mode time passes speed times faster than the wall clock, and sleeps are that much
+        shorter. In simulated mode nothing ever waits, sleeping moves the clock forward instead, so hours
+        of play against a mock backend run in seconds.
+    """
+
+    REAL = 'real'
+    ACCELERATED = 'accelerated'
+    SIMULATED = 'simulated'
+
+    def __init__(self):
+        # type: () -> None
+        self._lock = threading.Lock()
+        self.mode = self.REAL
+        self.speed = 1.0
+        self._started_at = 0.0
+        self._real_started_at = 0.0
+        self._now = 0.0
+
+    def set_mode(self, mode, speed=1.0, start=None):
+        # type: (str, float, Optional[float]) -> None
+        if mode not in (self.REAL, self.ACCELERATED, self.SIMULATED):
+            raise ValueError('Unknown clock mode "{}".'.format(mode))
+        if mode == self.ACCELERATED and speed <= 0:
+            raise ValueError('The clock speed has to be positive.')
+
+        with self._lock:
+            now = self._get_time() if start is None else start
+            self.mode = mode
+            self.speed = float(speed) if mode == self.ACCELERATED else 1.0
+            self._started_at = now
+            self._real_started_at = time.time()
+            self._now = now
+
+    def _get_time(self):
+        # type: () -> float
+        if self.mode == self.SIMULATED:
+            return self._now
+        elif self.mode == self.ACCELERATED:
+            return self._started_at + (time.time() - self._real_started_at) * self.speed
+        return time.time()
+
+    def time(self):
+        # type: () -> float
+        with self._lock:
+            return self._get_time()
+
+    def time_ms(self):
+        # type: () -> int
+        return int(self.time() * 1000)
+
+    def sleep(self, seconds):
+        # type: (float) -> None
+        if seconds <= 0:
+            return
+        if self.mode == self.SIMULATED:
+            with self._lock:
+                self._now += seconds
+        elif self.mode == self.ACCELERATED:
+            time.sleep(seconds / self.speed)
+        else:
+            time.sleep(seconds)
+
+    # Wait until the event is set or seconds have passed on this clock, returns whether the event is set.
+    # In simulated mode it is up to the other threads to move the clock forward.
+    def wait(self, event, seconds):
+        # type: (threading.Event, float) -> bool
+        if self.mode == self.SIMULATED:
+            deadline = self.time() + seconds
+            while not event.is_set() and self.time() < deadline:
+                event.wait(SIMULATED_POLL_INTERVAL)
+            return event.is_set()
+        elif self.mode == self.ACCELERATED:
+            return event.wait(max(seconds, 0) / self.speed)
+        return event.wait(max(seconds, 0))
+
+
+clock = Clock()
+kernel.container.register_singleton('clock', clock)
@@ -0,0 +1,81 @@
+import threading
+import unittest
+
+import pytest
+from mock import patch
+
+from app import kernel
+from app.clock import Clock, clock
+
+
+class ClockTest(unittest.TestCase):
+    @staticmethod
+    def test_registered():
+        assert kernel.container.get('clock') is clock
+        assert clock.mode == Clock.REAL
+
+    @staticmethod
+    def test_real():
+        real_clock = Clock()
+
+        with patch('time.time') as time, patch('time.sleep') as sleep:
+            time.return_value = 1000.0
+            assert real_clock.time() == 1000.0
+            assert real_clock.time_ms() == 1000000
+
+            real_clock.sleep(2)
+            sleep.assert_called_once_with(2)
+
+    @staticmethod
+    def test_accelerated():
+        accelerated_clock = Clock()
+
+        with patch('time.time') as time, patch('time.sleep') as sleep:
+            time.return_value = 1000.0
+            accelerated_clock.set_mode(Clock.ACCELERATED, speed=60, start=5000.0)
+            assert accelerated_clock.time() == 5000.0
+
+            time.return_value = 1010.0
+            assert accelerated_clock.time() == 5600.0
+
+            accelerated_clock.sleep(120)
+            sleep.assert_called_once_with(2.0)
+
+    @staticmethod
+    def test_simulated():
+        simulated_clock = Clock()
+
+        with patch('time.sleep') as sleep:
+            simulated_clock.set_mode(Clock.SIMULATED, start=5000.0)
+            simulated_clock.sleep(3600)
+            simulated_clock.sleep(-5)
+
+            assert simulated_clock.time() == 8600.0
+            assert sleep.called is False
+
+    @staticmethod
+    def test_wait():
+        event = threading.Event()
+
+        accelerated_clock = Clock()
+        accelerated_clock.set_mode(Clock.ACCELERATED, speed=1000)
+        assert accelerated_clock.wait(event, 10) is False
+
+        # A simulated wait ends once another thread moves the clock past it
+        simulated_clock = Clock()
+        simulated_clock.set_mode(Clock.SIMULATED, start=5000.0)
+        mover = threading.Timer(0.05, simulated_clock.sleep, [60])
+        mover.start()
+        assert simulated_clock.wait(event, 60) is False
+        mover.join()
+
+        event.set()
+        assert simulated_clock.wait(event, 3600) is True
+        assert simulated_clock.time() == 5060.0
+
+    @staticmethod
+    def test_invalid_mode():
+        with pytest.raises(ValueError):
+            Clock().set_mode('fast')
+        with pytest.raises(ValueError):
+            Clock().set_mode(Clock.ACCELERATED, speed=0)
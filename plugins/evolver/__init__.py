@@ -21,7 +21,7 @@ class Evolver(Plugin):
         self._do_evolve(bot, bot.pokemon_list[pokemon.pokemon_id - 1]['Name'])
 
     def _do_evolve(self, bot, name):
-        pokemon_list = bot.player_service.get_pokemon()
+        pokemon_bag = bot.player_service.get_pokemon_bag()
         base_pokemon = self._get_base_pokemon(bot, name)
         base_name = base_pokemon['name']
         pokemon_id = base_pokemon['id']
@@ -33,10 +33,8 @@ class Evolver(Plugin):
                 self.log('Can\'t evolve {}'.format(base_name), color='yellow')
                 return
 
-            pokemon_evolve = [pokemon for pokemon in pokemon_list if pokemon.pokemon_id is pokemon_id]
-            if pokemon_evolve is None:
-                return
-            pokemon_evolve.sort(key=lambda p: p.combat_power, reverse=True)
+            pokemon_rows = pokemon_bag.sort_by_cp(pokemon_bag.get_species_rows(pokemon_id), reverse=True)
+            pokemon_evolve = pokemon_bag.get_pokemon(pokemon_rows)
 
             num_evolved = 0
             for pokemon in pokemon_evolve:
@@ -115,7 +115,7 @@ class BotEvents(object):
 
     def on_route_event(self, bot=None, route=None):
         if route is not None:
-            self.socketio.emit("route", route, namespace="/event")
+            self.socketio.emit("route", list(route), namespace="/event")
 
     def manual_destination_reached_event(self, bot=None):
         self.socketio.emit("manual_destination_reached")
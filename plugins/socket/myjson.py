@@ -1,14 +1,76 @@
-import jsonpickle
+import json
+
+from six import integer_types, string_types, text_type
+
+from api.json_encodable import JSONEncodable, get_fields
 
 # pylint: disable=unused-variable, unused-argument
 
-jsonpickle.remove_backend("demjson")
-jsonpickle.set_preferred_backend("json")
+# One serializer per class, built from its fields the first time an instance is sent.
+_serializers = {}
+_missing = object()
 
 
 def dumps(obj, **args):
-    return jsonpickle.encode(obj, unpicklable=False)
+    return json.dumps(encode(obj))
+
+
+def loads(json_string, **args):
+    return json.loads(json_string)
+
+
+# Turns obj into plain dicts, lists and values for the json module. Objects are sent the way jsonpickle sent them
+# with unpicklable=False: API objects through their state, the attributes with integers as strings so that 64 bit
+# ids survive JavaScript, and other objects through their attributes as they are.
+def encode(obj):
+    if obj is None or isinstance(obj, (float, string_types)):
+        return obj
+    elif isinstance(obj, integer_types):
+        return obj
+    elif isinstance(obj, bytes):
+        return obj.decode('utf-8', 'replace')
+    elif isinstance(obj, dict):
+        return dict((key if isinstance(key, string_types) else text_type(key), encode(value))
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        return [encode(value) for value in obj]
+
+    serializer = _serializers.get(type(obj), None)
+    if serializer is None:
+        serializer = _build_serializer(type(obj))
+        _serializers[type(obj)] = serializer
+    return serializer(obj)
+
+
+def _encode_state(value):
+    if isinstance(value, integer_types) and not isinstance(value, bool):
+        return text_type(value)
+    return encode(value)
+
+
+def _build_serializer(cls):
+    if issubclass(cls, JSONEncodable):
+        fields = get_fields(cls)
+
+        def serialize_fields(obj):
+            state = {}
+            for field in fields:
+                value = getattr(obj, field, _missing)
+                if value is not _missing:
+                    state[field] = _encode_state(value)
+            for field, value in getattr(obj, '__dict__', {}).items():
+                state[field] = _encode_state(value)
+            return state
+
+        return serialize_fields
+
+    elif hasattr(cls, 'to_json_encodable'):
+        return lambda obj: encode(obj.to_json_encodable())
 
+    def serialize_attributes(obj):
+        values = getattr(obj, '__dict__', None)
+        if values is None:
+            return text_type(obj)
+        return dict((field, encode(value)) for field, value in values.items())
 
-def loads(json, **args):
-    return jsonpickle.decode(json)
+    return serialize_attributes
@@ -0,0 +1,118 @@
+import json
+import unittest
+
+from api.pokemon import Pokemon
+from api.worldmap import Cell, PokeStop
+from plugins.socket import myjson
+
+
+class Destination(object):
+    def __init__(self):
+        self.target_lat = 51.5
+        self.target_lng = -0.07
+        self.steps = [(51.5, -0.07, 10)]
+        self.visits = 3
+        self.pokemon = Pokemon({"id": 5, "pokemon_id": 16})
+
+
+class MyJsonTest(unittest.TestCase):
+    @staticmethod
+    def _round_trip(obj):
+        return json.loads(myjson.dumps(obj))
+
+    def test_pokemon(self):
+        payload = self._round_trip(Pokemon({
+            "id": 8580527883465302527,
+            "pokemon_id": 16,
+            "cp": 10,
+            "cp_multiplier": 0.094,
+            "individual_attack": 15,
+            "favorite": 1,
+            "nickname": u"Pidgey"
+        }))
+
+        assert payload == {
+            "unique_id": "8580527883465302527",
+            "pokemon_id": "16",
+            "hp": "0",
+            "max_hp": "0",
+            "combat_power": "10",
+            "combat_power_multiplier": 0.094,
+            "additional_cp_multiplier": 0.0,
+            "attack": "15",
+            "defense": "0",
+            "stamina": "0",
+            "potential": 0.33,
+            "pokeball": "1",
+            "move_1": "0",
+            "move_2": "0",
+            "creation_time_ms": "0",
+            "captured_cell_id": "0",
+            "height": 0.0,
+            "weight": 0.0,
+            "origin": "0",
+            "favorite": True,
+            "nickname": "Pidgey",
+            "deployed_fort_id": None,
+            "from_fort": None
+        }
+
+    def test_pokestop(self):
+        payload = self._round_trip(self._create_pokestop())
+
+        assert payload == {
+            "fort_id": "stop_1",
+            "fort_name": "Tower Bridge",
+            "latitude": 51.5055,
+            "longitude": -0.0754,
+            "enabled": True,
+            "last_modified_timestamp_ms": "1470000000000",
+            "fort_type": "1",
+            "active_fort_modifier": None,
+            "cooldown_timestamp_ms": "1470000300000",
+            "lure_expires_timestamp_ms": None,
+            "lure_encounter_id": None,
+            "lure_pokemon_id": None,
+            "lure_fort_id": None
+        }
+
+    def test_cell(self):
+        cell = Cell({"s2_cell_id": 5221364418239004672})
+        cell.pokestops = [self._create_pokestop()]
+        cell.timestamp_ms = 1470000000000
+        payload = self._round_trip(cell)
+
+        assert payload == {
+            "spawn_points": [],
+            "gyms": [],
+            "pokestops": [self._round_trip(self._create_pokestop())],
+            "cell_id": "5221364418239004672",
+            "timestamp_ms": "1470000000000",
+            "catchable_pokemon": [],
+            "nearby_pokemon": [],
+            "wild_pokemon": []
+        }
+
+    def test_plain_object(self):
+        payload = self._round_trip(Destination())
+
+        # Numbers of other objects are left alone, the API objects in them still go through their state
+        assert payload == {
+            "target_lat": 51.5,
+            "target_lng": -0.07,
+            "steps": [[51.5, -0.07, 10]],
+            "visits": 3,
+            "pokemon": self._round_trip(Pokemon({"id": 5, "pokemon_id": 16}))
+        }
+        assert payload["pokemon"]["unique_id"] == "5"
+
+    @staticmethod
+    def _create_pokestop():
+        return PokeStop({
+            "id": "stop_1",
+            "name": u"Tower Bridge",
+            "latitude": 51.5055,
+            "longitude": -0.0754,
+            "last_modified_timestamp_ms": 1470000000000,
+            "cooldown_complete_timestamp_ms": 1470000300000
+        })
@@ -31,8 +31,11 @@ class UiEvents(object):
             self.bot.api_wrapper.get_player().get_inventory()
             inventory = self.bot.api_wrapper.call()
 
+            # Newest first, like the game lists them
+            pokemon_bag = inventory["pokemon_bag"]
             emit_object = {
-                "pokemon": inventory["pokemon"],
+                "pokemon": pokemon_bag.get_pokemon(pokemon_bag.sort_by_creation_time(range(len(pokemon_bag)),
+                                                                                     reverse=True)),
                 "candy": inventory["candy"],
                 "eggs_count": len(inventory["eggs"])
             }
@@ -82,9 +85,9 @@ class UiEvents(object):
 
             pkm_id = int(evt["id"])
 
-            all_pokemons = self.bot.api_wrapper.get_player().get_inventory().call()["pokemon"]
+            pokemon_bag = self.bot.api_wrapper.get_player().get_inventory().call()["pokemon_bag"]
 
-            pokemon = self._find(lambda p: p.unique_id == pkm_id, all_pokemons)
+            pokemon = pokemon_bag.find(pkm_id)
 
             if pokemon is not None:
                 self.bot.api_wrapper.release_pokemon(pokemon_id=int(evt["id"])).call()
@@ -105,9 +108,9 @@ class UiEvents(object):
 
             pkm_id = int(evt["id"])
 
-            all_pokemons = self.bot.api_wrapper.get_player().get_inventory().call()["pokemon"]
+            pokemon_bag = self.bot.api_wrapper.get_player().get_inventory().call()["pokemon_bag"]
 
-            pokemon = self._find(lambda p: p.unique_id == pkm_id, all_pokemons)
+            pokemon = pokemon_bag.find(pkm_id)
 
             if pokemon is not None:
                 response = self.bot.api_wrapper.evolve_pokemon(pokemon_id=int(evt["id"])).call()
@@ -142,10 +145,3 @@ class UiEvents(object):
 
     def log(self, text, color='yellow'):
         self.logger.log(text, color=color, fire_event=False, prefix='UI')
-
-    @staticmethod
-    def _find(f, seq):
-        for item in seq:
-            if f(item):
-                return item
-        return None
@@ -1,15 +1,18 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import print_function
-import time
 from math import ceil
 
 from app import Plugin
 from app import kernel
+from app.clock import clock
 from pokemongo_bot.human_behaviour import sleep
-from pokemongo_bot.utils import format_time, filtered_forts, distance, format_dist
+from pokemongo_bot.utils import format_time, filtered_forts, sorted_forts, distance, fast_distance, format_dist
 from api.worldmap import PokeStop
 
+# How close the bot has to be to a PokeStop to spin it, in meters
+SPIN_RANGE = 35
+
 
 @kernel.container.register('spin_pokestop', ['@event_manager', '@logger'], tags=['plugin'])
 class SpinPokestop(Plugin):
@@ -39,25 +42,36 @@ class SpinPokestop(Plugin):
         if pokestops is None:
             return
 
-        # If we're debugging, don't filter pokestops so we can test if they are on cooldown
+        # Only look at the PokeStops in reach, the map keeps its forts in a spatial index
+        worldmap = bot.mapper.worldmap
+        if worldmap is not None:
+            pokestops = [pokestop for _, pokestop in
+                         worldmap.get_forts_within(bot.stepper.current_lat, bot.stepper.current_lng, SPIN_RANGE,
+                                                   lambda fort: isinstance(fort, PokeStop))]
+
+        # If we're debugging, don't filter pokestops so we can test if they are on cooldown. Either way they
+        # come nearest first, so the first one out of reach ends the loop.
         if not bot.config["debug"]:
             pokestops = filtered_forts(bot.stepper.current_lat, bot.stepper.current_lng, pokestops)
+        else:
+            pokestops = sorted_forts(bot.stepper.current_lat, bot.stepper.current_lng, pokestops)
 
-        now = int(time.time()) * 1000
+        now = int(clock.time()) * 1000
         for pokestop in pokestops:
-            dist = distance(bot.stepper.current_lat, bot.stepper.current_lng, pokestop.latitude, pokestop.longitude)
-
-            if dist < 35:
-                if pokestop.is_in_cooldown() is False:
-                    self.event_manager.fire_with_context('pokestop_arrived', bot, pokestop=pokestop)
-                elif bot.config["debug"]:
-                    self.log(
-                        "Nearby fort found is in cooldown for {} ({}m away)".format(
-                            format_time((pokestop.cooldown_timestamp_ms - now) / 1000),
-                            ceil(dist)
-                        ),
-                        color="yellow"
-                    )
+            dist = fast_distance(bot.stepper.current_lat, bot.stepper.current_lng, pokestop.latitude, pokestop.longitude)
+            if dist >= SPIN_RANGE:
+                break
+
+            if pokestop.is_in_cooldown() is False:
+                self.event_manager.fire_with_context('pokestop_arrived', bot, pokestop=pokestop)
+            elif bot.config["debug"]:
+                self.log(
+                    "Nearby fort found is in cooldown for {} ({}m away)".format(
+                        format_time((pokestop.cooldown_timestamp_ms - now) / 1000),
+                        ceil(dist)
+                    ),
+                    color="yellow"
+                )
 
     def spin_pokestop(self, bot, pokestop=None):
         # type: (PokemonGoBot, Optional[List[Fort]]) -> None
@@ -128,7 +142,7 @@ class SpinPokestop(Plugin):
 
             pokestop_cooldown = spin_details.get("cooldown_complete_timestamp_ms")
             if pokestop_cooldown:
-                seconds_since_epoch = time.time()
+                seconds_since_epoch = clock.time()
                 cooldown_time = str(format_time((pokestop_cooldown / 1000) - seconds_since_epoch))
                 self.log("PokeStop is on cooldown for {}.".format(cooldown_time))
 
@@ -143,7 +157,7 @@ class SpinPokestop(Plugin):
             self.log("PokeStop is already on cooldown.", "red")
             pokestop_cooldown = spin_details.get("cooldown_complete_timestamp_ms")
             if pokestop_cooldown:
-                seconds_since_epoch = time.time()
+                seconds_since_epoch = clock.time()
                 cooldown_time = str(format_time((pokestop_cooldown / 1000) - seconds_since_epoch))
                 self.log("PokeStop is already on cooldown for {}.".format(cooldown_time), "red")
         elif spin_result == 4:
@@ -1,3 +1,4 @@
+from api.pokemon_bag import PokemonBag
 from app import Plugin
 from app import kernel
 from pokemongo_bot.human_behaviour import sleep
@@ -32,60 +33,61 @@ class TransferPokemon(Plugin):
     def transfer_on_bot_start(bot):
         bot.fire("pokemon_bag_full")
 
+    # The Pokemon to go through and the bag they come from. Without a list, that is the player's whole bag,
+    # which is then handed down the pipeline along with the filtered lists.
     @staticmethod
-    def get_transfer_list(bot, transfer_list=None):
+    def get_transfer_list(bot, transfer_list=None, pokemon_bag=None):
         if transfer_list is None:
-            transfer_list = bot.player_service.get_pokemon()
+            pokemon_bag = bot.player_service.get_pokemon_bag()
+            transfer_list = pokemon_bag.pokemon
 
-        return None if len(transfer_list) == 0 else transfer_list
+        return (None, None) if len(transfer_list) == 0 else (transfer_list, pokemon_bag)
 
-    def get_indexed_pokemon(self, bot, transfer_list=None):
-        transfer_list = self.get_transfer_list(bot, transfer_list)
-        if transfer_list is None:
-            return None
-
-        indexed_pokemon = dict()
-        for deck_pokemon in transfer_list:
-            pokemon_num = deck_pokemon.pokemon_id
-            if pokemon_num not in indexed_pokemon:
-                indexed_pokemon[pokemon_num] = list()
-            indexed_pokemon[pokemon_num].append(deck_pokemon)
-
-        return indexed_pokemon
+    # The rows of the Pokemon to go through in their bag. Pokemon that are not in the bag, like a caught
+    # one, get a bag of their own.
+    @staticmethod
+    def get_transfer_rows(transfer_list, pokemon_bag):
+        transfer_rows = None if pokemon_bag is None else pokemon_bag.get_rows(transfer_list)
+        if transfer_rows is None:
+            pokemon_bag = PokemonBag(transfer_list)
+            transfer_rows = list(range(len(transfer_list)))
+        return transfer_rows, pokemon_bag
 
     # Filters Pokemon deployed at gyms
     # Never disable as it might lead to a ban!
-    def filter_deployed_pokemon(self, bot, transfer_list=None, filter_list=None):
+    def filter_deployed_pokemon(self, bot, transfer_list=None, filter_list=None, pokemon_bag=None):
         # type: (PokemonGoBot, Optional[List[Pokemon]]), Optional[List[str]] -> Dict[Str, List]
 
         filter_list = [] if filter_list is None else filter_list
-        transfer_list = self.get_transfer_list(bot, transfer_list)
+        transfer_list, pokemon_bag = self.get_transfer_list(bot, transfer_list, pokemon_bag)
         if transfer_list is None:
             return False
 
-        new_transfer_list = [deck_pokemon for deck_pokemon in transfer_list if deck_pokemon.deployed_fort_id is None]
+        transfer_rows, pokemon_bag = self.get_transfer_rows(transfer_list, pokemon_bag)
+        new_transfer_list = pokemon_bag.get_pokemon(pokemon_bag.select_not_deployed(transfer_rows))
 
         if len(new_transfer_list) != len(transfer_list):
             filter_list.append("excluding Pokemon at gyms")
 
-        return {"transfer_list": new_transfer_list, "filter_list": filter_list}
+        return {"transfer_list": new_transfer_list, "filter_list": filter_list, "pokemon_bag": pokemon_bag}
 
     # Filters favorited Pokemon
     # Never disable as it might lead to a ban!
-    def filter_favorited_pokemon(self, bot, transfer_list=None, filter_list=None):
+    def filter_favorited_pokemon(self, bot, transfer_list=None, filter_list=None, pokemon_bag=None):
         # type: (PokemonGoBot, Optional[List[Pokemon]]), Optional[List[str]] -> Dict[Str, List]
 
         filter_list = [] if filter_list is None else filter_list
-        transfer_list = self.get_transfer_list(bot, transfer_list)
+        transfer_list, pokemon_bag = self.get_transfer_list(bot, transfer_list, pokemon_bag)
         if transfer_list is None:
             return False
 
-        new_transfer_list = [deck_pokemon for deck_pokemon in transfer_list if deck_pokemon.favorite is False]
+        transfer_rows, pokemon_bag = self.get_transfer_rows(transfer_list, pokemon_bag)
+        new_transfer_list = pokemon_bag.get_pokemon(pokemon_bag.select_not_favorite(transfer_rows))
 
         if len(new_transfer_list) != len(transfer_list):
             filter_list.append("excluding favorited Pokemon")
 
-        return {"transfer_list": new_transfer_list, "filter_list": filter_list}
+        return {"transfer_list": new_transfer_list, "filter_list": filter_list, "pokemon_bag": pokemon_bag}
 
     # Wraps a caught Pokemon into a list for transferring
     @staticmethod
@@ -100,14 +102,14 @@ class TransferPokemon(Plugin):
         return {"transfer_list": transfer_list}
 
     # Filters Pokemon based on ignore/always keep list
-    def filter_pokemon_by_ignore_list(self, bot, transfer_list=None, filter_list=None):
+    def filter_pokemon_by_ignore_list(self, bot, transfer_list=None, filter_list=None, pokemon_bag=None):
         # type: (PokemonGoBot, Optional[List[Pokemon]]), Optional[List[str]] -> Dict[Str, List]
 
         if self.config["use_always_keep_filter"] is False:
             return
 
         filter_list = [] if filter_list is None else filter_list
-        transfer_list = self.get_transfer_list(bot, transfer_list)
+        transfer_list, pokemon_bag = self.get_transfer_list(bot, transfer_list, pokemon_bag)
         if transfer_list is None:
             return False
 
@@ -131,10 +133,10 @@ class TransferPokemon(Plugin):
             else:
                 filter_list.append("excluding " + excluded_species.pop() + "s")
 
-        return {"transfer_list": new_transfer_list, "filter_list": filter_list}
+        return {"transfer_list": new_transfer_list, "filter_list": filter_list, "pokemon_bag": pokemon_bag}
 
     # TODO: Fix this function to use dependency injection for release rules
-    def filter_pokemon_by_cp_iv(self, bot, transfer_list=None, filter_list=None):
+    def filter_pokemon_by_cp_iv(self, bot, transfer_list=None, filter_list=None, pokemon_bag=None):
         # type: (PokemonGoBot, Optional[List[Pokemon]]), Optional[List[str]] -> Dict[Str, List]
 
         if self.config["use_cp_iv_filter"] is False:
@@ -143,63 +145,42 @@ class TransferPokemon(Plugin):
         filter_list = [] if filter_list is None else filter_list
         filter_list.append("according to per-species CP/IV rules")
 
-        transfer_list = self.get_transfer_list(bot, transfer_list)
+        transfer_list, pokemon_bag = self.get_transfer_list(bot, transfer_list, pokemon_bag)
         if transfer_list is None:
             return False
 
+        transfer_rows, pokemon_bag = self.get_transfer_rows(transfer_list, pokemon_bag)
+
         cp_iv_rules = self.config["cp_iv_rules"]
         default_rules = cp_iv_rules["default"]
 
-        indexed_pokemon = self.get_indexed_pokemon(bot, transfer_list)
-
-        pokemon_groups = list(indexed_pokemon.keys())
-        for pokemon_group in pokemon_groups:
+        new_transfer_rows = []
+        for pokemon_group, group_rows in pokemon_bag.group_by_species(transfer_rows).items():
 
             # skip if it's our only pokemon of this type
-            if len(indexed_pokemon[pokemon_group]) < 2:
-                del indexed_pokemon[pokemon_group]
+            if len(group_rows) < 2:
                 continue
 
             # Load rules for this group. If rule doesnt exist make one with default settings.
             pokemon_name = bot.pokemon_list[pokemon_group - 1]["Name"]
             pokemon_rules = cp_iv_rules.get(pokemon_name, default_rules)
-            cp_threshold = pokemon_rules['release_below_cp']
-            iv_threshold = pokemon_rules['release_below_iv']
-            rules_logic = pokemon_rules['logic']
-
-            # only keep everything below specified CP
-            group_transfer_list = []
-            for deck_pokemon in indexed_pokemon[pokemon_group]:
 
-                # is the Pokemon's CP less than our set threshold?
-                within_cp = (deck_pokemon.combat_power <= cp_threshold)
-
-                # is the Pokemon's IV less than our set threshold?
-                within_potential = (deck_pokemon.potential <= iv_threshold)
-
-                # if we are using AND logic and both are true, transfer
-                if rules_logic == 'and' and (within_cp and within_potential):
-                    group_transfer_list.append(deck_pokemon)
-
-                # if we are using OR logic and either is true, transfer
-                elif rules_logic == 'or' and (within_cp or within_potential):
-                    group_transfer_list.append(deck_pokemon)
+            # only keep everything below specified CP and/or IV
+            group_transfer_rows = pokemon_bag.select_below(group_rows,
+                                                           pokemon_rules['release_below_cp'],
+                                                           pokemon_rules['release_below_iv'],
+                                                           pokemon_rules['logic'])
 
             # Check if we are trying to remove all the pokemon in this group.
-            if len(group_transfer_list) == len(indexed_pokemon[pokemon_group]):
+            if len(group_transfer_rows) == len(group_rows):
                 # Sort by CP * potential and keep the best one
-                indexed_pokemon[pokemon_group].sort(key=lambda p: p.combat_power * p.potential)
-                indexed_pokemon[pokemon_group] = indexed_pokemon[pokemon_group][:-1]
-            else:
-                indexed_pokemon[pokemon_group] = group_transfer_list
+                group_transfer_rows = pokemon_bag.sort_by_score(group_rows)[:-1]
 
-        new_transfer_list = []
-        pokemon_groups = list(indexed_pokemon.keys())
-        for pokemon_group in pokemon_groups:
-            for deck_pokemon in indexed_pokemon[pokemon_group]:
-                new_transfer_list.append(deck_pokemon)
+            new_transfer_rows.extend(group_transfer_rows)
+
+        new_transfer_list = pokemon_bag.get_pokemon(new_transfer_rows)
 
-        return {"transfer_list": new_transfer_list, "filter_list": filter_list}
+        return {"transfer_list": new_transfer_list, "filter_list": filter_list, "pokemon_bag": pokemon_bag}
 
     def transfer_pokemon(self, bot, transfer_list=None, filter_list=None):
         # type: (PokemonGoBot, Optional[List[Pokemon]], Optional[List[str]]) -> None
@@ -3,6 +3,7 @@ import unittest
 from mock import Mock
 
 from api.pokemon import Pokemon
+from api.pokemon_bag import PokemonBag
 from plugins.transfer_pokemon import TransferPokemon
 from pokemongo_bot import EventManager
 from pokemongo_bot.tests import create_mock_bot
@@ -153,6 +154,96 @@ class TransferPokemonPluginTest(unittest.TestCase):
         self.set_empty_inventory(bot)
         assert transfer_plugin.filter_pokemon_by_ignore_list(bot=bot) is False
 
+    def test_cp_iv_filter(self):
+        event_manager = EventManager()
+        logger = Mock()
+        logger.log = Mock()
+        transfer_plugin = TransferPokemon(
+            {
+                'transfer_on_start': False,
+                'use_cp_iv_filter': True,
+                'cp_iv_rules': {
+                    'default': {
+                        'release_below_cp': 100,
+                        'release_below_iv': 0.5,
+                        'logic': 'and'
+                    },
+                    'Ivysaur': {
+                        'release_below_cp': 100,
+                        'release_below_iv': 0.5,
+                        'logic': 'or'
+                    }
+                }
+            },
+            event_manager,
+            logger
+        )
+
+        bot = create_mock_bot()
+
+        transfer_list = [self._create_pokemon(unique_id=1, species_id=1, cp=50, iv=0.2),
+                         self._create_pokemon(unique_id=2, species_id=2, cp=500, iv=0.2),
+                         self._create_pokemon(unique_id=3, species_id=1, cp=50, iv=0.9),
+                         self._create_pokemon(unique_id=4, species_id=3, cp=50, iv=0.2),
+                         self._create_pokemon(unique_id=5, species_id=2, cp=500, iv=0.9),
+                         self._create_pokemon(unique_id=6, species_id=1, cp=500, iv=0.2),
+                         self._create_pokemon(unique_id=7, species_id=4, cp=20, iv=0.2),
+                         self._create_pokemon(unique_id=8, species_id=4, cp=40, iv=0.2),
+                         self._create_pokemon(unique_id=9, species_id=4, cp=30, iv=0.2)]
+
+        result_dict = transfer_plugin.filter_pokemon_by_cp_iv(bot=bot, transfer_list=transfer_list)
+        filtered_list = result_dict["transfer_list"]
+        assert [pokemon.unique_id for pokemon in filtered_list] == [1, 2, 7, 9]
+        assert result_dict["filter_list"][0] == "according to per-species CP/IV rules"
+
+        self.set_empty_inventory(bot)
+        assert transfer_plugin.filter_pokemon_by_cp_iv(bot=bot) is False
+
+    def test_pokemon_bag_pipeline(self):
+        event_manager = EventManager()
+        logger = Mock()
+        logger.log = Mock()
+        transfer_plugin = TransferPokemon(
+            {
+                'transfer_on_start': False,
+                'use_cp_iv_filter': True,
+                'cp_iv_rules': {
+                    'default': {
+                        'release_below_cp': 100,
+                        'release_below_iv': 0.5,
+                        'logic': 'and'
+                    }
+                }
+            },
+            event_manager,
+            logger
+        )
+
+        bot = create_mock_bot()
+        pokemon_bag = PokemonBag([self._create_pokemon(unique_id=1, cp=50, iv=0.2, deployed=True),
+                                  self._create_pokemon(unique_id=2, cp=50, iv=0.2),
+                                  self._create_pokemon(unique_id=3, cp=50, iv=0.2, favorite=True),
+                                  self._create_pokemon(unique_id=4, cp=60, iv=0.2),
+                                  self._create_pokemon(unique_id=5, cp=500, iv=0.9)])
+        bot.player_service.get_pokemon_bag = Mock(return_value=pokemon_bag)
+
+        # The player's bag is fetched once and handed down with the filtered lists
+        result_dict = transfer_plugin.filter_deployed_pokemon(bot=bot)
+        assert result_dict["pokemon_bag"] is pokemon_bag
+        result_dict = transfer_plugin.filter_favorited_pokemon(bot=bot, **result_dict)
+        assert result_dict["pokemon_bag"] is pokemon_bag
+        result_dict = transfer_plugin.filter_pokemon_by_cp_iv(bot=bot, **result_dict)
+        assert result_dict["pokemon_bag"] is pokemon_bag
+
+        assert [pokemon.unique_id for pokemon in result_dict["transfer_list"]] == [2, 4]
+        assert bot.player_service.get_pokemon_bag.call_count == 1
+
+        # A caught Pokemon is not in the bag, it is checked on its own
+        caught_pokemon = self._create_pokemon(unique_id=6, cp=10, iv=0.1)
+        result_dict = transfer_plugin.filter_pokemon_by_cp_iv(bot=bot, transfer_list=[caught_pokemon],
+                                                              pokemon_bag=pokemon_bag)
+        assert result_dict["transfer_list"] == []
+
     @staticmethod
     def _create_pokemon(unique_id=0, species_id=1, cp=1.0, iv=1.0, favorite=False, deployed=False):
         return Pokemon({
@@ -35,6 +35,7 @@ import colorama
 
 # Disable HTTPS certificate verification
 from app import kernel
+from app.clock import Clock, clock
 from pokemongo_bot.bot import PokemonGoBot
 
 if sys.version_info >= (2, 7, 9):
@@ -72,6 +73,20 @@ def main():
     kernel.set_config_file(config_dir)
     kernel.boot()
 
+    core_config = kernel.get_config()['core']
+    clock_mode = core_config.get('clock', 'real')
+    replay_file = core_config.get('api', {}).get('replay_traffic', None)
+    if clock_mode != Clock.REAL and replay_file is None:
+        # The game servers only ever run on real time
+        print('The "{}" clock can only be used to replay a recorded session (api.replay_traffic).'.format(clock_mode))
+        exit(1)
+
+    clock_start = None
+    if clock_mode == Clock.SIMULATED:
+        # A replay picks up the time at which its recording started
+        clock_start = kernel.container.get('pgoapi').get_start_time()
+    clock.set_mode(clock_mode, core_config.get('clock_speed', 1), clock_start)
+
     try:
         bot = kernel.container.get('pokemongo_bot')
         bot.start()
@@ -83,6 +98,12 @@ def main():
         logger = kernel.container.get('logger')
         logger.log('[x] Exiting PokemonGo Bot', 'red')
 
+    finally:
+        # However the bot stops, the last position, the new paths and the map must make it to disk
+        kernel.container.get('location_store').flush()
+        kernel.container.get('path_cache').flush()
+        kernel.container.get('map_store').flush()
+
 
 if __name__ == '__main__':
     main()
@@ -12,8 +12,9 @@ from pokemongo_bot.logger import Logger
 from pokemongo_bot.mapper import Mapper
 from pokemongo_bot.stepper import Stepper
 from pokemongo_bot.navigation import CamperNavigator, FortNavigator, WaypointNavigator
-from pokemongo_bot.navigation.path_finder import DirectPathFinder, GooglePathFinder
+from pokemongo_bot.navigation.path_finder import DirectPathFinder, GooglePathFinder, OsmPathFinder
 from pokemongo_bot.service import Player, Pokemon
+from api.replay import ReplayApi
 
 
 @kernel.container.register_compiler_pass()
@@ -28,11 +29,18 @@ def boot(service_container):
     service_container.set_parameter('pogoapi.username', config['login']['username'])
     service_container.set_parameter('pogoapi.password', config['login']['password'])
     service_container.set_parameter('pogoapi.shared_lib', config['load_library'])
+    service_container.set_parameter('pogoapi.coalesce_window', config.get('api', {}).get('coalesce_window', None))
+    service_container.set_parameter('pogoapi.auth_refresh_margin', config.get('api', {}).get('auth_refresh_margin', 300))
+    service_container.set_parameter('pogoapi.state_ttl', config.get('api', {}).get('state_ttl', None))
 
-    service_container.register_singleton('pgoapi', PGoApi())
+    replay_file = config.get('api', {}).get('replay_traffic', None)
+    if replay_file is not None:
+        service_container.register_singleton('pgoapi', ReplayApi(replay_file))
+    else:
+        service_container.register_singleton('pgoapi', PGoApi())
     service_container.register_singleton('google_maps', googlemaps.Client(key=config["mapping"]["gmapkey"]))
 
-    if config['movement']['path_finder'] in ['google', 'direct']:
+    if config['movement']['path_finder'] in ['google', 'direct', 'osm']:
         service_container.set_parameter('path_finder', config['movement']['path_finder'] + '_path_finder')
     else:
         raise Exception('You must provide a valid path finder')
@@ -8,12 +8,14 @@ import sys
 import time
 
 from app import kernel
+from app.clock import clock
 from pokemongo_bot.navigation.path_finder import DirectPathFinder, GooglePathFinder
 from pokemongo_bot.service import Player, Pokemon
 from pokemongo_bot.utils import filtered_forts, distance
 from pokemongo_bot.human_behaviour import sleep
 from pokemongo_bot.item_list import Item
 from pokemongo_bot.mapper import Mapper
+from pokemongo_bot.scan_scheduler import ScanScheduler
 from pokemongo_bot.stepper import Stepper
 from pokemongo_bot.event_manager import EventManager
 from pokemongo_bot.navigation import CamperNavigator, FortNavigator, WaypointNavigator
@@ -24,12 +26,12 @@ from api.encounter import Encounter
 # from api.pokemon import Pokemon
 # from api.worldmap import Cell
 
-@kernel.container.register('pokemongo_bot', ['@config.core', '@api_wrapper', '@player_service', '@pokemon_service', '@event_manager', '@mapper', '@stepper', '%navigator%', '@logger'])
+@kernel.container.register('pokemongo_bot', ['@config.core', '@api_wrapper', '@player_service', '@pokemon_service', '@event_manager', '@mapper', '@stepper', '%navigator%', '@logger', '@location_store', '@scan_scheduler'])
 class PokemonGoBot(object):
     process_ignored_pokemon = False
 
-    def __init__(self, config, api_wrapper, player_service, pokemon_service, event_manager, mapper, stepper, navigator, logger):
-        # type: (Namespace, PoGoApi, Player, Pokemon, EventManager, Mapper, Stepper, Navigator, Logger) -> None
+    def __init__(self, config, api_wrapper, player_service, pokemon_service, event_manager, mapper, stepper, navigator, logger, location_store=None, scan_scheduler=None):
+        # type: (Namespace, PoGoApi, Player, Pokemon, EventManager, Mapper, Stepper, Navigator, Logger, Optional[LocationStore], Optional[ScanScheduler]) -> None
         self.config = config
         self.api_wrapper = api_wrapper
         self.player_service = player_service
@@ -39,6 +41,10 @@ class PokemonGoBot(object):
         self.stepper = stepper
         self.navigator = navigator
         self.logger = logger
+        self.location_store = mapper.location_store if location_store is None else location_store
+        self.scan_scheduler = ScanScheduler(config) if scan_scheduler is None else scan_scheduler
+        self.map_cells = []
+        self.map_preloaded = False
 
         self.pokemon_list = json.load(open('data/pokemon.json'))
         self.item_list = {}
@@ -59,6 +65,11 @@ class PokemonGoBot(object):
         self._setup_api()
         random.seed()
 
+        self.map_cells = self.mapper.load_map(self.position[0], self.position[1])
+        if len(self.map_cells) > 0:
+            self.map_preloaded = True
+            self.logger.log('[x] Loaded {} map cells around the starting position'.format(len(self.map_cells)))
+
         self.stepper.start(*self.position)
 
         self.player_service.print_stats()
@@ -91,20 +102,22 @@ class PokemonGoBot(object):
         while not self.player_service.login():
             self.logger.log('Login Error, server busy', color='red')
             self.logger.log('Waiting 15 seconds before trying again...')
-            time.sleep(15)
+            clock.sleep(15)
 
         self.logger.log('[+] Login to Pokemon Go successful.', color='green')
 
     def run(self):
-        map_cells = self.mapper.get_cells(
-            self.stepper.current_lat,
-            self.stepper.current_lng
-        )
+        # The cells loaded at start are walked first, they are scanned on the way
+        if self.map_preloaded:
+            self.map_preloaded = False
+            scanned = False
+        else:
+            scanned = self.update_map_cells()
 
         # Work on all the initial cells
-        self.work_on_cells(map_cells)
+        self.work_on_cells(self.map_cells, include_pokemon=scanned)
 
-        for destination in self.navigator.navigate(map_cells):
+        for destination in self.navigator.navigate(self.map_cells):
             position_lat = self.stepper.current_lat
             position_lng = self.stepper.current_lng
 
@@ -134,12 +147,8 @@ class PokemonGoBot(object):
                 self.fire("position_updated", coordinates=step)
                 self.player_service.heartbeat()
 
-                self.work_on_cells(
-                    self.mapper.get_cells(
-                        self.stepper.current_lat,
-                        self.stepper.current_lng
-                    )
-                )
+                scanned = self.update_map_cells()
+                self.work_on_cells(self.map_cells, include_pokemon=scanned)
 
                 if self.break_nav:
                     self.break_nav = False
@@ -148,17 +157,37 @@ class PokemonGoBot(object):
             self.fire("walking_finished",
                       coords=(destination.target_lat, destination.target_lng, destination.target_alt))
 
-    def work_on_cells(self, map_cells):
-        # type: (Cell, bool) -> None
+    # Fetch the map objects around the player when the scan scheduler says so. Returns whether map_cells was
+    # updated; in between scans, or when a scan fails, the bot keeps working on the cells it has.
+    def update_map_cells(self):
+        # type: () -> bool
+        position_lat = self.stepper.current_lat
+        position_lng = self.stepper.current_lng
+
+        if not self.scan_scheduler.is_scan_due(position_lat, position_lng):
+            return False
+
+        map_cells = self.mapper.get_cells(position_lat, position_lng, max_age=0)
+        self.scan_scheduler.record_scan(position_lat, position_lng)
+        if len(map_cells) == 0:
+            return False
+
+        self.map_cells = map_cells
+        return True
+
+    # Pokemon are left out for cells that were already worked on, they have been encountered then
+    def work_on_cells(self, map_cells, include_pokemon=True):
+        # type: (List[Cell], bool) -> None
         encounters = []
         pokestops = []
         for cell in map_cells:
-            encounters += cell.catchable_pokemon + cell.wild_pokemon
+            if include_pokemon:
+                encounters += cell.catchable_pokemon + cell.wild_pokemon
             pokestops += cell.pokestops
 
         lure_encounters = []
         for fort in pokestops:
-            if fort.lure_encounter_id is not None:
+            if include_pokemon and fort.lure_encounter_id is not None:
                 lure_encounters.append({
                     "encounter_id": fort.lure_encounter_id,
                     "latitude": fort.latitude,
@@ -180,25 +209,22 @@ class PokemonGoBot(object):
 
     def _set_starting_position(self):
         if self.config["mapping"]["location_cache"]:
-            try:
-                #
-                # save location flag used to pull the last known location from
-                # the location.json
-                with open('data/last-location-%s.json' % self.config["login"]["username"]) as last_location_file:
-                    location_json = json.load(last_location_file)
-
-                    self.position = (location_json['lat'], location_json['lng'], 0.0)
-                    self.api_wrapper.set_position(*self.position)
-
-                    self.logger.log('')
-                    self.logger.log('[x] Last location flag used. Overriding passed in location')
-                    self.logger.log('[x] Last in-game location was set as: {}'.format(self.position))
-                    self.logger.log('')
+            #
+            # save location flag used to pull the last known location from
+            # the location.json
+            location = self.location_store.load()
+            if location is not None:
+                self.position = (location[0], location[1], 0.0)
+                self.api_wrapper.set_position(*self.position)
+
+                self.logger.log('')
+                self.logger.log('[x] Last location flag used. Overriding passed in location')
+                self.logger.log('[x] Last in-game location was set as: {}'.format(self.position))
+                self.logger.log('')
 
-                    return
-            except IOError:
-                if not self.config["mapping"]["location"]:
-                    sys.exit("No cached Location. Please specify initial location.")
+                return
+            elif not self.config["mapping"]["location"]:
+                sys.exit("No cached Location. Please specify initial location.")
 
         # Fallback to location in configuration
         self.position = self.mapper.find_location(self.config["mapping"]["location"])
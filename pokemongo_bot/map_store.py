@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+import json
+import math
+import sqlite3
+import threading
+
+from six.moves import queue  # type: ignore
+from s2sphere import CellId  # type: ignore
+
+from app import kernel
+from api.geo import METERS_PER_DEGREE
+from api.worldmap import Cell, Gym, PokeStop
+
+# S2 cell ids use all 64 bits, SQLite integers are signed
+_INT64_RANGE = 1 << 64
+_INT64_MAX = (1 << 63) - 1
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS cells (cell_id INTEGER PRIMARY KEY, timestamp_ms INTEGER, "
+    "latitude REAL, longitude REAL)",
+    "CREATE INDEX IF NOT EXISTS cells_position ON cells (latitude, longitude)",
+    "CREATE TABLE IF NOT EXISTS forts (fort_id TEXT PRIMARY KEY, cell_id INTEGER, fort_type INTEGER, "
+    "latitude REAL, longitude REAL, data TEXT)",
+    "CREATE INDEX IF NOT EXISTS forts_cell ON forts (cell_id)",
+    "CREATE INDEX IF NOT EXISTS forts_position ON forts (latitude, longitude)",
+    "CREATE TABLE IF NOT EXISTS spawn_points (cell_id INTEGER, latitude REAL, longitude REAL, "
+    "PRIMARY KEY (latitude, longitude))",
+    "CREATE INDEX IF NOT EXISTS spawn_points_cell ON spawn_points (cell_id)"
+]
+
+
+def _to_signed(cell_id):
+    # type: (int) -> int
+    return cell_id - _INT64_RANGE if cell_id > _INT64_MAX else cell_id
+
+
+def _from_signed(cell_id):
+    # type: (int) -> int
+    return cell_id + _INT64_RANGE if cell_id < 0 else cell_id
+
+
+def _get_fort_data(fort):
+    # type: (Fort) -> Dict
+    fort_name = fort.fort_name
+    if isinstance(fort_name, bytes):
+        fort_name = fort_name.decode('ascii', 'replace')
+
+    data = {
+        "id": fort.fort_id,
+        "name": fort_name,
+        "latitude": fort.latitude,
+        "longitude": fort.longitude,
+        "enabled": fort.enabled,
+        "last_modified_timestamp_ms": fort.last_modified_timestamp_ms,
+        "type": fort.fort_type
+    }
+    if isinstance(fort, PokeStop):
+        data["cooldown_complete_timestamp_ms"] = fort.cooldown_timestamp_ms
+    elif isinstance(fort, Gym):
+        data["guard_pokemon_id"] = fort.guard_pokemon_id
+        data["owned_by_team"] = fort.owned_by_team
+        data["gym_points"] = fort.gym_points
+        data["is_in_battle"] = 1 if fort.is_in_battle else 0
+    return data
+
+
+@kernel.container.register('map_store', ['@config.core', '@logger'])
+class MapStore(object):
+    """
+        Keeps the forts, spawn points and cell timestamps seen by the bot in an SQLite database
+        (mapping.map_database), so that a new session can start with the map of the area instead of an
+        empty one. Cells are indexed by their id and their center, forts and spawn points by cell and position.
+        Cells are written by a background thread so that the bot does not wait for the disk after every scan.
+    """
+
+    def __init__(self, config, logger):
+        self.logger = logger
+        self.filename = config["mapping"].get("map_database", None)
+        self._connection = None
+        self._lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def is_enabled(self):
+        # type: () -> bool
+        return bool(self.filename)
+
+    def _connect(self):
+        if self._connection is None:
+            # Shared with the writer thread, every use holds the lock
+            self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+            with self._connection:
+                for statement in _SCHEMA:
+                    self._connection.execute(statement)
+        return self._connection
+
+    def close(self):
+        # type: () -> None
+        self.flush()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    # Replace what is stored about these cells in the background.
+    def save_cells(self, cells):
+        # type: (List[Cell]) -> None
+        if not self.is_enabled() or len(cells) == 0:
+            return
+
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop)
+            self._writer.daemon = True
+            self._writer.start()
+        self._queue.put(list(cells))
+
+    # Block until every saved cell has been written.
+    def flush(self):
+        # type: () -> None
+        if self._writer is not None:
+            self._queue.join()
+
+    def _write_loop(self):
+        while True:
+            batches = [self._queue.get()]
+
+            # Scans that piled up while we were busy are written together, only the latest of a cell counts
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            cells = {}
+            for batch in batches:
+                for cell in batch:
+                    cells[cell.cell_id] = cell
+
+            try:
+                with self._lock:
+                    self._write_cells(list(cells.values()))
+            finally:
+                for _ in batches:
+                    self._queue.task_done()
+
+    # Replace what is stored about these cells, all in one transaction.
+    def _write_cells(self, cells):
+        # type: (List[Cell]) -> None
+        try:
+            connection = self._connect()
+            with connection:
+                for cell in cells:
+                    cell_id = _to_signed(cell.cell_id)
+                    center = CellId(cell.cell_id).to_lat_lng()
+                    connection.execute("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?)",
+                                       (cell_id, cell.timestamp_ms, center.lat().degrees, center.lng().degrees))
+
+                    connection.execute("DELETE FROM forts WHERE cell_id = ?", (cell_id,))
+                    connection.executemany("INSERT OR REPLACE INTO forts VALUES (?, ?, ?, ?, ?, ?)", [
+                        (fort.fort_id, cell_id, fort.fort_type, fort.latitude, fort.longitude,
+                         json.dumps(_get_fort_data(fort)))
+                        for fort in cell.pokestops + cell.gyms
+                    ])
+
+                    connection.execute("DELETE FROM spawn_points WHERE cell_id = ?", (cell_id,))
+                    connection.executemany("INSERT OR REPLACE INTO spawn_points VALUES (?, ?, ?)", [
+                        (cell_id, latitude, longitude) for latitude, longitude in cell.spawn_points
+                    ])
+        except sqlite3.Error as error:
+            self._log('Failed to save the map: {}'.format(error), color='red')
+
+    # The stored cells whose center is within radius meters (roughly, as a box) of the position.
+    def load_cells(self, lat, lng, radius):
+        # type: (float, float, float) -> List[Cell]
+        with self._lock:
+            return self._read_cells(lat, lng, radius)
+
+    def _read_cells(self, lat, lng, radius):
+        # type: (float, float, float) -> List[Cell]
+        if not self.is_enabled():
+            return []
+
+        lat_span = float(radius) / METERS_PER_DEGREE
+        lng_span = lat_span / max(math.cos(math.radians(lat)), 1e-6)
+
+        try:
+            connection = self._connect()
+            rows = connection.execute(
+                "SELECT cell_id, timestamp_ms FROM cells WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+                (lat - lat_span, lat + lat_span, lng - lng_span, lng + lng_span)).fetchall()
+
+            cells = []
+            for cell_id, timestamp_ms in rows:
+                forts = [json.loads(data) for (data,) in
+                         connection.execute("SELECT data FROM forts WHERE cell_id = ?", (cell_id,))]
+                spawn_points = [{"latitude": latitude, "longitude": longitude} for latitude, longitude in
+                                connection.execute("SELECT latitude, longitude FROM spawn_points WHERE cell_id = ?",
+                                                   (cell_id,))]
+                cells.append(Cell({
+                    "s2_cell_id": _from_signed(cell_id),
+                    "current_timestamp_ms": timestamp_ms,
+                    "spawn_points": spawn_points,
+                    "forts": forts
+                }))
+            return cells
+        except sqlite3.Error as error:
+            self._log('Failed to load the map: {}'.format(error), color='red')
+            return []
+
+    def _log(self, text, color='black'):
+        self.logger.log(text, color=color, prefix='Map')
@@ -1,53 +1,80 @@
 # -*- coding: utf-8 -*-
 
-import json
+from collections import OrderedDict
 
 from googlemaps.exceptions import ApiError
 from s2sphere import CellId, LatLng  # type: ignore
 from pgoapi.utilities import get_cell_ids
 
 from app import kernel
-from pokemongo_bot.utils import distance
+from pokemongo_bot.map_store import MapStore
+from pokemongo_bot.service.location_store import LocationStore
+from pokemongo_bot.utils import fast_distance
 
+# pgoapi walks the cell ids around the level 15 cell that contains the position, so every position inside the
+# same level 15 cell gets the same covering for a given radius.
+COVERING_LEVEL = 15
 
-@kernel.container.register('mapper', ['@config.core', '@api_wrapper', '@google_maps', '@logger'])
+
+@kernel.container.register('mapper', ['@config.core', '@api_wrapper', '@google_maps', '@logger', '@location_store',
+                                       '@map_store'])
 class Mapper(object):
-    def __init__(self, config, api_wrapper, google_maps, logger):
-        # type: (Namespace, PoGoApi, Client) -> None
+    def __init__(self, config, api_wrapper, google_maps, logger, location_store=None, map_store=None):
+        # type: (Namespace, PoGoApi, Client, Logger, Optional[LocationStore], Optional[MapStore]) -> None
         self.config = config
         self.api_wrapper = api_wrapper
         self.google_maps = google_maps
         self.logger = logger
+        self.location_store = LocationStore(config, logger) if location_store is None else location_store
+        self.map_store = map_store
+        self.worldmap = None
 
-    def get_cells(self, lat, lng):
-        # type: (float, float) -> List[Cell]
+        self.covering_cache_size = self.config['mapping'].get('covering_cache_size', 128)
+        self.covering_hits = 0
+        self.covering_misses = 0
+        self._coverings = OrderedDict()
+
+    def get_cells(self, lat, lng, max_age=None):
+        # type: (float, float, Optional[float]) -> List[Cell]
         cell_id = self._get_cell_id_from_latlong(
             self.config['mapping']['cell_radius']
         )
-        timestamp = [0, ] * len(cell_id)
+        # since_timestamp_ms is filled in from the cells we already know about
         self.api_wrapper.get_map_objects(latitude=lat,
                                          longitude=lng,
-                                         since_timestamp_ms=timestamp,
                                          cell_id=cell_id)
 
-        response_dict = self.api_wrapper.call()
+        response_dict = self.api_wrapper.call(max_age=max_age)
         if response_dict is None:
             return []
 
         # Passing data through last-location and location
         map_objects = response_dict["worldmap"]
+        self.worldmap = map_objects
+        map_objects.evict_cells(lat, lng, self.config['mapping'].get('cell_eviction_radius', 2000))
 
-        with open("data/last-location-{}.json".format(self.config["login"]["username"]), "w") as outfile:
-            outfile.truncate()
-            json.dump({"lat": lat, "lng": lng}, outfile)
+        self.location_store.save(lat, lng)
 
         map_cells = map_objects.cells
+        if self.map_store is not None:
+            self.map_store.save_cells(map_cells)
         # Sort all by distance from current pos - eventually this should build graph and A* it
-        map_cells.sort(key=lambda x: distance(lat, lng, x.pokestops[0].latitude, x.pokestops[0].longitude) if len(
+        map_cells.sort(key=lambda x: fast_distance(lat, lng, x.pokestops[0].latitude, x.pokestops[0].longitude) if len(
             x.pokestops) > 0 else 1e6)
 
         return map_cells
 
+    # Fill the map with the stored cells around the position, before the first scan. Returns the cells.
+    def load_map(self, lat, lng):
+        # type: (float, float) -> List[Cell]
+        if self.map_store is None:
+            return []
+
+        map_cells = self.map_store.load_cells(lat, lng, self.config['mapping'].get('cell_eviction_radius', 2000))
+        self.worldmap = self.api_wrapper.get_worldmap()
+        self.worldmap.add_cells(map_cells)
+        return map_cells
+
     def find_location(self, location):
         # type: (str) -> Tuple[float, float, float]
 
@@ -79,18 +106,39 @@ class Mapper(object):
     def _log(self, text, color='black'):
         self.logger.log(text, color=color, prefix='Mapper')
 
+    def get_covering_stats(self):
+        # type: () -> Dict[str, int]
+        return {
+            "hits": self.covering_hits,
+            "misses": self.covering_misses,
+            "size": len(self._coverings)
+        }
+
     def _get_cell_id_from_latlong(self, radius=1000):
         # type: (Optional[int]) -> List[str]
         position_lat, position_lng, _ = self.api_wrapper.get_position()
 
-        cells = get_cell_ids(position_lat, position_lng, radius)
-
-        if self.config['debug']:
-            self._log('Cells:', color='yellow')
-            self._log('Origin: {},{}'.format(position_lat, position_lng), color='yellow')
-            for cell in cells:
-                cell_id = CellId(cell)
-                lat_lng = cell_id.to_lat_lng()
-                self._log('Cell  : {},{}'.format(lat_lng.lat().degrees, lat_lng.lng().degrees), color='yellow')
-
-        return cells
+        origin = CellId.from_lat_lng(LatLng.from_degrees(position_lat, position_lng)).parent(COVERING_LEVEL)
+        key = (origin.id(), radius)
+
+        # Least recently used coverings are at the front
+        cells = self._coverings.pop(key, None)
+        if cells is None:
+            self.covering_misses += 1
+            cells = tuple(get_cell_ids(position_lat, position_lng, radius))
+            while len(self._coverings) >= max(self.covering_cache_size, 1):
+                self._coverings.popitem(last=False)
+
+            if self.config['debug']:
+                self._log('Cells:', color='yellow')
+                self._log('Origin: {},{}'.format(position_lat, position_lng), color='yellow')
+                for cell in cells:
+                    cell_id = CellId(cell)
+                    lat_lng = cell_id.to_lat_lng()
+                    self._log('Cell  : {},{}'.format(lat_lng.lat().degrees, lat_lng.lng().degrees), color='yellow')
+        else:
+            self.covering_hits += 1
+
+        self._coverings[key] = cells
+
+        return list(cells)
@@ -1,7 +1,7 @@
 from app import kernel
 from pokemongo_bot.navigation.destination import Destination
 from pokemongo_bot.navigation.navigator import Navigator
-from pokemongo_bot.utils import distance
+from pokemongo_bot.utils import nearest_forts
 
 
 @kernel.container.register('fort_navigator', ['@config.core', '@api_wrapper'])
@@ -10,14 +10,13 @@ class FortNavigator(Navigator):
         # type: (List[Cell]) -> List([Destination])
 
         for cell in map_cells:
-            pokestops = [pokestop for pokestop in cell.pokestops if
-                         pokestop.latitude is not None and pokestop.longitude is not None]
             # gyms = [gym for gym in cell['forts'] if 'gym_points' in gym]
 
-            # Sort all by distance from current pos- eventually this should
+            # Nearest first from current pos - eventually this should
             # build graph & A* it
             current_lat, current_lng, _ = self.api_wrapper.get_position()
-            pokestops.sort(key=lambda x, lat=current_lat, lng=current_lng: distance(lat, lng, x.latitude, x.longitude))
+            pokestops = nearest_forts(current_lat, current_lng, cell.pokestops,
+                                      lambda x: x.latitude is not None and x.longitude is not None)
 
             for fort in pokestops:
 
@@ -2,3 +2,5 @@
 
 from pokemongo_bot.navigation.path_finder.google_path_finder import GooglePathFinder
 from pokemongo_bot.navigation.path_finder.direct_path_finder import DirectPathFinder
+from pokemongo_bot.navigation.path_finder.osm_path_finder import OsmPathFinder
+from pokemongo_bot.navigation.path_finder.path_cache import PathCache
@@ -0,0 +1,233 @@
+import heapq
+import os
+import pickle
+from array import array
+from xml.etree import ElementTree
+
+from app import kernel
+from api.geo import get_distance
+from api.spatial_index import SpatialIndex
+from pokemongo_bot.navigation.path_finder.path_finder import PathFinder
+
+PICKLE_PROTOCOL = 2
+
+# Bump when the cached graph layout changes, older caches are then rebuilt
+GRAPH_VERSION = 1
+
+# Highways nobody can walk along
+NON_WALKABLE_HIGHWAYS = frozenset(["motorway", "motorway_link", "trunk", "trunk_link", "construction", "proposed",
+                                   "raceway", "bus_guideway", "escape"])
+
+
+def _is_walkable(tags):
+    # type: (Dict[str, str]) -> bool
+    highway = tags.get("highway", None)
+    if highway is None or highway in NON_WALKABLE_HIGHWAYS or tags.get("area", None) == "yes":
+        return False
+    if tags.get("foot", None) in ("no", "private"):
+        return False
+    return tags.get("access", None) not in ("no", "private") or tags.get("foot", None) in ("yes", "designated")
+
+
+class WalkingGraph(object):
+    """
+        The walkable ways of an OpenStreetMap extract. Nodes are numbered from 0 and their coordinates kept in
+        arrays, the edges of node i are neighbours[offsets[i]:offsets[i + 1]] with their length in meters at
+        the same positions in lengths.
+    """
+
+    def __init__(self, latitudes, longitudes, offsets, neighbours, lengths):
+        # type: (array, array, array, array, array) -> None
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.lengths = lengths
+
+        self._index = None
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    @staticmethod
+    def from_osm(filename):
+        # type: (str) -> WalkingGraph
+        positions = {}
+        ways = []
+
+        # Nodes come before the ways in an extract, elements are cleared once read to keep memory flat
+        context = ElementTree.iterparse(filename, events=("start", "end"))
+        _, root = next(context)
+        for event, element in context:
+            if event != "end":
+                continue
+            if element.tag == "node":
+                positions[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+            elif element.tag == "way":
+                tags = dict((tag.get("k"), tag.get("v")) for tag in element.iter("tag"))
+                if _is_walkable(tags):
+                    ways.append([int(node.get("ref")) for node in element.iter("nd")])
+            elif element.tag != "relation":
+                continue
+            root.clear()
+
+        # Only keep the nodes the walkable ways go through
+        node_numbers = {}
+        latitudes = array("d")
+        longitudes = array("d")
+        edges = []
+        for way in ways:
+            way = [node_id for node_id in way if node_id in positions]
+            for node_id in way:
+                if node_id not in node_numbers:
+                    node_numbers[node_id] = len(latitudes)
+                    lat, lng = positions[node_id]
+                    latitudes.append(lat)
+                    longitudes.append(lng)
+                    edges.append({})
+
+            for from_id, to_id in zip(way, way[1:]):
+                from_node, to_node = node_numbers[from_id], node_numbers[to_id]
+                if from_node == to_node:
+                    continue
+                length = get_distance(latitudes[from_node], longitudes[from_node],
+                                      latitudes[to_node], longitudes[to_node])
+                edges[from_node][to_node] = length
+                edges[to_node][from_node] = length
+
+        offsets = array("l", [0])
+        neighbours = array("l")
+        lengths = array("d")
+        for node_edges in edges:
+            for to_node in sorted(node_edges):
+                neighbours.append(to_node)
+                lengths.append(node_edges[to_node])
+            offsets.append(len(neighbours))
+
+        return WalkingGraph(latitudes, longitudes, offsets, neighbours, lengths)
+
+    # The graph of the extract, from cache_filename if it was built from this version of the extract.
+    @staticmethod
+    def load(filename, cache_filename=None):
+        # type: (str, Optional[str]) -> WalkingGraph
+        source = os.stat(filename)
+        source_key = (GRAPH_VERSION, source.st_size, int(source.st_mtime))
+
+        if cache_filename is not None and os.path.isfile(cache_filename):
+            try:
+                with open(cache_filename, "rb") as cache_file:
+                    cached = pickle.load(cache_file)
+                if cached["source"] == source_key:
+                    return WalkingGraph(*cached["graph"])
+            except (IOError, OSError, EOFError, ValueError, KeyError, TypeError, pickle.UnpicklingError):
+                pass
+
+        graph = WalkingGraph.from_osm(filename)
+        if cache_filename is not None:
+            try:
+                with open(cache_filename, "wb") as cache_file:
+                    pickle.dump({
+                        "source": source_key,
+                        "graph": (graph.latitudes, graph.longitudes, graph.offsets, graph.neighbours, graph.lengths)
+                    }, cache_file, PICKLE_PROTOCOL)
+            except (IOError, OSError, pickle.PicklingError):
+                pass
+        return graph
+
+    def get_position(self, node):
+        # type: (int) -> Tuple[float, float]
+        return self.latitudes[node], self.longitudes[node]
+
+    # The node closest to the position, if there is one within max_distance meters.
+    def get_nearest_node(self, lat, lng, max_distance):
+        # type: (float, float, float) -> Optional[int]
+        if self._index is None:
+            self._index = SpatialIndex()
+            for node in range(len(self)):
+                self._index.add(node, self.latitudes[node], self.longitudes[node], node)
+
+        nearest = self._index.nearest(lat, lng, 1)
+        if len(nearest) == 0 or nearest[0][0] > max_distance:
+            return None
+        return nearest[0][1]
+
+    # The nodes along the shortest walk from start to goal with A*, or None if goal can't be reached.
+    def find_path(self, start, goal):
+        # type: (int, int) -> Optional[List[int]]
+        goal_lat, goal_lng = self.get_position(goal)
+        latitudes, longitudes = self.latitudes, self.longitudes
+        offsets, neighbours, lengths = self.offsets, self.neighbours, self.lengths
+
+        walked = {start: 0.0}
+        came_from = {start: None}
+        done = set()
+        queue = [(get_distance(latitudes[start], longitudes[start], goal_lat, goal_lng), start)]
+        while len(queue) > 0:
+            _, node = heapq.heappop(queue)
+            if node == goal:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = came_from[node]
+                path.reverse()
+                return path
+            if node in done:
+                continue
+            done.add(node)
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = neighbours[edge]
+                distance = walked[node] + lengths[edge]
+                if neighbour not in walked or distance < walked[neighbour]:
+                    walked[neighbour] = distance
+                    came_from[neighbour] = node
+                    estimate = get_distance(latitudes[neighbour], longitudes[neighbour], goal_lat, goal_lng)
+                    heapq.heappush(queue, (distance + estimate, neighbour))
+        return None
+
+
+@kernel.container.register('osm_path_finder', ['@config.core'])
+class OsmPathFinder(PathFinder):
+    """
+        Finds walking paths on a local OpenStreetMap extract (movement.osm_file) with A*, without any network
+        request. The graph is built from the extract once and then loaded from movement.osm_graph_cache,
+        which is rebuilt when the extract changes. Positions more than osm_snap_distance meters from any
+        walkable way are walked to directly.
+    """
+
+    def __init__(self, config):
+        super(OsmPathFinder, self).__init__(config)
+
+        movement_config = config["movement"]
+        self.filename = movement_config.get("osm_file", None)
+        self.cache_filename = movement_config.get("osm_graph_cache", None)
+        if self.cache_filename is None and self.filename is not None:
+            self.cache_filename = self.filename + ".graph"
+        self.snap_distance = movement_config.get("osm_snap_distance", 100)
+
+        self._graph = None
+
+    def get_graph(self):
+        # type: () -> WalkingGraph
+        if self._graph is None:
+            if self.filename is None:
+                raise Exception('You must provide an OpenStreetMap extract (movement.osm_file) to use the osm path finder')
+            self._graph = WalkingGraph.load(self.filename, self.cache_filename)
+        return self._graph
+
+    def path(self, from_lat, form_lng, to_lat, to_lng):
+        # type: (float, float, float, float) -> List[(float, float)]
+        graph = self.get_graph()
+        start = graph.get_nearest_node(from_lat, form_lng, self.snap_distance)
+        goal = graph.get_nearest_node(to_lat, to_lng, self.snap_distance)
+
+        steps = []
+        if start is not None and goal is not None:
+            nodes = graph.find_path(start, goal)
+            if nodes is not None:
+                steps = [graph.get_position(node) for node in nodes]
+
+        # Finally, walk from the end of the way to the exact location, or straight there if there is no way
+        steps.append((to_lat, to_lng))
+
+        return steps
@@ -0,0 +1,122 @@
+import json
+import math
+import os
+from collections import OrderedDict
+
+from app import kernel
+from app.clock import clock
+from api.geo import METERS_PER_DEGREE
+from pokemongo_bot.utils import replace_file
+
+
+@kernel.container.register('path_cache', ['@config.core', '@logger'])
+class PathCache(object):
+    """
+        Remembers the paths a path finder returned, keyed by their origin and destination snapped to a grid of
+        path_cache_precision meters, so that legs walked again (a waypoint loop, the same PokeStops every few
+        minutes) are not asked for again. Paths are forgotten after path_cache_ttl seconds, and the least
+        recently used ones go once there are more than path_cache_size. When path_cache_file is set, the
+        cache is loaded from it, and new paths are written back at most every path_cache_save_interval
+        seconds and when the cache is flushed.
+    """
+
+    def __init__(self, config, logger=None):
+        # type: (Namespace, Optional[Logger]) -> None
+        self.logger = logger
+        movement_config = config["movement"]
+        self.size = movement_config.get("path_cache_size", 256)
+        self.precision = movement_config.get("path_cache_precision", 20)
+        self.ttl = movement_config.get("path_cache_ttl", 7 * 86400)
+        self.filename = movement_config.get("path_cache_file", None)
+        self.save_interval = movement_config.get("path_cache_save_interval", 300)
+
+        self.hits = 0
+        self.misses = 0
+
+        self._step = float(self.precision) / METERS_PER_DEGREE
+        self._paths = OrderedDict()
+        self._loaded = False
+        self._dirty = False
+        self._saved_at = None
+
+    def _get_key(self, from_lat, from_lng, to_lat, to_lng):
+        # type: (float, float, float, float) -> Tuple[int, int, int, int]
+        return tuple(int(math.floor(coordinate / self._step)) for coordinate in (from_lat, from_lng, to_lat, to_lng))
+
+    def get(self, from_lat, from_lng, to_lat, to_lng):
+        # type: (float, float, float, float) -> Optional[List[Tuple[float, float]]]
+        self._load()
+
+        # Least recently used paths are at the front
+        key = self._get_key(from_lat, from_lng, to_lat, to_lng)
+        entry = self._paths.pop(key, None)
+        if entry is None or clock.time() - entry[0] >= self.ttl:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._paths[key] = entry
+        return list(entry[1])
+
+    def put(self, from_lat, from_lng, to_lat, to_lng, path):
+        # type: (float, float, float, float, List[Tuple[float, float]]) -> None
+        self._load()
+
+        key = self._get_key(from_lat, from_lng, to_lat, to_lng)
+        self._paths.pop(key, None)
+        while len(self._paths) >= max(self.size, 1):
+            self._paths.popitem(last=False)
+        self._paths[key] = (clock.time(), [tuple(point) for point in path])
+
+        self._dirty = True
+        if clock.time() - self._saved_at >= self.save_interval:
+            self._save()
+
+    # Write the paths found since the last save.
+    def flush(self):
+        # type: () -> None
+        if self._dirty:
+            self._save()
+
+    def get_stats(self):
+        # type: () -> Dict[str, int]
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": float(self.hits) / requests if requests > 0 else 0.0,
+            "size": len(self._paths)
+        }
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        self._saved_at = clock.time()
+        if self.filename is None or not os.path.isfile(self.filename):
+            return
+
+        try:
+            with open(self.filename) as cache_file:
+                entries = json.load(cache_file)
+            for key, saved_at, path in entries:
+                self._paths[tuple(key)] = (saved_at, [tuple(point) for point in path])
+        except (IOError, OSError, ValueError, TypeError):
+            self._paths = OrderedDict()
+
+    def _save(self):
+        self._dirty = False
+        self._saved_at = clock.time()
+        if self.filename is None:
+            return
+
+        try:
+            temp_filename = self.filename + '.tmp'
+            with open(temp_filename, 'w') as cache_file:
+                json.dump([[list(key), saved_at, path] for key, (saved_at, path) in self._paths.items()], cache_file)
+            replace_file(temp_filename, self.filename)
+        except (IOError, OSError) as error:
+            # Only the next session loses out, the paths are still cached in memory
+            if self.logger is not None:
+                self.logger.log("Could not save the path cache to {}: {}".format(self.filename, error),
+                                color="red", prefix="Path Cache")
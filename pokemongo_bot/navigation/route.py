@@ -0,0 +1,46 @@
+from math import ceil
+from random import Random, randint
+
+from pokemongo_bot.human_behaviour import random_lat_long_delta
+from pokemongo_bot.utils import fast_distance
+
+
+class Route(object):
+    """
+        The steps along the legs a path finder returned, produced as they are walked instead of all up front.
+        Only the number of steps of each leg is worked out when the route is made. Every iteration yields the
+        same steps, the jitter added to each one comes from a generator seeded with the route.
+    """
+
+    def __init__(self, from_lat, from_lng, path_points, alt, step_length):
+        # type: (float, float, List[Tuple[float, float]], float, float) -> None
+        self.alt = alt
+        self._seed = randint(0, 2 ** 31)
+        self._legs = []
+        self._step_count = 0
+
+        for to_lat, to_lng in path_points:
+            steps = fast_distance(from_lat, from_lng, to_lat, to_lng) / step_length
+            self._legs.append((from_lat, from_lng, to_lat, to_lng, steps))
+            if steps != 0:
+                self._step_count += int(ceil(steps))
+
+            # shift the path along
+            from_lat = to_lat
+            from_lng = to_lng
+
+    def __len__(self):
+        return self._step_count
+
+    def __iter__(self):
+        rand = Random(self._seed).random
+        for from_lat, from_lng, to_lat, to_lng, steps in self._legs:
+            if steps == 0:
+                continue
+
+            d_lat = (to_lat - from_lat) / steps
+            d_lng = (to_lng - from_lng) / steps
+            for _ in range(int(ceil(steps))):
+                from_lat += d_lat
+                from_lng += d_lng
+                yield (from_lat + random_lat_long_delta(10, rand), from_lng + random_lat_long_delta(10, rand), self.alt)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from app import kernel
+from app.clock import clock
+from pokemongo_bot.utils import fast_distance
+
+
+@kernel.container.register('scan_scheduler', ['@config.core'])
+class ScanScheduler(object):
+    """
+        Decides when the map objects around the player need to be fetched again. A new scan is due once the
+        player moved scan_distance meters or scan_max_interval seconds passed since the last one, but never
+        sooner than scan_min_interval seconds, the minimum refresh time the game server asks clients to respect.
+    """
+
+    def __init__(self, config):
+        # type: (Namespace) -> None
+        self.config = config
+
+        self.min_interval = self.config['mapping'].get('scan_min_interval', 10)
+        self.max_interval = self.config['mapping'].get('scan_max_interval', 30)
+        self.scan_distance = self.config['mapping'].get('scan_distance', 50)
+
+        self.scans = 0
+        self.skipped = 0
+
+        self._last_scan = None
+
+    def is_scan_due(self, lat, lng):
+        # type: (float, float) -> bool
+        if self._last_scan is None:
+            return True
+
+        scanned_at, scan_lat, scan_lng = self._last_scan
+        elapsed = clock.time() - scanned_at
+        if elapsed >= self.min_interval and \
+                (elapsed >= self.max_interval or fast_distance(scan_lat, scan_lng, lat, lng) >= self.scan_distance):
+            return True
+
+        self.skipped += 1
+        return False
+
+    def record_scan(self, lat, lng):
+        # type: (float, float) -> None
+        self.scans += 1
+        self._last_scan = (clock.time(), lat, lng)
@@ -1,3 +1,4 @@
 
+from pokemongo_bot.service.location_store import LocationStore
 from pokemongo_bot.service.player import Player
 from pokemongo_bot.service.pokemon import Pokemon
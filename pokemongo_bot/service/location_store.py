@@ -0,0 +1,82 @@
+import json
+import threading
+
+from six.moves import queue  # type: ignore
+
+from app import kernel
+from app.clock import clock
+from pokemongo_bot.utils import fast_distance, replace_file
+
+
+@kernel.container.register('location_store', ['@config.core', '@logger'])
+class LocationStore(object):
+    """
+        Remembers the last position of the bot in data/last-location-<username>.json. Positions are written
+        by a background thread, at most once every save_interval seconds unless the bot moved more than
+        save_distance meters, and through a temporary file so that the file is never left half written.
+    """
+
+    def __init__(self, config, logger):
+        self.logger = logger
+        self.filename = 'data/last-location-{}.json'.format(config["login"]["username"])
+        self.save_interval = config["mapping"].get("location_save_interval", 10)
+        self.save_distance = config["mapping"].get("location_save_distance", 50)
+
+        self._lock = threading.Lock()
+        self._pending = None
+        self._last_saved = None
+
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def load(self):
+        # type: () -> Optional[Tuple[float, float]]
+        try:
+            with open(self.filename) as location_file:
+                location_json = json.load(location_file)
+            return location_json['lat'], location_json['lng']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, lat, lng):
+        # type: (float, float) -> None
+        with self._lock:
+            if self._last_saved is not None:
+                saved_at, saved_lat, saved_lng = self._last_saved
+                if clock.time() - saved_at < self.save_interval and \
+                        fast_distance(saved_lat, saved_lng, lat, lng) < self.save_distance:
+                    self._pending = (lat, lng)
+                    return
+            self._queue_write(lat, lng)
+
+    # Write the last position even if it is not due yet and wait until it is on disk.
+    def flush(self):
+        # type: () -> None
+        with self._lock:
+            if self._pending is not None:
+                self._queue_write(*self._pending)
+        if self._writer is not None:
+            self._queue.join()
+
+    def _queue_write(self, lat, lng):
+        self._pending = None
+        self._last_saved = (clock.time(), lat, lng)
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop)
+            self._writer.daemon = True
+            self._writer.start()
+        self._queue.put((lat, lng))
+
+    def _write_loop(self):
+        while True:
+            lat, lng = self._queue.get()
+            try:
+                temp_filename = self.filename + '.tmp'
+                with open(temp_filename, 'w') as outfile:
+                    json.dump({"lat": lat, "lng": lng}, outfile)
+                replace_file(temp_filename, self.filename)
+            except (IOError, OSError) as error:
+                self.logger.log('Failed to save the last location: {}'.format(error), color='red',
+                                prefix='Location', fire_event=False)
+            finally:
+                self._queue.task_done()
@@ -23,6 +23,7 @@ class Player(object):
         self._player = None
         self._inventory = None
         self._pokemon = None
+        self._pokemon_bag = None
 
     def login(self):
         self._logged_in = self._api_wrapper.login()
@@ -42,6 +43,7 @@ class Player(object):
         self._inventory = response_dict['inventory']
         self._candies = response_dict['candy']
         self._pokemon = response_dict['pokemon']
+        self._pokemon_bag = response_dict['pokemon_bag']
         self._candies = response_dict['candy']
         self._eggs = response_dict['eggs']
         self._egg_incubators = response_dict['egg_incubators']
@@ -74,6 +76,10 @@ class Player(object):
         self.update()
         return self._pokemon
 
+    def get_pokemon_bag(self):
+        self.update()
+        return self._pokemon_bag
+
     def get_candies(self):
         self.update()
         return self._candies
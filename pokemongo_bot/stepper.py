@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from math import ceil
-
 from app import kernel
-from pokemongo_bot.human_behaviour import sleep, random_lat_long_delta
-from pokemongo_bot.utils import distance, format_time, format_dist
+from pokemongo_bot.human_behaviour import sleep
+from pokemongo_bot.navigation.route import Route
+from pokemongo_bot.utils import distance, fast_distance, format_time, format_dist
 
 
 @kernel.container.register('stepper', ['@config.core', '@api_wrapper', '%path_finder%', '@logger'])
@@ -52,7 +51,7 @@ class Stepper(object):
                             prefix="Navigation")
 
         for step in destination.step():
-            if distance(self.current_lat, self.current_lng, destination.target_lat, destination.target_lng) < 30:
+            if fast_distance(self.current_lat, self.current_lng, destination.target_lat, destination.target_lng) < 30:
                 break
             self._step_to(*step)
             yield step
@@ -61,42 +60,10 @@ class Stepper(object):
             self.logger.log("Arrived at {} ({} away)".format(destination.name, format_dist(dist, self.config["mapping"]["distance_unit"])), prefix="Navigation")
 
     def get_route_between(self, from_lat, from_lng, to_lat, to_lng, alt):
-        # type: (float, float, float) -> List[(float, float, float)]
-        route_steps = list()
-
-        # ask the path finder how to get there
+        # type: (float, float, float, float, float) -> Route
+        # ask the path finder how to get there, the steps are only worked out as they are walked
         path_points = self.path_finder.path(from_lat, from_lng, to_lat, to_lng)
-        for path_point in path_points:
-            path_to_lat, path_to_lng = path_point
-            path_steps = self._get_steps_between(from_lat, from_lng, path_to_lat, path_to_lng, alt)
-            route_steps += path_steps
-
-            # shift the path along
-            from_lat = path_to_lat
-            from_lng = path_to_lng
-
-        return route_steps
-
-    def _get_steps_between(self, from_lat, from_lng, to_lat, to_lng, alt):
-        # type: (float, float, float) -> List[(float,float,float)]
-        dist = distance(from_lat, from_lng, to_lat, to_lng)
-        steps = (dist / (self.AVERAGE_STRIDE_LENGTH_IN_METRES * self.speed))
-
-        step_locations = list()
-
-        if steps != 0:
-            d_lat = (to_lat - from_lat) / steps
-            d_long = (to_lng - from_lng) / steps
-
-            total_steps = int(ceil(steps))
-            for _ in range(total_steps):
-                from_lat += d_lat
-                from_lng += d_long
-                c_lat = from_lat + random_lat_long_delta(10)
-                c_long = from_lng + random_lat_long_delta(10)
-                step_locations.append((c_lat, c_long, alt))
-
-        return step_locations
+        return Route(from_lat, from_lng, path_points, alt, self.AVERAGE_STRIDE_LENGTH_IN_METRES * self.speed)
 
     def snap_to(self, to_lat, to_lng, to_alt):
         # type: (float, float, float) -> None
@@ -105,7 +72,7 @@ class Stepper(object):
             it will fail.
         """
         # type: (float, float, float) -> None
-        dist = distance(self.current_lat, self.current_lng, to_lat, to_lng)
+        dist = fast_distance(self.current_lat, self.current_lng, to_lat, to_lng)
 
         # Never snap big distances
         if dist > 15:
@@ -303,6 +303,88 @@ class BotTest(unittest.TestCase):
             call('pokestops_found', encounters=[pokestop1, pokestop2, pokestop3])
         ])
 
+    def test_update_map_cells(self):
+        bot = self._create_generic_bot({
+            'mapping': {
+                'scan_distance': 50,
+                'scan_min_interval': 10,
+                'scan_max_interval': 30
+            }
+        })
+        bot.stepper.current_lat = 51.504154
+        bot.stepper.current_lng = -0.076304
+
+        cells = [Cell({})]
+        bot.mapper.get_cells = Mock(return_value=cells)
+
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            assert bot.update_map_cells() is True
+            assert bot.map_cells is cells
+
+            # Cells from the last scan are reused until the next one is due
+            time.return_value = 1015.0
+            assert bot.update_map_cells() is False
+            bot.stepper.current_lat = 51.505154
+            assert bot.update_map_cells() is True
+
+            # A failed scan leaves the cells alone
+            bot.mapper.get_cells.return_value = []
+            time.return_value = 1030.0
+            bot.stepper.current_lat = 51.506154
+            assert bot.update_map_cells() is False
+            assert bot.map_cells is cells
+
+        bot.mapper.get_cells.assert_has_calls([
+            call(51.504154, -0.076304, max_age=0),
+            call(51.505154, -0.076304, max_age=0),
+            call(51.506154, -0.076304, max_age=0)
+        ])
+
+    def test_run_preloaded_cells(self):
+        bot = self._create_generic_bot({})
+        bot.stepper.current_lat = 51.504154
+        bot.stepper.current_lng = -0.076304
+
+        preloaded_cells = [Cell({})]
+        bot.map_cells = preloaded_cells
+        bot.map_preloaded = True
+        bot.mapper.get_cells = Mock(return_value=[Cell({})])
+        bot.work_on_cells = Mock()
+
+        navigated_cells = []
+
+        def navigator(cells):
+            navigated_cells.append(cells)
+            return iter([])
+
+        bot.navigator.navigate = navigator
+
+        # The first run works on and navigates the cells loaded at start, rather than scanning first
+        bot.run()
+        assert navigated_cells == [preloaded_cells]
+        bot.work_on_cells.assert_called_once_with(preloaded_cells, include_pokemon=False)
+        assert bot.mapper.get_cells.called is False
+
+        bot.run()
+        assert bot.mapper.get_cells.call_count == 1
+        assert navigated_cells[1] is not preloaded_cells
+
+    def test_work_on_cells_without_pokemon(self):
+        bot = self._create_generic_bot({})
+        bot.fire = Mock()
+
+        pokestop = PokeStop({'id': 1, 'lure_info': {'encounter_id': 1, 'fort_id': 1}})
+
+        cell = Cell({})
+        cell.catchable_pokemon = [Pokemon({'id': 1})]
+        cell.wild_pokemon = [Pokemon({'id': 2})]
+        cell.pokestops = [pokestop]
+
+        bot.work_on_cells([cell], include_pokemon=False)
+
+        bot.fire.assert_called_once_with('pokestops_found', pokestops=[pokestop])
+
     def test_get_username(self):
         bot = self._create_generic_bot({})
 
@@ -0,0 +1,576 @@
+import random
+
+from mock import Mock
+from pgoapi.exceptions import ServerSideRequestThrottlingException, UnexpectedResponseException
+from s2sphere import CellId  # type: ignore
+
+from app.clock import clock
+from plugins.catch_pokemon import CatchPokemon
+from plugins.spin_pokestop import SpinPokestop
+from pokemongo_bot import FortNavigator, PokemonGoBot
+from pokemongo_bot.event_manager import EventManager
+from pokemongo_bot.logger import Logger
+from pokemongo_bot.mapper import Mapper
+from pokemongo_bot.navigation.path_finder import DirectPathFinder
+from pokemongo_bot.service.player import Player
+from pokemongo_bot.service.pokemon import Pokemon
+from pokemongo_bot.stepper import Stepper
+from pokemongo_bot.tests import PGoApiMock, PGoApiRequestMock, create_core_test_config
+from pokemongo_bot.utils import distance
+import api
+
+
+class FakeAuthProvider(object):
+    """
+        Stands in for the auth provider of the real PGoApi, with a ticket that never runs out.
+    """
+
+    # pylint: disable=no-self-use
+    def get_ticket(self):
+        return int((clock.time() + 86400) * 1000), b"", b""
+
+    # pylint: disable=unused-argument,no-self-use
+    def user_login(self, username, password):
+        return True
+
+
+class FakeGameServer(PGoApiMock):
+    """
+        A scriptable stand-in for the game servers. Unlike PGoApiMock it doesn't need every response
+        to be set up front: it answers requests from a synthetic world that is generated lazily, and
+        deterministically for a given seed, for every S2 cell that is asked for. PokeStops go on
+        cooldown when spun, Pokemon spawn and despawn on an hourly schedule and the player's inventory
+        follows what was spun, caught and released.
+
+        Latency, throttling, HTTP errors and empty responses can be injected at configurable rates to
+        see how the bot copes with a misbehaving server. Counters on the server measure the bot's
+        throughput and how many requests it needs to get there.
+    """
+
+    FORT_SEARCH_SUCCESS = 1
+    FORT_SEARCH_OUT_OF_RANGE = 2
+    FORT_SEARCH_IN_COOLDOWN = 3
+
+    ENCOUNTER_SUCCESS = 1
+    ENCOUNTER_NOT_FOUND = 2
+    ENCOUNTER_NOT_IN_RANGE = 5
+    ENCOUNTER_ALREADY_HAPPENED = 6
+    ENCOUNTER_POKEMON_INVENTORY_FULL = 7
+
+    CATCH_SUCCESS = 1
+    CATCH_ESCAPE = 2
+    CATCH_FLEE = 3
+    CATCH_MISSED = 4
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, seed=0, stops_per_cell=2, spawns_per_cell=3, spawn_duration=900, cooldown=300,
+                 interaction_range=40, visible_range=70, latency=0.0, throttle_rate=0.0, error_rate=0.0,
+                 empty_rate=0.0, starting_items=None):
+        super(FakeGameServer, self).__init__()
+        self.seed = seed
+        self.stops_per_cell = stops_per_cell
+        self.spawns_per_cell = spawns_per_cell
+        self.spawn_duration = spawn_duration
+        self.cooldown = cooldown
+        self.interaction_range = interaction_range
+        self.visible_range = visible_range
+
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self._random = random.Random(seed)
+        self._auth_provider = FakeAuthProvider()
+
+        self._cells = {}
+        self._forts = {}
+        self._spawn_points = {}
+        self._cooldowns = {}
+        self._caught = set()
+        self._encounters = {}
+        self._next_pokemon_id = 1
+
+        self.username = "fake_account"
+        self.player_stats = {
+            "level": 5,
+            "experience": 0,
+            "next_level_xp": 10000,
+            "pokemons_captured": 0,
+            "poke_stop_visits": 0
+        }
+        self.items = dict(starting_items) if starting_items is not None else {1: 50, 2: 10}
+        self.pokemon = {}
+        self.candy = {}
+
+        # When each part of the inventory last changed, to answer GET_INVENTORY with only the changes
+        self._inventory_timestamp = 0
+        self._modified = {}
+        self._deleted = {}
+        self.inventory_items_sent = 0
+        self.forts_sent = 0
+
+        self.requests = 0
+        self.envelopes = 0
+        self.failed_envelopes = 0
+        self.rpcs = {}
+        self.stops_spun = 0
+        self.pokemon_caught = 0
+
+        self.handlers = {
+            "GET_PLAYER": self._get_player,
+            "GET_INVENTORY": self._get_inventory,
+            "GET_MAP_OBJECTS": self._get_map_objects,
+            "FORT_DETAILS": self._fort_details,
+            "FORT_SEARCH": self._fort_search,
+            "ENCOUNTER": self._encounter,
+            "CATCH_POKEMON": self._catch_pokemon,
+            "RELEASE_POKEMON": self._release_pokemon,
+            "RECYCLE_INVENTORY_ITEM": self._recycle_inventory_item
+        }
+
+    def create_request(self):
+        return FakeGameRequest(self)
+
+    def handle(self, calls):
+        # type: (List[Tuple[str, Tuple, Dict]]) -> Optional[Dict]
+        self.requests += 1
+
+        if self.latency > 0:
+            clock.sleep(self._random.uniform(0.5, 1.5) * self.latency)
+
+        roll = self._random.random()
+        if roll < self.throttle_rate:
+            self.failed_envelopes += 1
+            raise ServerSideRequestThrottlingException("Request throttled by server... slow down man")
+        roll -= self.throttle_rate
+        if roll < self.error_rate:
+            self.failed_envelopes += 1
+            raise UnexpectedResponseException("Unexpected RPC response - Status Code 502")
+        roll -= self.error_rate
+        if roll < self.empty_rate:
+            self.failed_envelopes += 1
+            return None
+
+        self.envelopes += 1
+        responses = {}
+        for call_name, args, kwargs in calls:
+            self.rpcs[call_name] = self.rpcs.get(call_name, 0) + 1
+            handler = self.handlers.get(call_name, None)
+            if handler is not None:
+                responses[call_name] = handler(*args, **kwargs)
+
+        return {
+            "status_code": 1,
+            "responses": responses
+        }
+
+    def get_rpc_count(self):
+        # type: () -> int
+        return sum(self.rpcs.values())
+
+    # Map refreshes stand in for ticks of the bot's main loop.
+    def get_ticks(self):
+        # type: () -> int
+        return self.rpcs.get("GET_MAP_OBJECTS", 0)
+
+    def get_throughput(self, elapsed):
+        # type: (float) -> Dict[str, float]
+        hours = elapsed / 3600.0 if elapsed > 0 else float("inf")
+        ticks = self.get_ticks()
+        return {
+            "stops_per_hour": self.stops_spun / hours,
+            "catches_per_hour": self.pokemon_caught / hours,
+            "rpcs_per_tick": float(self.get_rpc_count()) / ticks if ticks > 0 else 0.0,
+            "requests_per_tick": float(self.requests) / ticks if ticks > 0 else 0.0
+        }
+
+    # World
+
+    def get_cell(self, cell_id):
+        # type: (int) -> Dict
+        if cell_id not in self._cells:
+            self._cells[cell_id] = self._generate_cell(cell_id)
+        return self._cells[cell_id]
+
+    def _generate_cell(self, cell_id):
+        cell_random = random.Random(self.seed * 1000003 + cell_id)
+        s2_cell = CellId(cell_id)
+        range_min, range_max = s2_cell.range_min().id(), s2_cell.range_max().id()
+
+        # Any odd id between the first and last leaf of a cell is a leaf inside of it
+        def random_position():
+            lat_lng = CellId(cell_random.randint(range_min, range_max) | 1).to_lat_lng()
+            return lat_lng.lat().degrees, lat_lng.lng().degrees
+
+        fort_ids = []
+        for index in range(self.stops_per_cell):
+            latitude, longitude = random_position()
+            fort_id = "{:x}.{}".format(cell_id, index)
+            self._forts[fort_id] = {
+                "id": fort_id,
+                "name": "Fake Stop {:x}.{}".format(cell_id, index),
+                "latitude": latitude,
+                "longitude": longitude,
+                "type": 1,
+                "enabled": True,
+                "last_modified_timestamp_ms": 0
+            }
+            fort_ids.append(fort_id)
+
+        spawn_point_ids = []
+        for index in range(self.spawns_per_cell):
+            latitude, longitude = random_position()
+            spawn_point_id = "{:x}{:02d}".format(cell_id, index)
+            self._spawn_points[spawn_point_id] = {
+                "latitude": latitude,
+                "longitude": longitude,
+                "offset": cell_random.randint(0, 3599),
+                "seed": cell_random.randint(0, 2 ** 31)
+            }
+            spawn_point_ids.append(spawn_point_id)
+
+        return {"forts": fort_ids, "spawn_points": spawn_point_ids}
+
+    # Every spawn point shows a Pokemon for spawn_duration seconds once an hour
+    def _get_active_spawn(self, spawn_point_id, now):
+        spawn_point = self._spawn_points[spawn_point_id]
+        hour, second = divmod(int(now) - spawn_point["offset"], 3600)
+        if second >= self.spawn_duration:
+            return None
+
+        encounter_id = spawn_point["seed"] * 1000 + hour % 1000
+        if encounter_id in self._caught:
+            return None
+
+        spawn_random = random.Random(encounter_id)
+        return {
+            "encounter_id": encounter_id,
+            "spawn_point_id": spawn_point_id,
+            "pokemon_id": spawn_random.randint(1, 151),
+            "latitude": spawn_point["latitude"],
+            "longitude": spawn_point["longitude"],
+            "expiration_timestamp_ms": int((now - second + self.spawn_duration) * 1000),
+            "cp": spawn_random.randint(10, 1000),
+            "individual_attack": spawn_random.randint(0, 15),
+            "individual_defense": spawn_random.randint(0, 15),
+            "individual_stamina": spawn_random.randint(0, 15)
+        }
+
+    def _get_fort(self, fort_id, now):
+        fort = dict(self._forts[fort_id])
+        cooldown = self._cooldowns.get(fort_id, 0)
+        if cooldown > now * 1000:
+            fort["cooldown_complete_timestamp_ms"] = cooldown
+        return fort
+
+    def _get_player_position(self, latitude=None, longitude=None):
+        if latitude is None or longitude is None:
+            latitude, longitude, _ = self.get_position()
+        return latitude, longitude
+
+    # RPCs
+
+    # pylint: disable=unused-argument
+    def _get_player(self, *args, **kwargs):
+        return {
+            "success": True,
+            "player_data": {
+                "username": self.username,
+                "max_pokemon_storage": 250,
+                "max_item_storage": 350,
+                "creation_timestamp_ms": 1467936000000,
+                "currencies": [
+                    {"name": "POKECOIN", "amount": 0},
+                    {"name": "STARDUST", "amount": 1000}
+                ]
+            }
+        }
+
+    # pylint: disable=unused-argument
+    def _get_inventory(self, last_timestamp_ms=0, **kwargs):
+        def changed(key):
+            return self._modified.get(key, 1) > last_timestamp_ms
+
+        inventory_items = []
+        if changed(("player_stats",)):
+            inventory_items.append({"inventory_item_data": {"player_stats": dict(self.player_stats)}})
+        for item_id, count in self.items.items():
+            if changed(("item", item_id)):
+                inventory_items.append({"inventory_item_data": {"item": {"item_id": item_id, "count": count}}})
+        for pokemon in self.pokemon.values():
+            if changed(("pokemon", pokemon["id"])):
+                inventory_items.append({"inventory_item_data": {"pokemon_data": dict(pokemon)}})
+        for family_id, candy in self.candy.items():
+            if changed(("candy", family_id)):
+                inventory_items.append({"inventory_item_data": {"candy": {"family_id": family_id, "candy": candy}}})
+        if last_timestamp_ms > 0:
+            for unique_id, deleted_at in self._deleted.items():
+                if deleted_at > last_timestamp_ms:
+                    inventory_items.append({"deleted_item": {"pokemon_id": unique_id}})
+
+        self.inventory_items_sent += len(inventory_items)
+        return {
+            "success": True,
+            "inventory_delta": {
+                "original_timestamp_ms": last_timestamp_ms,
+                "new_timestamp_ms": self._get_inventory_timestamp(),
+                "inventory_items": inventory_items
+            }
+        }
+
+    # Inventory timestamps never repeat, even when the clock doesn't move between two changes
+    def _get_inventory_timestamp(self):
+        self._inventory_timestamp = max(self._inventory_timestamp + 1, clock.time_ms())
+        return self._inventory_timestamp
+
+    def _touch(self, *keys):
+        timestamp = self._get_inventory_timestamp()
+        for key in keys:
+            self._modified[key] = timestamp
+
+    # pylint: disable=unused-argument
+    def _get_map_objects(self, cell_id=None, since_timestamp_ms=None, latitude=None, longitude=None, **kwargs):
+        now = clock.time()
+        latitude, longitude = self._get_player_position(latitude, longitude)
+
+        cell_ids = cell_id or []
+        since_timestamp_ms = since_timestamp_ms or [0] * len(cell_ids)
+
+        map_cells = []
+        for requested_cell_id, since in zip(cell_ids, since_timestamp_ms):
+            # Only forts that changed since the last time the client saw this cell are sent again
+            cell = self.get_cell(requested_cell_id)
+            forts = [self._get_fort(fort_id, now) for fort_id in cell["forts"]
+                     if since == 0 or self._forts[fort_id]["last_modified_timestamp_ms"] >= since]
+            self.forts_sent += len(forts)
+
+            catchable_pokemons = []
+            nearby_pokemons = []
+            for spawn_point_id in cell["spawn_points"]:
+                spawn = self._get_active_spawn(spawn_point_id, now)
+                if spawn is None:
+                    continue
+
+                dist = distance(latitude, longitude, spawn["latitude"], spawn["longitude"])
+                if dist <= self.visible_range:
+                    catchable_pokemons.append({
+                        "encounter_id": spawn["encounter_id"],
+                        "spawn_point_id": spawn_point_id,
+                        "pokemon_id": spawn["pokemon_id"],
+                        "latitude": spawn["latitude"],
+                        "longitude": spawn["longitude"],
+                        "expiration_timestamp_ms": spawn["expiration_timestamp_ms"]
+                    })
+                else:
+                    nearby_pokemons.append({
+                        "encounter_id": spawn["encounter_id"],
+                        "pokemon_id": spawn["pokemon_id"],
+                        "distance_in_meters": dist
+                    })
+
+            map_cells.append({
+                "s2_cell_id": requested_cell_id,
+                "current_timestamp_ms": int(now * 1000),
+                "forts": forts,
+                "spawn_points": [{
+                    "latitude": self._spawn_points[spawn_point_id]["latitude"],
+                    "longitude": self._spawn_points[spawn_point_id]["longitude"]
+                } for spawn_point_id in cell["spawn_points"]],
+                "catchable_pokemons": catchable_pokemons,
+                "nearby_pokemons": nearby_pokemons
+            })
+
+        return {"status": 1, "map_cells": map_cells}
+
+    # pylint: disable=unused-argument
+    def _fort_details(self, fort_id=None, latitude=None, longitude=None, **kwargs):
+        if fort_id not in self._forts:
+            return {}
+
+        fort = self._forts[fort_id]
+        return {
+            "fort_id": fort_id,
+            "name": fort["name"],
+            "type": fort["type"],
+            "latitude": fort["latitude"],
+            "longitude": fort["longitude"]
+        }
+
+    # pylint: disable=unused-argument
+    def _fort_search(self, fort_id=None, player_latitude=None, player_longitude=None, **kwargs):
+        if fort_id not in self._forts:
+            return {"result": self.FORT_SEARCH_OUT_OF_RANGE}
+
+        now_ms = clock.time_ms()
+        fort = self._forts[fort_id]
+        player_latitude, player_longitude = self._get_player_position(player_latitude, player_longitude)
+        if distance(player_latitude, player_longitude, fort["latitude"], fort["longitude"]) > self.interaction_range:
+            return {"result": self.FORT_SEARCH_OUT_OF_RANGE}
+        if self._cooldowns.get(fort_id, 0) > now_ms:
+            return {"result": self.FORT_SEARCH_IN_COOLDOWN}
+
+        items_awarded = []
+        for _ in range(3):
+            item_id = self._random.choice([1, 1, 1, 2, 101, 701])
+            items_awarded.append({"item_id": item_id, "item_count": 1})
+            self.items[item_id] = self.items.get(item_id, 0) + 1
+            self._touch(("item", item_id))
+
+        self._cooldowns[fort_id] = now_ms + self.cooldown * 1000
+        fort["last_modified_timestamp_ms"] = now_ms
+        self.player_stats["experience"] += 50
+        self.player_stats["poke_stop_visits"] += 1
+        self._touch(("player_stats",))
+        self.stops_spun += 1
+
+        return {
+            "result": self.FORT_SEARCH_SUCCESS,
+            "items_awarded": items_awarded,
+            "experience_awarded": 50,
+            "cooldown_complete_timestamp_ms": self._cooldowns[fort_id]
+        }
+
+    # pylint: disable=unused-argument
+    def _encounter(self, encounter_id=None, spawn_point_id=None, player_latitude=None, player_longitude=None, **kwargs):
+        if encounter_id in self._caught:
+            return {"status": self.ENCOUNTER_ALREADY_HAPPENED}
+        if spawn_point_id not in self._spawn_points:
+            return {"status": self.ENCOUNTER_NOT_FOUND}
+
+        spawn = self._get_active_spawn(spawn_point_id, clock.time())
+        if spawn is None or spawn["encounter_id"] != encounter_id:
+            return {"status": self.ENCOUNTER_NOT_FOUND}
+
+        player_latitude, player_longitude = self._get_player_position(player_latitude, player_longitude)
+        if distance(player_latitude, player_longitude, spawn["latitude"], spawn["longitude"]) > self.visible_range:
+            return {"status": self.ENCOUNTER_NOT_IN_RANGE}
+        if len(self.pokemon) >= 250:
+            return {"status": self.ENCOUNTER_POKEMON_INVENTORY_FULL}
+
+        self._encounters[encounter_id] = spawn
+        return {
+            "status": self.ENCOUNTER_SUCCESS,
+            "wild_pokemon": {
+                "encounter_id": encounter_id,
+                "spawn_point_id": spawn_point_id,
+                "latitude": spawn["latitude"],
+                "longitude": spawn["longitude"],
+                "time_till_hidden_ms": spawn["expiration_timestamp_ms"] - clock.time_ms(),
+                "pokemon_data": {
+                    "pokemon_id": spawn["pokemon_id"],
+                    "cp": spawn["cp"],
+                    "individual_attack": spawn["individual_attack"],
+                    "individual_defense": spawn["individual_defense"],
+                    "individual_stamina": spawn["individual_stamina"]
+                }
+            },
+            "capture_probability": {
+                "pokeball_type": [1, 2, 3],
+                "capture_probability": [0.6, 0.8, 0.95]
+            }
+        }
+
+    # pylint: disable=unused-argument
+    def _catch_pokemon(self, encounter_id=None, pokeball=1, **kwargs):
+        spawn = self._encounters.get(encounter_id, None)
+        if spawn is None or self.items.get(pokeball, 0) <= 0:
+            return {"status": self.CATCH_MISSED}
+
+        self.items[pokeball] -= 1
+        self._touch(("item", pokeball))
+        roll = self._random.random()
+        if roll >= [0.6, 0.8, 0.95, 1.0][min(pokeball, 4) - 1]:
+            if roll >= 0.9:
+                del self._encounters[encounter_id]
+                return {"status": self.CATCH_FLEE}
+            return {"status": self.CATCH_ESCAPE}
+
+        del self._encounters[encounter_id]
+        self._caught.add(encounter_id)
+
+        unique_id = self._next_pokemon_id
+        self._next_pokemon_id += 1
+        self.pokemon[unique_id] = {
+            "id": unique_id,
+            "pokemon_id": spawn["pokemon_id"],
+            "cp": spawn["cp"],
+            "individual_attack": spawn["individual_attack"],
+            "individual_defense": spawn["individual_defense"],
+            "individual_stamina": spawn["individual_stamina"],
+            "pokeball": pokeball,
+            "creation_time_ms": clock.time_ms()
+        }
+        self.candy[spawn["pokemon_id"]] = self.candy.get(spawn["pokemon_id"], 0) + 3
+        self.player_stats["experience"] += 100
+        self.player_stats["pokemons_captured"] += 1
+        self._touch(("pokemon", unique_id), ("candy", spawn["pokemon_id"]), ("player_stats",))
+        self.pokemon_caught += 1
+
+        return {
+            "status": self.CATCH_SUCCESS,
+            "captured_pokemon_id": unique_id,
+            "capture_award": {
+                "activity_type": [1],
+                "xp": [100],
+                "candy": [3],
+                "stardust": [100]
+            }
+        }
+
+    # pylint: disable=unused-argument
+    def _release_pokemon(self, pokemon_id=None, **kwargs):
+        pokemon = self.pokemon.pop(pokemon_id, None)
+        if pokemon is None:
+            return {"result": 2}
+
+        self.candy[pokemon["pokemon_id"]] = self.candy.get(pokemon["pokemon_id"], 0) + 1
+        self._touch(("candy", pokemon["pokemon_id"]))
+        self._deleted[pokemon_id] = self._get_inventory_timestamp()
+        return {"result": 1, "candy_awarded": 1}
+
+    # pylint: disable=unused-argument
+    def _recycle_inventory_item(self, item_id=None, count=0, **kwargs):
+        if self.items.get(item_id, 0) < count:
+            return {"result": 2}
+
+        self.items[item_id] -= count
+        self._touch(("item", item_id))
+        return {"result": 1, "new_count": self.items[item_id]}
+
+
+# pylint: disable=super-init-not-called
+class FakeGameRequest(PGoApiRequestMock):
+    def call(self):
+        return self.pgoapi.handle(self.calls)
+
+
+def create_fake_server_bot(server, user_config=None):
+    # type: (FakeGameServer, Optional[Dict]) -> PokemonGoBot
+    """
+        Wire up a bot, with the PokeStop and catching plugins, that talks to the given FakeGameServer
+        instead of the game servers.
+    """
+    user_config = dict(user_config or {})
+    mapping = dict(user_config.get("mapping", {}))
+    mapping.setdefault("location", "51.5044524,-0.0752479")
+    mapping.setdefault("cell_radius", 10)
+    user_config["mapping"] = mapping
+    config = create_core_test_config(user_config)
+
+    event_manager = EventManager()
+    logger = Logger(event_manager)
+    api_wrapper = api.PoGoApi(server)
+    player_service = Player(api_wrapper, event_manager, logger)
+    pokemon_service = Pokemon(api_wrapper)
+    google_maps = Mock()
+    google_maps.elevation = Mock(return_value=[{"elevation": 10.0}])
+    mapper = Mapper(config, api_wrapper, google_maps, logger)
+    path_finder = DirectPathFinder(config)
+    stepper = Stepper(config, api_wrapper, path_finder, logger)
+    navigator = FortNavigator(config, api_wrapper)
+
+    SpinPokestop(event_manager, logger)
+    CatchPokemon(event_manager, logger)
+
+    return PokemonGoBot(config, api_wrapper, player_service, pokemon_service, event_manager, mapper, stepper,
+                        navigator, logger)
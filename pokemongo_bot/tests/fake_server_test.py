@@ -0,0 +1,174 @@
+import os
+import unittest
+
+import pytest
+from mock import MagicMock
+from pgoapi.exceptions import ServerSideRequestThrottlingException, UnexpectedResponseException
+from pgoapi.utilities import get_cell_ids
+
+from app.clock import Clock, clock
+from pokemongo_bot.tests import test_account_name
+from pokemongo_bot.tests.fake_server import FakeGameServer, create_fake_server_bot
+import api
+
+
+class FakeGameServerTest(unittest.TestCase):
+    def tearDown(self):
+        clock.set_mode(Clock.REAL)
+
+    @staticmethod
+    def _get_map(server, lat, lng):
+        server.set_position(lat, lng, 0)
+        request = server.create_request()
+        request.get_map_objects(latitude=lat, longitude=lng, since_timestamp_ms=[0], cell_id=get_cell_ids(lat, lng, 0))
+        return request.call()["responses"]["GET_MAP_OBJECTS"]["map_cells"]
+
+    def test_world_is_deterministic(self):
+        cells_a = self._get_map(FakeGameServer(seed=3), 51.5044524, -0.0752479)
+        cells_b = self._get_map(FakeGameServer(seed=3), 51.5044524, -0.0752479)
+        cells_c = self._get_map(FakeGameServer(seed=4), 51.5044524, -0.0752479)
+
+        assert len(cells_a) == 1
+        assert len(cells_a[0]["forts"]) == 2
+        assert cells_a[0]["forts"] == cells_b[0]["forts"]
+        assert cells_a[0]["forts"] != cells_c[0]["forts"]
+
+    def test_fort_search_cooldown(self):
+        clock.set_mode(Clock.SIMULATED, start=1000000.0)
+        server = FakeGameServer()
+        fort = self._get_map(server, 51.5044524, -0.0752479)[0]["forts"][0]
+        server.set_position(fort["latitude"], fort["longitude"], 0)
+
+        def spin():
+            request = server.create_request()
+            request.fort_search(fort_id=fort["id"], player_latitude=fort["latitude"], player_longitude=fort["longitude"])
+            return request.call()["responses"]["FORT_SEARCH"]
+
+        assert spin()["result"] == FakeGameServer.FORT_SEARCH_SUCCESS
+        assert spin()["result"] == FakeGameServer.FORT_SEARCH_IN_COOLDOWN
+        assert sum(server.items.values()) == 63
+
+        clock.sleep(301)
+        assert spin()["result"] == FakeGameServer.FORT_SEARCH_SUCCESS
+        assert server.stops_spun == 2
+
+    def test_spawns_despawn(self):
+        clock.set_mode(Clock.SIMULATED, start=1000000.0)
+        server = FakeGameServer(spawns_per_cell=1, spawn_duration=600, visible_range=1000)
+
+        sightings = 0
+        for _ in range(60):
+            cell = self._get_map(server, 51.5044524, -0.0752479)[0]
+            sightings += len(cell["catchable_pokemons"])
+            clock.sleep(60)
+
+        assert sightings == 10
+
+    def test_inventory_deltas(self):
+        server = FakeGameServer(starting_items={1: 10})
+        server.pokemon[1] = {"id": 1, "pokemon_id": 16, "cp": 10}
+        server.pokemon[2] = {"id": 2, "pokemon_id": 19, "cp": 20}
+        api_wrapper = api.PoGoApi(server)
+        api_wrapper.get_expiration_time = MagicMock(return_value=1000000)
+        api_wrapper.set_position(0, 0, 0)
+
+        state = api_wrapper.get_inventory().call()
+        pokemon = state["pokemon"]
+        assert len(pokemon) == 2
+        assert state["inventory"] == {"count": 10, 1: 10}
+        assert server.inventory_items_sent == 4
+
+        state = api_wrapper.recycle_inventory_item(item_id=1, count=4).release_pokemon(pokemon_id=2).get_inventory().call()
+        assert [poke.unique_id for poke in state["pokemon"]] == [1]
+        assert state["pokemon"][0] is pokemon[0]
+        assert state["inventory"] == {"count": 6, 1: 6}
+        assert state["candy"] == {19: 1}
+
+        # Only the item, the candy and the released Pokemon were sent again
+        assert server.inventory_items_sent == 7
+
+    def test_map_deltas(self):
+        clock.set_mode(Clock.SIMULATED, start=1000000.0)
+        server = FakeGameServer(stops_per_cell=3)
+        api_wrapper = api.PoGoApi(server)
+        api_wrapper.get_expiration_time = MagicMock(return_value=1000000)
+        api_wrapper.set_position(51.5044524, -0.0752479, 0)
+        cell_ids = get_cell_ids(51.5044524, -0.0752479, 1)
+
+        worldmap = api_wrapper.get_map_objects(latitude=51.5044524, longitude=-0.0752479, cell_id=cell_ids).call()["worldmap"]
+        assert [cell.cell_id for cell in worldmap.cells] == cell_ids
+        assert server.forts_sent == 9
+        pokestop = worldmap.cells[0].pokestops[0]
+
+        clock.sleep(60)
+        fort = server.get_cell(cell_ids[1])["forts"][0]
+        server.set_position(server._forts[fort]["latitude"], server._forts[fort]["longitude"], 0)  # pylint: disable=protected-access
+        api_wrapper.fort_search(fort_id=fort).call()
+
+        clock.sleep(60)
+        worldmap = api_wrapper.get_map_objects(latitude=51.5044524, longitude=-0.0752479, cell_id=cell_ids).call()["worldmap"]
+        assert server.forts_sent == 10
+        assert [len(cell.pokestops) for cell in worldmap.cells] == [3, 3, 3]
+        assert worldmap.cells[0].pokestops[0] is pokestop
+        assert worldmap.cells[1].pokestops[0].is_in_cooldown()
+
+        assert worldmap.evict_cells(0, 0, 1000) == 0
+        worldmap.cells = []
+        assert worldmap.evict_cells(0, 0, 1000) == 3
+        assert worldmap.get_timestamps(cell_ids) == [0, 0, 0]
+
+    def test_error_injection(self):
+        server = FakeGameServer(throttle_rate=1.0)
+        server.set_position(0, 0, 0)
+        with pytest.raises(ServerSideRequestThrottlingException):
+            server.create_request().get_player().call()
+
+        server = FakeGameServer(error_rate=1.0)
+        with pytest.raises(UnexpectedResponseException):
+            server.create_request().get_player().call()
+
+        server = FakeGameServer(empty_rate=1.0)
+        assert server.create_request().get_player().call() is None
+        assert server.failed_envelopes == 1
+
+    def test_run_end_to_end(self):
+        account = test_account_name()
+        server = FakeGameServer(seed=1, throttle_rate=0.02, error_rate=0.02)
+        bot = create_fake_server_bot(server, {"login": {"username": account}, "mapping": {"cell_radius": 2}})
+
+        clock.set_mode(Clock.SIMULATED, start=1470001200)
+        try:
+            bot.start()
+            bot.run()
+        finally:
+            bot.location_store.flush()
+            if os.path.isfile('data/last-location-' + account + '.json'):
+                os.unlink('data/last-location-' + account + '.json')
+
+        throughput = server.get_throughput(clock.time() - 1470001200)
+
+        assert server.stops_spun > 0
+        assert server.pokemon_caught > 0
+        assert throughput["stops_per_hour"] > 0
+        assert throughput["catches_per_hour"] > 0
+        assert 1.0 <= throughput["requests_per_tick"] < 5.0
+        assert server.rpcs["FORT_SEARCH"] == server.stops_spun
+
+    def test_run_simulated_hours(self):
+        account = test_account_name()
+        server = FakeGameServer(seed=2)
+        bot = create_fake_server_bot(server, {"login": {"username": account}, "mapping": {"cell_radius": 2}})
+
+        clock.set_mode(Clock.SIMULATED, start=1470001200)
+        try:
+            bot.start()
+            while clock.time() < 1470001200 + 3 * 3600:
+                bot.run()
+        finally:
+            bot.location_store.flush()
+            if os.path.isfile('data/last-location-' + account + '.json'):
+                os.unlink('data/last-location-' + account + '.json')
+
+        # Stops come off cooldown and spawns come back every hour, so the session goes on
+        assert server.stops_spun > server.stops_per_cell * 3
+        assert server.pokemon_caught > 1
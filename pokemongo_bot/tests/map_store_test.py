@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock
+
+from api.worldmap import Cell, Gym, PokeStop
+from pokemongo_bot.map_store import MapStore
+from pokemongo_bot.mapper import Mapper
+from pokemongo_bot.tests import create_core_test_config, create_mock_api_wrapper
+
+# Level 15 cells in London and New York, the id of the second one does not fit in a signed 64 bit integer
+LONDON_CELL_ID = 5221364418239004672
+NEW_YORK_CELL_ID = 9926595631827124224
+
+
+class MapStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = create_core_test_config({
+            "mapping": {
+                "map_database": os.path.join(self.directory, "map.db")
+            }
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def _create_cell(cell_id, lat, lng):
+        return Cell({
+            "s2_cell_id": cell_id,
+            "current_timestamp_ms": 1000,
+            "spawn_points": [{"latitude": lat, "longitude": lng}],
+            "forts": [
+                {
+                    "id": "stop_" + str(cell_id),
+                    "name": "Stop",
+                    "type": 1,
+                    "latitude": lat + 0.0001,
+                    "longitude": lng,
+                    "last_modified_timestamp_ms": 500,
+                    "cooldown_complete_timestamp_ms": 2000
+                },
+                {
+                    "id": "gym_" + str(cell_id),
+                    "type": 2,
+                    "latitude": lat,
+                    "longitude": lng + 0.0001,
+                    "owned_by_team": 2,
+                    "gym_points": 1500
+                }
+            ]
+        })
+
+    def test_save_and_load_cells(self):
+        map_store = MapStore(self.config, Mock())
+
+        london_cell = self._create_cell(LONDON_CELL_ID, 51.5044524, -0.0752479)
+        london_cell.pokestops[0].cooldown_timestamp_ms = 3000
+        map_store.save_cells([london_cell, self._create_cell(NEW_YORK_CELL_ID, 40.7128, -74.0060)])
+        map_store.close()
+
+        map_store = MapStore(self.config, Mock())
+        cells = map_store.load_cells(51.5044524, -0.0752479, 2000)
+
+        assert len(cells) == 1
+        cell = cells[0]
+        assert cell.cell_id == LONDON_CELL_ID
+        assert cell.timestamp_ms == 1000
+        assert cell.spawn_points == [(51.5044524, -0.0752479)]
+
+        assert len(cell.pokestops) == 1
+        assert isinstance(cell.pokestops[0], PokeStop)
+        assert cell.pokestops[0].fort_id == "stop_" + str(LONDON_CELL_ID)
+        assert cell.pokestops[0].cooldown_timestamp_ms == 3000
+        assert cell.pokestops[0].last_modified_timestamp_ms == 500
+
+        assert len(cell.gyms) == 1
+        assert isinstance(cell.gyms[0], Gym)
+        assert cell.gyms[0].owned_by_team == 2
+        assert cell.gyms[0].gym_points == 1500
+
+        cells = map_store.load_cells(40.7128, -74.0060, 2000)
+        assert [cell.cell_id for cell in cells] == [NEW_YORK_CELL_ID]
+
+    def test_save_replaces_cells(self):
+        map_store = MapStore(self.config, Mock())
+
+        cell = self._create_cell(LONDON_CELL_ID, 51.5044524, -0.0752479)
+        map_store.save_cells([cell])
+        map_store.flush()
+        cell.gyms = []
+        map_store.save_cells([cell])
+        map_store.flush()
+
+        cells = map_store.load_cells(51.5044524, -0.0752479, 2000)
+        assert len(cells[0].pokestops) == 1
+        assert len(cells[0].gyms) == 0
+
+    def test_disabled(self):
+        config = create_core_test_config({
+            "mapping": {
+                "map_database": None
+            }
+        })
+        map_store = MapStore(config, Mock())
+
+        map_store.save_cells([self._create_cell(LONDON_CELL_ID, 51.5044524, -0.0752479)])
+        assert map_store.load_cells(51.5044524, -0.0752479, 2000) == []
+
+    def test_mapper_load_map(self):
+        map_store = MapStore(self.config, Mock())
+        map_store.save_cells([self._create_cell(LONDON_CELL_ID, 51.5044524, -0.0752479)])
+        map_store.flush()
+
+        api_wrapper = create_mock_api_wrapper(self.config)
+        logger = Mock()
+        logger.log = Mock(return_value=None)
+        mapper = Mapper(self.config, api_wrapper, Mock(), logger, Mock(), map_store)
+
+        cells = mapper.load_map(51.5044524, -0.0752479)
+
+        assert len(cells) == 1
+        assert mapper.worldmap.get_cell(LONDON_CELL_ID) is cells[0]
+        assert mapper.worldmap.get_timestamps([LONDON_CELL_ID]) == [1000]
+        assert [fort.fort_id for _, fort in mapper.worldmap.get_forts_within(51.5044524, -0.0752479, 50)] == \
+            ["gym_" + str(LONDON_CELL_ID), "stop_" + str(LONDON_CELL_ID)]
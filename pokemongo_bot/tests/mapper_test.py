@@ -63,6 +63,7 @@ class MapperTest(unittest.TestCase):
 
         assert len(cells) == 5
 
+        mapper.location_store.flush()
         assert bool(os.path.isfile('data/last-location-'+account+'.json')) is True
         with open('data/last-location-'+account+'.json') as data_file:
             data = json.load(data_file)
@@ -102,6 +103,107 @@ class MapperTest(unittest.TestCase):
 
         assert len(cells) == 0
 
+    def test_get_cells_indexes_forts(self):
+        config = create_core_test_config({
+            "mapping": {
+                "cell_radius": 10
+            }
+        })
+        api_wrapper = create_mock_api_wrapper(config)
+        google_maps = Mock(spec=Client)
+        logger = Mock()
+        logger.log = Mock(return_value=None)
+        mapper = Mapper(config, api_wrapper, google_maps, logger)
+        mapper.location_store = Mock()
+
+        api_wrapper.set_position(51.5044524, -0.0752479, 10)
+
+        pgo = api_wrapper.get_api()
+        pgo.set_response("get_map_objects", {
+            "map_cells": [
+                {
+                    "s2_cell_id": 1,
+                    "current_timestamp_ms": 1000,
+                    "spawn_points": [{"latitude": 51.5045, "longitude": -0.0753}],
+                    "forts": [
+                        dict(self._create_pokestop(1), id="fort_near", latitude=51.5046, longitude=-0.0752),
+                        dict(self._create_pokestop(1), id="fort_far", latitude=51.5144, longitude=-0.0752)
+                    ]
+                },
+                {
+                    "s2_cell_id": 2,
+                    "current_timestamp_ms": 1000,
+                    "forts": [
+                        dict(self._create_pokestop(2), id="fort_nearer", latitude=51.5045, longitude=-0.0752)
+                    ]
+                }
+            ]
+        })
+
+        mapper.get_cells(51.5044524, -0.0752479)
+
+        worldmap = mapper.worldmap
+        assert [fort.fort_id for _, fort in worldmap.get_forts_within(51.5044524, -0.0752479, 100)] == \
+            ["fort_nearer", "fort_near"]
+        assert [fort.fort_id for _, fort in worldmap.get_nearest_forts(51.5044524, -0.0752479, 3)] == \
+            ["fort_nearer", "fort_near", "fort_far"]
+        assert [fort.fort_id for _, fort in worldmap.get_nearest_forts(51.5044524, -0.0752479, 1,
+                                                                       lambda fort: fort.fort_id != "fort_nearer")] == \
+            ["fort_near"]
+        assert [point for _, point in worldmap.get_spawn_points_within(51.5044524, -0.0752479, 50)] == \
+            [(51.5045, -0.0753)]
+
+        # A fort that moved is found at its new position
+        worldmap.update_map_objects({
+            "map_cells": [
+                {
+                    "s2_cell_id": 2,
+                    "forts": [
+                        dict(self._create_pokestop(2), id="fort_nearer", latitude=51.5244, longitude=-0.0752,
+                             last_modified_timestamp_ms=2000)
+                    ]
+                }
+            ]
+        })
+        assert [fort.fort_id for _, fort in worldmap.get_forts_within(51.5044524, -0.0752479, 100)] == ["fort_near"]
+
+        # Forgotten cells are gone from the index
+        worldmap.evict_cells(0, 0, 2000)
+        assert [fort.fort_id for _, fort in worldmap.get_nearest_forts(51.5044524, -0.0752479, 3)] == ["fort_nearer"]
+        assert len(worldmap.get_spawn_points_within(51.5044524, -0.0752479, 50)) == 0
+
+    @staticmethod
+    def test_covering_cache():
+        config = create_core_test_config({
+            "mapping": {
+                "cell_radius": 10,
+                "covering_cache_size": 2
+            }
+        })
+        api_wrapper = create_mock_api_wrapper(config)
+        google_maps = Mock(spec=Client)
+        logger = Mock()
+        logger.log = Mock(return_value=None)
+        mapper = Mapper(config, api_wrapper, google_maps, logger)
+
+        # Both positions are in the same level 15 cell
+        api_wrapper.set_position(51.5044524, -0.0752479, 10)
+        cells = mapper._get_cell_id_from_latlong(10)  # pylint: disable=protected-access
+        api_wrapper.set_position(51.5044600, -0.0752400, 10)
+        assert mapper._get_cell_id_from_latlong(10) == cells  # pylint: disable=protected-access
+        assert len(cells) == 21
+        assert mapper.get_covering_stats() == {"hits": 1, "misses": 1, "size": 1}
+
+        # A different radius or a different cell is a new covering, the least recently used one goes
+        mapper._get_cell_id_from_latlong(5)  # pylint: disable=protected-access
+        api_wrapper.set_position(51.5144524, -0.0752479, 10)
+        mapper._get_cell_id_from_latlong(10)  # pylint: disable=protected-access
+        assert mapper.get_covering_stats() == {"hits": 1, "misses": 3, "size": 2}
+
+        api_wrapper.set_position(51.5044524, -0.0752479, 10)
+        assert mapper._get_cell_id_from_latlong(10) == cells  # pylint: disable=protected-access
+        assert mapper.get_covering_stats() == {"hits": 1, "misses": 4, "size": 2}
+
     @staticmethod
     def test_find_location_with_coordinates():
         config = create_core_test_config()
@@ -94,3 +94,46 @@ class GooglePathFinderTest(unittest.TestCase):
         lat, lng = path[0]
         assert lat == 51.5060435
         assert lng == -0.073983
+
+    @staticmethod
+    def test_path_cached():
+        client = Mock()
+        client.directions = MagicMock(return_value=[
+            {
+                "legs": [
+                    {
+                        "steps": [
+                            {
+                                "end_location": {
+                                    "lat": 51.5050996,
+                                    "lng": -0.0747055
+                                }
+                            }
+                        ]
+                    }
+                ]
+            }
+        ])
+
+        path_finder = GooglePathFinder(create_core_test_config(), client)
+        path = path_finder.path(51.5043872, -0.0741802, 51.5060435, -0.073983)
+
+        # A few meters off, the destination is still walked to exactly
+        assert path_finder.path(51.5043870, -0.0741800, 51.5060436, -0.073984) == \
+            [(51.5050996, -0.0747055), (51.5060436, -0.073984)]
+        assert path_finder.path(51.5043872, -0.0741802, 51.5060435, -0.073983) == path
+
+        assert client.directions.call_count == 1
+        assert path_finder.path_cache.get_stats()["hits"] == 2
+
+    @staticmethod
+    def test_path_not_found_not_cached():
+        client = Mock()
+        client.directions = MagicMock(return_value=[])
+
+        path_finder = GooglePathFinder(create_core_test_config(), client)
+        assert path_finder.path(51.5043872, -0.0741802, 51.5060435, -0.073983) == [(51.5060435, -0.073983)]
+        assert path_finder.path(51.5043872, -0.0741802, 51.5060435, -0.073983) == [(51.5060435, -0.073983)]
+
+        assert client.directions.call_count == 2
+        assert path_finder.path_cache.get_stats()["size"] == 0
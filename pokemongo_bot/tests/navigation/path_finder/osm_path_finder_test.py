@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytest
+
+from pokemongo_bot.navigation.path_finder import OsmPathFinder
+from pokemongo_bot.navigation.path_finder.osm_path_finder import WalkingGraph
+from pokemongo_bot.tests import create_core_test_config
+
+OSM_FILE = os.path.join(os.path.dirname(__file__), 'fixtures', 'walking.osm')
+
+
+class OsmPathFinderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_filename = os.path.join(self.directory, 'walking.graph')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _create_path_finder(self):
+        config = create_core_test_config({
+            "movement": {
+                "path_finder": "osm",
+                "osm_file": OSM_FILE,
+                "osm_graph_cache": self.cache_filename
+            }
+        })
+        return OsmPathFinder(config)
+
+    @staticmethod
+    def test_graph():
+        graph = WalkingGraph.from_osm(OSM_FILE)
+
+        # The motorway, the private and no foot ways and the building are left out
+        assert len(graph) == 10
+        assert len(graph.neighbours) == 2 * 9
+
+        node = graph.get_nearest_node(51.5049, -0.0745, 10)
+        assert graph.get_position(node) == (51.5049, -0.0745)
+        assert [graph.get_position(neighbour)
+                for neighbour in graph.neighbours[graph.offsets[node]:graph.offsets[node + 1]]] == \
+            [(51.5049, -0.0760), (51.5049, -0.0730)]
+
+        assert graph.get_nearest_node(51.5140, -0.0745, 100) is None
+
+    def test_path(self):
+        path_finder = self._create_path_finder()
+
+        # Through the middle, the motorway along the south can't be walked
+        path = path_finder.path(51.50401, -0.07599, 51.50399, -0.07301)
+
+        assert path == [(51.5040, -0.0760), (51.5049, -0.0760), (51.5049, -0.0745), (51.5049, -0.0730),
+                        (51.5040, -0.0730), (51.50399, -0.07301)]
+
+    def test_path_no_route(self):
+        path_finder = self._create_path_finder()
+
+        # Not connected to the rest
+        assert path_finder.path(51.50401, -0.07599, 51.5070, -0.0750) == [(51.5070, -0.0750)]
+
+        # Too far from any way
+        assert path_finder.path(51.50401, -0.07599, 51.6, -0.0750) == [(51.6, -0.0750)]
+
+    def test_graph_cache(self):
+        path_finder = self._create_path_finder()
+        graph = path_finder.get_graph()
+        assert os.path.isfile(self.cache_filename)
+
+        cached_graph = WalkingGraph.load(OSM_FILE, self.cache_filename)
+        assert cached_graph is not graph
+        assert cached_graph.latitudes == graph.latitudes
+        assert cached_graph.neighbours == graph.neighbours
+        assert cached_graph.lengths == graph.lengths
+
+        # A broken cache is built again
+        with open(self.cache_filename, 'wb') as cache_file:
+            cache_file.write(b'broken')
+        assert len(WalkingGraph.load(OSM_FILE, self.cache_filename)) == 10
+        assert len(WalkingGraph.load(OSM_FILE, self.cache_filename)) == 10
+
+    @staticmethod
+    def test_no_osm_file():
+        path_finder = OsmPathFinder(create_core_test_config())
+
+        with pytest.raises(Exception):
+            path_finder.path(51.50401, -0.07599, 51.50399, -0.07301)
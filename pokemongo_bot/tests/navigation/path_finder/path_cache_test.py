@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from pokemongo_bot.navigation.path_finder import PathCache
+from pokemongo_bot.tests import create_core_test_config
+
+
+class PathCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _create_path_cache(self, movement_config=None, logger=None):
+        config = {
+            "path_cache_size": 2,
+            "path_cache_ttl": 60,
+            "path_cache_file": os.path.join(self.directory, "path-cache.json")
+        }
+        config.update(movement_config or {})
+        return PathCache(create_core_test_config({"movement": config}), logger)
+
+    def test_get_and_put(self):
+        path_cache = self._create_path_cache()
+
+        assert path_cache.get(51.5043872, -0.0741802, 51.5060435, -0.073983) is None
+        path_cache.put(51.5043872, -0.0741802, 51.5060435, -0.073983, [(51.5050996, -0.0747055)])
+
+        assert path_cache.get(51.5043872, -0.0741802, 51.5060435, -0.073983) == [(51.5050996, -0.0747055)]
+        # The path back is a different one
+        assert path_cache.get(51.5060435, -0.073983, 51.5043872, -0.0741802) is None
+
+        assert path_cache.get_stats() == {"hits": 1, "misses": 2, "hit_rate": 1.0 / 3, "size": 1}
+
+    def test_lru(self):
+        path_cache = self._create_path_cache()
+
+        path_cache.put(51.50, -0.07, 51.51, -0.07, [])
+        path_cache.put(51.51, -0.07, 51.52, -0.07, [])
+        assert path_cache.get(51.50, -0.07, 51.51, -0.07) == []
+
+        # The least recently used path goes
+        path_cache.put(51.52, -0.07, 51.53, -0.07, [])
+        assert path_cache.get(51.51, -0.07, 51.52, -0.07) is None
+        assert path_cache.get(51.50, -0.07, 51.51, -0.07) == []
+        assert path_cache.get_stats()["size"] == 2
+
+    def test_ttl(self):
+        path_cache = self._create_path_cache()
+
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            path_cache.put(51.50, -0.07, 51.51, -0.07, [(51.505, -0.07)])
+
+            time.return_value = 1059.0
+            assert path_cache.get(51.50, -0.07, 51.51, -0.07) == [(51.505, -0.07)]
+
+            time.return_value = 1060.0
+            assert path_cache.get(51.50, -0.07, 51.51, -0.07) is None
+
+    def test_file(self):
+        path_cache = self._create_path_cache()
+        path_cache.put(51.50, -0.07, 51.51, -0.07, [(51.505, -0.07)])
+        path_cache.flush()
+
+        path_cache = self._create_path_cache()
+        assert path_cache.get(51.50, -0.07, 51.51, -0.07) == [(51.505, -0.07)]
+
+        with open(os.path.join(self.directory, "path-cache.json"), "w") as cache_file:
+            cache_file.write("[[")
+        path_cache = self._create_path_cache()
+        assert path_cache.get(51.50, -0.07, 51.51, -0.07) is None
+
+        # Without a file, nothing is written
+        path_cache = self._create_path_cache({"path_cache_file": None})
+        path_cache.put(51.50, -0.07, 51.51, -0.07, [])
+        path_cache.flush()
+        assert os.listdir(self.directory) == ["path-cache.json"]
+
+    def test_save_interval(self):
+        filename = os.path.join(self.directory, "path-cache.json")
+
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            path_cache = self._create_path_cache({"path_cache_size": 10, "path_cache_save_interval": 300})
+
+            # New paths are only written once in a while rather than on every miss
+            path_cache.put(51.50, -0.07, 51.51, -0.07, [(51.505, -0.07)])
+            time.return_value = 1299.0
+            path_cache.put(51.51, -0.07, 51.52, -0.07, [(51.515, -0.07)])
+            assert os.path.isfile(filename) is False
+
+            time.return_value = 1300.0
+            path_cache.put(51.52, -0.07, 51.53, -0.07, [(51.525, -0.07)])
+            with open(filename) as cache_file:
+                assert len(json.load(cache_file)) == 3
+
+            # Flushing writes whatever is left
+            path_cache.put(51.53, -0.07, 51.54, -0.07, [(51.535, -0.07)])
+            path_cache.flush()
+            with open(filename) as cache_file:
+                assert len(json.load(cache_file)) == 4
+
+    def test_save_error(self):
+        logger = Mock()
+        logger.log = Mock(return_value=None)
+        path_cache = self._create_path_cache({"path_cache_file": os.path.join(self.directory, "missing", "cache.json")},
+                                             logger)
+
+        path_cache.put(51.50, -0.07, 51.51, -0.07, [(51.505, -0.07)])
+        path_cache.flush()
+
+        # The failure is logged and the path is still cached in memory
+        assert logger.log.call_count == 1
+        assert logger.log.call_args[1]["color"] == "red"
+        assert path_cache.get(51.50, -0.07, 51.51, -0.07) == [(51.505, -0.07)]
@@ -0,0 +1,39 @@
+import unittest
+
+from pokemongo_bot.navigation.route import Route
+from pokemongo_bot.utils import distance
+
+
+class RouteTest(unittest.TestCase):
+    @staticmethod
+    def test_route():
+        # 205.5 meters in steps of 3 meters, then back
+        route = Route(51.5044524, -0.0752479, [(51.5062939, -0.0750065), (51.5044524, -0.0752479)], 10, 3.0)
+
+        assert len(route) == 138
+
+        steps = list(route)
+        assert len(steps) == 138
+        assert steps == list(route)
+        for lat, lng, alt in steps:
+            assert alt == 10
+            assert distance(lat, lng, 51.5044524, -0.0752479) < 210
+
+        assert distance(steps[68][0], steps[68][1], 51.5062939, -0.0750065) < 5
+        assert distance(steps[-1][0], steps[-1][1], 51.5044524, -0.0752479) < 5
+
+    @staticmethod
+    def test_route_is_lazy():
+        route = Route(0.0, 0.0, [(10.0, 10.0)], 0, 0.6)
+        assert len(route) > 2000000
+
+        steps = iter(route)
+        assert len(next(steps)) == 3
+
+    @staticmethod
+    def test_route_without_legs():
+        route = Route(51.5044524, -0.0752479, [(51.5044524, -0.0752479)], 10, 3.0)
+
+        assert len(route) == 0
+        assert list(route) == []
+        assert len(Route(51.5044524, -0.0752479, [], 10, 3.0)) == 0
@@ -0,0 +1,56 @@
+import unittest
+
+from mock import patch
+
+from pokemongo_bot.scan_scheduler import ScanScheduler
+from pokemongo_bot.tests import create_core_test_config
+
+
+class ScanSchedulerTest(unittest.TestCase):
+    @staticmethod
+    def test_init():
+        config = create_core_test_config({
+            "mapping": {
+                "scan_distance": 40,
+                "scan_min_interval": 5,
+                "scan_max_interval": 20
+            }
+        })
+        scan_scheduler = ScanScheduler(config)
+
+        assert scan_scheduler.scan_distance == 40
+        assert scan_scheduler.min_interval == 5
+        assert scan_scheduler.max_interval == 20
+
+    @staticmethod
+    def test_is_scan_due():
+        config = create_core_test_config({
+            "mapping": {
+                "scan_distance": 50,
+                "scan_min_interval": 10,
+                "scan_max_interval": 30
+            }
+        })
+        scan_scheduler = ScanScheduler(config)
+
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            assert scan_scheduler.is_scan_due(51.5044524, -0.0752479) is True
+            scan_scheduler.record_scan(51.5044524, -0.0752479)
+
+            # Far away, but too soon after the last scan
+            time.return_value = 1005.0
+            assert scan_scheduler.is_scan_due(51.5054524, -0.0752479) is False
+
+            # Far away, after the minimum interval
+            time.return_value = 1010.0
+            assert scan_scheduler.is_scan_due(51.5044600, -0.0752400) is False
+            assert scan_scheduler.is_scan_due(51.5054524, -0.0752479) is True
+
+            # Not moving, after the maximum interval
+            time.return_value = 1030.0
+            assert scan_scheduler.is_scan_due(51.5044600, -0.0752400) is True
+            scan_scheduler.record_scan(51.5044600, -0.0752400)
+
+        assert scan_scheduler.scans == 2
+        assert scan_scheduler.skipped == 2
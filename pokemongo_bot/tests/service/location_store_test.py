@@ -0,0 +1,86 @@
+import json
+import os
+import unittest
+
+from mock import Mock, patch
+
+from pokemongo_bot.service.location_store import LocationStore
+from pokemongo_bot.tests import create_core_test_config, test_account_name
+
+
+class LocationStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.account = test_account_name()
+        self.filename = 'data/last-location-' + self.account + '.json'
+
+    def tearDown(self):
+        if os.path.isfile(self.filename):
+            os.unlink(self.filename)
+
+    def _create_location_store(self):
+        config = create_core_test_config({
+            "login": {
+                "username": self.account
+            },
+            "mapping": {
+                "location_save_interval": 10,
+                "location_save_distance": 50
+            }
+        })
+        return LocationStore(config, Mock())
+
+    def _read_location(self):
+        with open(self.filename) as location_file:
+            location_json = json.load(location_file)
+        return location_json["lat"], location_json["lng"]
+
+    def test_load_missing(self):
+        location_store = self._create_location_store()
+
+        assert location_store.load() is None
+
+        with open(self.filename, 'w') as location_file:
+            location_file.write('{"lat": 51.50')
+
+        assert location_store.load() is None
+
+    def test_save_and_load(self):
+        location_store = self._create_location_store()
+
+        location_store.save(51.5044524, -0.0752479)
+        location_store.flush()
+
+        assert self._read_location() == (51.5044524, -0.0752479)
+        assert location_store.load() == (51.5044524, -0.0752479)
+        assert os.path.isfile(self.filename + '.tmp') is False
+
+    def test_save_debounced(self):
+        location_store = self._create_location_store()
+
+        with patch('time.time') as time:
+            time.return_value = 1000.0
+            location_store.save(51.5044524, -0.0752479)
+            location_store.flush()
+
+            # A few meters and a few seconds later, nothing is written
+            time.return_value = 1005.0
+            location_store.save(51.5044600, -0.0752400)
+            location_store._queue.join()  # pylint: disable=protected-access
+            assert self._read_location() == (51.5044524, -0.0752479)
+
+            # Far enough away
+            location_store.save(51.5054524, -0.0752479)
+            location_store._queue.join()  # pylint: disable=protected-access
+            assert self._read_location() == (51.5054524, -0.0752479)
+
+            # Long enough after the last write
+            location_store.save(51.5054600, -0.0752400)
+            time.return_value = 1020.0
+            location_store.save(51.5054700, -0.0752300)
+            location_store._queue.join()  # pylint: disable=protected-access
+            assert self._read_location() == (51.5054700, -0.0752300)
+
+            # Flushing writes the last position even if it is not due
+            location_store.save(51.5054800, -0.0752200)
+            location_store.flush()
+            assert self._read_location() == (51.5054800, -0.0752200)
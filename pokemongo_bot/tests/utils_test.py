@@ -1,9 +1,14 @@
+import os
+import shutil
 import sys
+import tempfile
 import unittest
 from io import StringIO
 
+from mock import patch
+
 from api.worldmap import PokeStop, Gym
-from pokemongo_bot.utils import distance, filtered_forts, convert, dist_to_str, format_dist, format_time
+from pokemongo_bot.utils import distance, fast_distance, haversine_distance, filtered_forts, sorted_forts, nearest_forts, convert, dist_to_str, format_dist, format_time, replace_file
 
 
 class UtilsTest(unittest.TestCase):
@@ -17,6 +22,17 @@ class UtilsTest(unittest.TestCase):
 
         assert round(dist, 2) == 65.41
 
+    @staticmethod
+    def test_fast_distance():
+        # Short distances, equirectangular
+        assert abs(fast_distance(51.503056, -0.119500, 51.503635, -0.119337) - 65.41) < 0.5
+        assert fast_distance(51.503056, -0.119500, 51.503056, -0.119500) == 0
+
+        # London to Paris, haversine
+        dist = fast_distance(51.503056, -0.119500, 48.858222, 2.294500)
+        assert round(dist) == round(haversine_distance(51.503056, -0.119500, 48.858222, 2.294500))
+        assert abs(dist - distance(51.503056, -0.119500, 48.858222, 2.294500)) < 0.005 * dist
+
     def test_filtered_forts(self):
 
         forts = [
@@ -33,6 +49,41 @@ class UtilsTest(unittest.TestCase):
         assert returned_forts[2].fort_id == 'pokestop_test_3'
         assert returned_forts[1].fort_id == 'pokestop_test_1'
 
+    def test_sorted_forts(self):
+        forts = [
+            self._create_fort("pokestop", "test_1", 51.50204, -0.11955),
+            self._create_fort("pokestop", "test_2", 51.503342, -0.119668),
+            self._create_fort("pokestop", "test_3", 51.504250, -0.117458),
+            self._create_fort("gym", "test_4", 51.503602, -0.118756)
+        ]
+
+        assert [fort.fort_id for fort in sorted_forts(51.503056, -0.119500, forts)] == \
+            ['pokestop_test_2', 'gym_test_4', 'pokestop_test_1', 'pokestop_test_3']
+        assert sorted_forts(51.503056, -0.119500, []) == []
+
+    def test_nearest_forts(self):
+        forts = [
+            self._create_fort("pokestop", "test_1", 51.50204, -0.11955),
+            self._create_fort("pokestop", "test_2", 51.503342, -0.119668),
+            self._create_fort("pokestop", "test_3", 51.504250, -0.117458),
+            self._create_fort("gym", "test_4", 51.503602, -0.118756)
+        ]
+
+        nearest = nearest_forts(51.503056, -0.119500, forts)
+        assert next(nearest).fort_id == 'pokestop_test_2'
+        assert next(nearest).fort_id == 'gym_test_4'
+
+        checked = []
+
+        def is_pokestop(fort):
+            checked.append(fort.fort_id)
+            return isinstance(fort, PokeStop)
+
+        assert [fort.fort_id for fort in nearest_forts(51.503056, -0.119500, forts, is_pokestop)] == \
+            ['pokestop_test_2', 'pokestop_test_1', 'pokestop_test_3']
+        assert len(checked) == 4
+        assert list(nearest_forts(51.503056, -0.119500, [])) == []
+
     @staticmethod
     def test_convert():
         assert (convert(10000.0, "mm", "mm")) == 10000.0
@@ -116,6 +167,30 @@ class UtilsTest(unittest.TestCase):
         assert (format_time(123.456)) == "2.06 minutes"
         assert (format_time(12345.678)) == "12345.68 seconds"
 
+    @staticmethod
+    def test_replace_file():
+        directory = tempfile.mkdtemp()
+        try:
+            source = os.path.join(directory, 'file.tmp')
+            destination = os.path.join(directory, 'file')
+
+            for content in ('first', 'second'):
+                with open(source, 'w') as source_file:
+                    source_file.write(content)
+                replace_file(source, destination)
+
+            # Without an atomic overwrite, as on Windows with Python 2
+            with open(source, 'w') as source_file:
+                source_file.write('third')
+            with patch('pokemongo_bot.utils._replace', side_effect=OSError()):
+                replace_file(source, destination)
+
+            assert os.listdir(directory) == ['file']
+            with open(destination) as destination_file:
+                assert destination_file.read() == 'third'
+        finally:
+            shutil.rmtree(directory)
+
     @staticmethod
     def _create_fort(fort_type, name, lat, lng):
         if fort_type == 'gym':
@@ -3,14 +3,20 @@
 from __future__ import print_function
 # pylint: disable=redefined-builtin
 from builtins import bytes, str, int
+import heapq
+import os
 import struct
 import time
 
 from six import integer_types
+from api.geo import get_distance as equirectangular_distance, get_haversine_distance as haversine_distance
 from api.worldmap import PokeStop
 from colorama import init               # type: ignore
 from geopy.distance import vincenty     # type: ignore
 
+# Overwrites the target in one step, os.rename does that too on POSIX systems but not on Windows
+_replace = getattr(os, "replace", os.rename)
+
 # Uncomment to enable type annotations for Python 3
 # from typing import List
 # from api.worldmap import Fort
@@ -18,11 +24,26 @@ from geopy.distance import vincenty     # type: ignore
 init()
 
 
+# Below this many meters the equirectangular approximation is within centimeters of haversine
+EQUIRECTANGULAR_LIMIT = 1000.0
+
+
+# Vincenty's formula on the WGS-84 ellipsoid. Accurate to the millimeter but iterative, use it for what is shown
+# to the user and fast_distance to sort or compare.
 def distance(lat1, lon1, lat2, lon2):
     # type: (float, float, float, float) -> float
     return vincenty((lat1, lon1), (lat2, lon2)).meters
 
 
+# Equirectangular for short distances, haversine for the rest.
+def fast_distance(lat1, lon1, lat2, lon2):
+    # type: (float, float, float, float) -> float
+    dist = equirectangular_distance(lat1, lon1, lat2, lon2)
+    if dist < EQUIRECTANGULAR_LIMIT:
+        return dist
+    return haversine_distance(lat1, lon1, lat2, lon2)
+
+
 def filtered_forts(lat, lng, forts):
     # type: (float, float, List[Fort]) -> List[Fort]
     # pylint: disable=bad-continuation
@@ -32,8 +53,29 @@ def filtered_forts(lat, lng, forts):
                 not fort.is_in_cooldown() and\
                 fort.latitude is not None and fort.longitude is not None
 
-    filtered_list = [(fort, distance(lat, lng, fort.latitude, fort.longitude)) for fort in forts if should_keep(fort)]
-    return [x[0] for x in sorted(filtered_list, key=lambda y: y[1])]
+    return sorted_forts(lat, lng, [fort for fort in forts if should_keep(fort)])
+
+
+# The forts nearest first, for when all of them are needed anyway.
+def sorted_forts(lat, lng, forts):
+    # type: (float, float, List[Fort]) -> List[Fort]
+    return sorted(forts, key=lambda fort: fast_distance(lat, lng, fort.latitude, fort.longitude))
+
+
+# Yields the forts nearest first. Forts the predicate rejects are dropped before any distance is computed, and
+# the rest are heapified rather than sorted, so taking the first few of many forts is cheap.
+def nearest_forts(lat, lng, forts, predicate=None):
+    # type: (float, float, Iterable[Fort], Optional[Callable[[Fort], bool]]) -> Iterator[Fort]
+    if predicate is not None:
+        forts = [fort for fort in forts if predicate(fort)]
+    else:
+        forts = list(forts)
+
+    heap = [(fast_distance(lat, lng, fort.latitude, fort.longitude), index) for index, fort in enumerate(forts)]
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        _, index = heapq.heappop(heap)
+        yield forts[index]
 
 
 def convert(original_distance, from_unit, to_unit):  # Converts units
@@ -117,3 +159,16 @@ def format_time(seconds):
         minutes = seconds / 60
         return '{:.2f} minutes'.format(minutes)
     return '{:.2f} seconds'.format(seconds)
+
+
+def replace_file(source, destination):
+    # type: (str, str) -> None
+    # Move source over destination, so that readers see either the old or the new file
+    try:
+        _replace(source, destination)
+    except OSError:
+        # Python 2 on Windows can't rename over an existing file, the destination has to go first
+        if not os.path.isfile(destination):
+            raise
+        os.remove(destination)
+        os.rename(source, destination)